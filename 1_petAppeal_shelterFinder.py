@@ -1,15 +1,16 @@
+import os
 import pandas as pd
 import petAppeal
 
 local_file_path = ''
 
 ##Request api key and api secret from https://www.petfinder.com/developers/api-docs
-petFinder_api_key = ''
+##and export it as PETFINDER_API_KEY
+petFinder_api_key = os.environ.get('PETFINDER_API_KEY', '')
 
 ##This uses the scraped No Kill Network list to query for animal shelters
 ##Any list of (US) zip codes can be used for querying
-url = 'https://raw.githubusercontent.com/beccarobins/PetAppeal/master/No%20Kill%20Network%20Animal%20Shelters.csv'
-zip_code_list = pd.read_csv(url)
+zip_code_list = pd.read_csv(local_file_path + 'No Kill Network Animal Shelters.csv')
 zip_code_list = zip_code_list.dropna(axis=0).reset_index().drop(labels=['Unnamed: 0', 'index'], axis=1)
 
 shelters = pd.DataFrame()
@@ -32,7 +33,10 @@ shelters = shelters.reset_index().drop(['index'], axis = 1)
 ##the shelterFinder method will return all shelters in a specified zip code
 ##and sometimes those in the surrounding areas
 ##If seeking only No Kill shelters, the list will need to be filtered again
-no_kill_shelters = pd.merge(left=zip_code_list, right=shelters, left_on=['shelter_name', 'state_abbr'], right_on=['name', 'state'])
+##Names are matched fuzzily within each state, since the scraped names are often
+##spelled slightly differently (abbreviations, 'Inc.', '&'); match_score is the
+##name similarity of each pair
+no_kill_shelters = petAppeal.match_shelters(zip_code_list, shelters, left_on=['shelter_name', 'state_abbr'], right_on=['name', 'state'], min_score=0.8)
 no_kill_shelters = no_kill_shelters.drop(labels=['shelter_zip_code', 'shelter_city', 'state_abbr','name'], axis=1)
 
 ##Add the file path where the shelter list should be saved
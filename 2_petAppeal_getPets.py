@@ -1,13 +1,16 @@
+import os
 import pandas as pd
 import petAppeal
 
+local_file_path = ''
+
 ##Request api key and api secret from https://www.petfinder.com/developers/api-docs
-petFinder_api_key = ''
+##and export it as PETFINDER_API_KEY
+petFinder_api_key = os.environ.get('PETFINDER_API_KEY', '')
 
 ##This uses the animal shelters queried from the No Kill list to find animals
 ##Animal shelter ids are required to query for pets
-url = 'https://raw.githubusercontent.com/beccarobins/PetAppeal/master/Petfinder%20No%20Kill%20Shelters.csv'
-shelters = pd.read_csv(url)
+shelters = pd.read_csv(local_file_path + 'Petfinder No Kill Shelters.csv')
 shelter_animals = pd.DataFrame()
 
 status_ids = ['X', 'A', 'H', 'P']
@@ -19,7 +22,6 @@ for i in range(0, len(shelters)):
     for status in status_ids:    
         shelter_animals = shelter_animals.append(petAppeal.getPets(shelter_id, petFinder_api_key, status))
 
-local_file_path = ''
 petfinder_file = local_file_path + 'petfinder_shelter_animals.csv'
 
 shelter_animals.to_csv(petfinder_file)
\ No newline at end of file
@@ -6,6 +6,10 @@ import os
 local_file_path = os.getcwd()+'/'
 petfinder_file = local_file_path + 'petfinder_shelter_animals.csv'
 
+##Photo features download every pet's main photo and, when present, are used
+##as model features by script 5; export PETAPPEAL_PHOTOS=1 to include them
+fetch_photos = bool(os.environ.get('PETAPPEAL_PHOTOS'))
+
 shelter_animals = pd.read_csv(petfinder_file)
 shelter_animals = shelter_animals.drop(labels='Unnamed: 0', axis=1)
 
@@ -41,12 +45,32 @@ shelter_animals = multi_adoption_df.merge(shelter_animals, left_index=True, righ
 image_df = petAppeal.image_analysis(shelter_animals['photos'])
 shelter_animals = image_df.merge(shelter_animals, left_index=True, right_index=True)
 
-shelter_animals['status'] = shelter_animals['status'].str.replace('A', 'Available')
-shelter_animals['status'] = shelter_animals['status'].str.replace('X', 'Adopted')
-shelter_animals['status'] = shelter_animals['status'].str.replace('H', 'On Hold')
-shelter_animals['status'] = shelter_animals['status'].str.replace('P', 'Pending')
+##Downloads each pet's main photo (cached in petfinder_photos/ across runs,
+##failed downloads for a day) and measures its resolution, brightness,
+##contrast and sharpness
+if fetch_photos:
+    photo_df = petAppeal.photo_features(shelter_animals['photos'],
+                                        cache_dir=local_file_path + 'petfinder_photos')
+    shelter_animals = photo_df.merge(shelter_animals, left_index=True, right_index=True)
+
+##The frame as munged so far, to report what the dtypes below save
+munged_animals = shelter_animals.copy(deep=False)
+
+##Status codes (A, X, H, P) to names in one categorical lookup
+shelter_animals['status'] = petAppeal.decode_status(shelter_animals['status'])
+
+##Store the low-cardinality columns as categoricals and the yes/no flags as
+##bools (the shared dtype policy; scripts 4 and 5 load with the same one)
+shelter_animals = petAppeal.apply_dtypes(shelter_animals)
+print petAppeal.memory_report(munged_animals, shelter_animals)
+del munged_animals
 
 local_file_path = ''
 petfinder_file = local_file_path + 'petfinder_data_clean.csv'
 
 shelter_animals.to_csv(petfinder_file)
+
+##The same data partitioned by animal type and state, so later scripts read
+##only the slices they filter on (see petAppeal.read_partitioned)
+petAppeal.write_partitioned(shelter_animals, local_file_path + 'petfinder_data_clean',
+                            partition_cols=['animal', 'state'])
@@ -5,29 +5,39 @@ import seaborn as sns
 import numpy as np
 
 local_file_path = ''
-petfinder_file = local_file_path + 'petfinder_data_clean.csv'
+petfinder_data = local_file_path + 'petfinder_data_clean'
 
-shelter_animals = pd.read_csv(petfinder_file)
+##Compare adopted with available animals only. On hold/pending pets are left
+##out explicitly, as balance_check now keeps every class instead of only
+##the first two
+##Loaded with categorical columns and bool yes/no flags (see apply_dtypes)
+shelter_animals = petAppeal.read_pets(petfinder_data,
+                                      filters={'status': ['Available', 'Adopted']})
 
-drop_cols = ['Unnamed: 0', 'address1', 'address2', 'city', 'description',
+drop_cols = ['address1', 'address2', 'city', 'description',
              'email', 'lastUpdate', 'name', 'pet_id', 'phone', 'photos',
-             'shelter_id', 'state', 'zip', 'fax', 'id']
+             'shelter_id', 'state', 'zip', 'fax', 'id', 'duplicate_cluster',
+             'duplicate_count']
 
+##Collapse animals cross-posted by several shelters under different ids
+shelter_animals = petAppeal.dedupe_pets(shelter_animals)
 shelter_animals = shelter_animals.drop(labels=drop_cols, axis=1).reset_index(drop=True)
-shelter_animals = petAppeal.balance_check(shelter_animals, 'status')
+shelter_animals = petAppeal.balance_check(shelter_animals, 'status').reset_index(drop=True)
 
 ##Set a logical (i.e., not alphabetical) order to view variables on figures
 status = ['Available', 'Adopted']
-age = ['Baby', 'Young', 'Adult', 'Senior']
-sex = ['M', 'F', 'U']
-size = ['S', 'M', 'L', 'XL']
-animal = ['Cat', 'Dog', 'Rabbit', 'Bird', 'Scales, Fins & Other',
-          'Small & Furry', 'Horse', 'Barnyard']
-bi_var = ['yes', 'no']
+age = petAppeal.CATEGORIES['age']
+sex = petAppeal.CATEGORIES['sex']
+size = petAppeal.CATEGORIES['size']
+animal = petAppeal.ANIMALS
+bi_var = petAppeal.YES_NO
 
 #Determine unqiue breeds by removing coat color
+animal_groups = shelter_animals.groupby('animal')
 for animal_type in animal:
-    animal_types = shelter_animals[(shelter_animals.animal == animal_type)]
+    if animal_type not in animal_groups.groups:
+        continue
+    animal_types = animal_groups.get_group(animal_type)
     breeds = petAppeal.unique_breeds(animal_types.breed)
     petAppeal.plot_treemap(breeds, animal_type)
     
@@ -42,8 +52,7 @@ reorder_dict = {'status': status, 'age': age, 'sex': sex, 'size': size,
                 'noKids': bi_var, 'specialNeeds': bi_var, 'mix': bi_var}
 
 for key, value in reorder_dict.iteritems():
-    data = shelter_animals.groupby(key).size()[value].fillna(0)
-    data = data.reindex(index= value)
+    data = petAppeal.category_counts(shelter_animals[key], value)
     title = key.translate(None, string.punctuation).upper() + ' - ALL ANIMALS' 
     petAppeal.piePlot(data, data.index.values, title)
     
@@ -54,32 +63,42 @@ available = shelter_animals[(shelter_animals.status == 'Available')]
 reorder_dict.pop('status', None)
     
 for key, value in reorder_dict.iteritems():
-    data1 = adopted.groupby(key).size()[value].fillna(0)
-    data2 = available.groupby(key).size()[value].fillna(0)
+    data1 = petAppeal.category_counts(adopted[key], value)
+    data2 = petAppeal.category_counts(available[key], value)
     df = pd.DataFrame({'Adopted': data1, 'Available': data2})
     df.columns = status
     df = df.reset_index()
     petAppeal.group_bar_graph(df, ['Adopted', 'Available'], key)
 
 ##View numerical variables by status label
-reorder_dict = {'description_length': shelter_animals['description_length'],
-                'description_polarity': shelter_animals['description_polarity'], 
-                'description_subjectivity': shelter_animals['description_subjectivity']}
+##Moments and histograms are accumulated chunk by chunk so the same code
+##runs on chunked national data (e.g., pd.read_csv(..., chunksize=100000))
+numerical = ['description_length', 'description_polarity',
+             'description_subjectivity']
 
 units_dict = {'description_length': 'N words',
               'description_polarity': 'Polarity', 
               'description_subjectivity': 'Subjectivity'}
 
-adopted = adopted.select_dtypes(include=['int', 'float']).copy()
-available = available.select_dtypes(include=['int', 'float']).copy()
+bin_widths = {'description_length': 10,
+              'description_polarity': 0.05,
+              'description_subjectivity': 0.05}
 
-for key, value in reorder_dict.iteritems():
-    data1 = adopted[key]
-    data2 = available[key]
+##Correlations cover every numeric column, with missing values deleted
+##pairwise like DataFrame.corr()
+numeric_cols = shelter_animals.select_dtypes(include=['number']).columns
+
+chunks = petAppeal.iter_chunks(shelter_animals, 100000)
+moments, hists = petAppeal.accumulate_numeric(chunks, numerical, 'status', bin_widths,
+                                              moment_columns=numeric_cols)
+
+for key in numerical:
+    data1 = hists[key]['Adopted']
+    data2 = hists[key]['Available']
     petAppeal.plot_hist(data1, data2, key, units_dict[key])
 
 ##View correlation matrix for numerical variables
-corr = shelter_animals.corr()
+corr = moments.corr()
 sns.heatmap(corr,
             mask=np.zeros_like(corr, dtype=np.bool),
             cmap=sns.diverging_palette(220, 10, as_cmap=True),
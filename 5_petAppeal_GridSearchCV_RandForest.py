@@ -1,25 +1,47 @@
-import pandas as pd
 import numpy as np
+from scipy import sparse
 import petAppeal
 from sklearn import preprocessing
-from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedShuffleSplit
+from sklearn.model_selection import train_test_split, StratifiedShuffleSplit
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, precision_score, recall_score, f1_score
 
-local_file_path = '/'
-petfinder_file = local_file_path + 'petfinder_data_clean.csv'
+local_file_path = ''
+petfinder_data = local_file_path + 'petfinder_data_clean'
 
-cats_dogs = pd.read_csv(petfinder_file)
-cats_dogs = cats_dogs[(cats_dogs.animal == 'Cat') | (cats_dogs.animal == 'Dog')]
+##Only the Cat and Dog partitions are read; two-class model: adopted versus
+##available. On hold/pending pets are left out explicitly, as balance_check
+##now keeps every class instead of only the first two
+cats_dogs = petAppeal.read_pets(petfinder_data,
+                                filters={'animal': ['Cat', 'Dog'],
+                                         'status': ['Available', 'Adopted']})
 
-drop_cols = ['Unnamed: 0','address1', 'address2', 'email', 'pet_id', 'phone',
+drop_cols = ['address1', 'address2', 'email', 'pet_id', 'phone',
              'breed','lastUpdate', 'name', 'photos','description','zip',
-             'city', 'state', 'shelter_id', 'fax', 'id']
+             'city', 'state', 'shelter_id', 'fax', 'id', 'duplicate_cluster',
+             'duplicate_count']
 
-cats_dogs = cats_dogs.drop(drop_cols, axis=1)
+##Records up to this update time are covered by the model (see script 7);
+##taken before de-duplication and down-sampling drop any of them
+data_through = str(cats_dogs.lastUpdate.max())
+
+##The same animal is often cross-posted by partner shelters under another id;
+##keep one record per near-duplicate cluster so copies are not counted twice
+##or split between train and test
+cats_dogs = petAppeal.dedupe_pets(cats_dogs)
 
-##Check for class imbalance; downsample if necessary
-cats_dogs = petAppeal.balance_check(cats_dogs, 'status')
+##Check for class imbalance; downsample if necessary, keeping each
+##class's mix of states. Seeded, so reruns draw the same training set and
+##can resume the checkpointed search below. The balance pies are left to
+##script 4, which runs alongside this one in the pipeline
+cats_dogs = petAppeal.balance_check(cats_dogs, 'status', strata='state', plot=False,
+                                    random_state=0)
+
+##Hashed n-gram features of the raw description and name text, kept sparse;
+##rows line up with x below
+x_text = petAppeal.pet_text_features(cats_dogs, n_jobs=-1)
+
+cats_dogs = cats_dogs.drop(drop_cols, axis=1)
 
 cats_dogs_encoded = petAppeal.encode_data(cats_dogs)
 
@@ -39,7 +61,7 @@ reversed_labels = le.inverse_transform(encoded_labels)
 
 y = le.transform(y)
 
-x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.2, random_state=0)
+x_train, x_test, x_text_train, x_text_test, y_train, y_test = train_test_split(x, x_text, y, test_size=0.2, random_state=0)
 
 param_grid = [{'n_estimators': range(1,110,10),
                'criterion': ["gini", "entropy"],
@@ -55,41 +77,54 @@ param_grid = [{'n_estimators': range(1,110,10),
                'warm_start': [True, False], 
                'class_weight': [{0: 1, 1: 1}, {0: 1, 1: 5}, {0: 1, 1: 1}, {0: 1, 1: 1}]}]
 
+##Collapse duplicate, equivalent and invalid configurations before fitting
+param_grid, fixed_params, grid_report = petAppeal.normalize_param_grid(param_grid,
+                                                                       n_features=x_train.shape[1])
+print("Grid reduced from %d to %d configurations (%.0fx)"
+      % (grid_report['original_size'], grid_report['normalized_size'], grid_report['reduction']))
+print("Fixed estimator parameters:", fixed_params)
+print("Dropped values:", grid_report['dropped_values'])
+
 scores = ['precision', 'recall']
 
+##The full grid is far too large to search exhaustively, so configurations are
+##raced with successive halving on growing subsamples of each training fold
+##under a fixed fit budget; precision and recall are scored in the same pass.
+##Fits run in parallel on a memory-mapped copy of x_train and are checkpointed,
+##so rerunning the script after an interruption resumes the search
+print("# Tuning hyper-parameters for %s" % ' and '.join(scores))
+sss = StratifiedShuffleSplit(n_splits=3,
+                             test_size=0.2,
+                             random_state=0)
+best_params, search_results = petAppeal.successive_halving_search(RandomForestClassifier(**dict(fixed_params, n_jobs=1)),
+                                                                  param_grid,
+                                                                  x_train,
+                                                                  y_train,
+                                                                  cv=sss,
+                                                                  scoring=['%s_macro' % score for score in scores],
+                                                                  max_fits=3000,
+                                                                  max_seconds=4*60*60,
+                                                                  checkpoint_dir=local_file_path+'rForest_search_checkpoint',
+                                                                  n_jobs=-1)
+
+print("Best parameters set found on development set:", best_params)
+
+print("Grid scores on development set:")
+final_rung = search_results[search_results.rung == search_results.rung.max()]
 for score in scores:
-    print("# Tuning hyper-parameters for %s" % score)
-    sss = StratifiedShuffleSplit(n_splits=3,
-                                 test_size=0.2,
-                                 random_state=0)
-    clf = GridSearchCV(RandomForestClassifier(),
-                       param_grid=param_grid,
-                       cv=sss,
-                       verbose=5,
-                       scoring='%s_macro' % score)
-    
-    clf.fit(x_train, y_train)
-
-    print("Best parameters set found on development set:", clf.best_params_)
-    
-    print("Grid scores on development set:")
-    means = clf.cv_results_['mean_test_score']
-    stds = clf.cv_results_['std_test_score']
-    for mean, std, params in zip(means, stds, clf.cv_results_['params']):
-        print("%0.3f (+/-%0.03f) for %r"
-              % (mean, std * 2, params))
-
-    y_true, y_pred = y_test, clf.predict(x_test)
-    print("Detailed classification report:", classification_report(y_true, y_pred))
-    
-
-rForest_GridSearch_results = pd.DataFrame(clf.cv_results_)
-rForest_GridSearch_results.to_csv(local_file_path+'rForest_GridSearch_results.csv')
+    means = final_rung['mean_test_%s_macro' % score]
+    stds = final_rung['std_test_%s_macro' % score]
+    for mean, std, params in zip(means, stds, final_rung['params']):
+        print("%s: %0.3f (+/-%0.03f) for %r"
+              % (score, mean, std * 2, params))
+
+search_results.to_csv(local_file_path+'rForest_GridSearch_results.csv')
 
 #Use best estimator found in GridSearch for initial modeling
-model_rForest = clf.best_estimator_
+model_rForest = RandomForestClassifier(**dict(fixed_params, **best_params))
 model_rForest.fit(x_train, y_train)
 model_rForest.score(x_train, y_train)
+petAppeal.saveVar(model_rForest.get_params(), local_file_path+'rForest_best_params')
 
 y_pred = model_rForest.predict(x_test)
 y_pred_prob = model_rForest.predict_proba(x_test)[:,1]
@@ -106,11 +141,51 @@ print 'Recall:', recall_score(y_test, y_pred)
 print 'F1:', f1_score(y_test, y_pred)
 print classification_report(y_test, y_pred)
 
-importances = model_rForest.feature_importances_
-std = np.std([tree.feature_importances_ for tree in model_rForest.estimators_], axis=0)
+##Bootstrap the test set for confidence intervals on AUC and average
+##precision, and sweep the decision threshold (one sort of the scores)
+evaluation = petAppeal.bootstrap_evaluation(y_test, y_pred_prob, n_bootstraps=1000, n_jobs=-1)
+print evaluation['summary']
+operating_point = petAppeal.choose_threshold(evaluation['curves'], 'f1')
+print 'Best F1 threshold:', operating_point['threshold'], 'Precision:',\
+ operating_point['precision'], 'Recall:', operating_point['recall']
+petAppeal.plotROC(y_test, y_pred_prob, 'Random Forest', evaluation=evaluation)
+petAppeal.plot_threshold_curves(evaluation, 'Random Forest', threshold=operating_point['threshold'])
+
+##Same tuned forest with the hashed description/name features appended; the
+##matrix stays sparse through training and prediction
+x_combined_train = sparse.hstack([sparse.csr_matrix(x_train), x_text_train], format='csr')
+x_combined_test = sparse.hstack([sparse.csr_matrix(x_test), x_text_test], format='csr')
+##best_params holds max_features as a column count resolved for the
+##encoded features alone, which would leave each split a handful of the
+##hashed columns; draw sqrt(columns) of the combined matrix instead
+text_params = dict(fixed_params, **best_params)
+text_params['max_features'] = 'sqrt'
+model_rForest_text = RandomForestClassifier(**text_params)
+model_rForest_text.fit(x_combined_train, y_train)
+y_pred_text = model_rForest_text.predict(x_combined_test)
+
+print 'With text features - Precision:', precision_score(y_test, y_pred_text),\
+ 'Recall:', recall_score(y_test, y_pred_text)
+
+##Permutation importances on the test set, cached per model and data so
+##re-plotting does not recompute them
+importances, std, _ = petAppeal.permutation_importance(model_rForest,
+                                                       x_test,
+                                                       y_test,
+                                                       scoring='precision_macro',
+                                                       n_repeats=10,
+                                                       cache_dir=local_file_path+'importance_cache')
 featureHeaders = list(cats_dogs_encoded)
 
-petAppeal.plot_feature_importance(x_train, importances, featureHeaders, 'black')
+petAppeal.plot_feature_importance(x_train, importances, featureHeaders, 'black', std=std)
 
+##Saved as memory-mappable node arrays with a header recording the feature
+##order and encode_data categories, so scorers can check they match
 model_name = 'petfinder_trained_RF_classifier'
-petAppeal.saveVar(model_rForest, model_name)
+##The header also keeps the training feature distributions and test
+##precision, which script 7 uses to decide between updating and retraining
+model_metadata = {'reference': petAppeal.feature_reference(x_train, featureHeaders),
+                  'precision_macro': precision_score(y_test, y_pred, average='macro'),
+                  'data_through': data_through}
+petAppeal.saveModel(model_rForest, local_file_path+model_name, featureHeaders,
+                    classes=le.classes_, metadata=model_metadata)
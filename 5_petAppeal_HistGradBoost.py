@@ -0,0 +1,139 @@
+from __future__ import print_function
+import os
+import importlib
+import numpy as np
+import petAppeal
+from sklearn import preprocessing
+from sklearn.model_selection import train_test_split, StratifiedShuffleSplit
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, precision_score, recall_score, f1_score
+try:
+    ##Needed before scikit-learn 1.0 to import the histogram booster
+    importlib.import_module('sklearn.experimental.enable_hist_gradient_boosting')
+except ImportError:
+    pass
+try:
+    from sklearn.ensemble import HistGradientBoostingClassifier
+except ImportError:
+    HistGradientBoostingClassifier = None
+
+##Histogram gradient boosting needs scikit-learn >= 0.24 (and so Python 3) for
+##native categorical features. Older installs, including the Python 2 one the
+##other scripts run on, benchmark sklearn's GradientBoostingClassifier
+##instead. The data preparation matches script 5
+local_file_path = ''
+petfinder_data = local_file_path + 'petfinder_data_clean'
+
+##Only the Cat and Dog partitions are read; two-class model: adopted versus available
+cats_dogs = petAppeal.read_pets(petfinder_data,
+                                filters={'animal': ['Cat', 'Dog'],
+                                         'status': ['Available', 'Adopted']})
+
+drop_cols = ['address1', 'address2', 'email', 'pet_id', 'phone',
+             'breed','lastUpdate', 'name', 'photos','description','zip',
+             'city', 'state', 'shelter_id', 'fax', 'id', 'duplicate_cluster',
+             'duplicate_count']
+
+##The same animal is often cross-posted by partner shelters under another id;
+##keep one record per near-duplicate cluster so copies are not counted twice
+##or split between train and test
+cats_dogs = petAppeal.dedupe_pets(cats_dogs)
+
+##Check for class imbalance; downsample if necessary, keeping each
+##class's mix of states (the same seeded draw as script 5)
+cats_dogs = petAppeal.balance_check(cats_dogs, 'status', strata='state', plot=False,
+                                    random_state=0)
+
+cats_dogs = cats_dogs.drop(drop_cols, axis=1)
+
+cats_dogs_encoded = petAppeal.encode_data(cats_dogs)
+
+y = cats_dogs_encoded.status
+cats_dogs_encoded = cats_dogs_encoded.drop(['status'], axis=1)
+featureHeaders = list(cats_dogs_encoded)
+
+x = np.array(cats_dogs_encoded)
+Classes = y.unique()
+
+le = preprocessing.LabelEncoder()
+y = le.fit_transform(y)
+
+x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.2, random_state=0)
+
+##The encode_data columns are integer category codes (-1 for unknown, which
+##the model treats as missing); they are split natively as categories rather
+##than as ordered numbers. Boosting stops once the validation loss stalls
+categorical = [feature in petAppeal.ENCODING for feature in featureHeaders]
+
+if HistGradientBoostingClassifier is not None and\
+   'categorical_features' in HistGradientBoostingClassifier().get_params():
+    model_name = 'Histogram Gradient Boosting'
+    model_gb = HistGradientBoostingClassifier(categorical_features=categorical,
+                                              max_iter=1000,
+                                              learning_rate=0.1,
+                                              early_stopping=True,
+                                              validation_fraction=0.1,
+                                              n_iter_no_change=20,
+                                              scoring='loss',
+                                              random_state=0)
+else:
+    print('Skipping histogram gradient boosting: it needs scikit-learn >= 0.24 '
+          'for categorical features; benchmarking GradientBoostingClassifier instead')
+    ##The category codes are split as ordered numbers here
+    model_name = 'Gradient Boosting'
+    model_gb = GradientBoostingClassifier(n_estimators=1000,
+                                          learning_rate=0.1,
+                                          validation_fraction=0.1,
+                                          n_iter_no_change=20,
+                                          random_state=0)
+model_gb.fit(x_train, y_train)
+if hasattr(model_gb, 'n_iter_'):
+    print('Boosting iterations before early stopping:', model_gb.n_iter_)
+else:
+    print('Boosting iterations before early stopping:', model_gb.n_estimators_)
+
+y_pred = model_gb.predict(x_test)
+y_pred_prob = model_gb.predict_proba(x_test)[:,1]
+
+cnf_matrix = confusion_matrix(y_test, y_pred)
+np.set_printoptions(precision=2)
+
+petAppeal.plot_confusion_matrix(cnf_matrix, classes=Classes, title=model_name)
+petAppeal.plot_confusion_matrix(cnf_matrix, classes=Classes, normalize=True, title=model_name)
+
+print('Accuracy:', accuracy_score(y_test, y_pred))
+print('Precision:', precision_score(y_test, y_pred))
+print('Recall:', recall_score(y_test, y_pred))
+print('F1:', f1_score(y_test, y_pred))
+print(classification_report(y_test, y_pred))
+
+##Bootstrap the test set for confidence intervals on AUC and average
+##precision, and sweep the decision threshold (one sort of the scores)
+evaluation = petAppeal.bootstrap_evaluation(y_test, y_pred_prob, n_bootstraps=1000, n_jobs=-1)
+print(evaluation['summary'])
+operating_point = petAppeal.choose_threshold(evaluation['curves'], 'f1')
+print('Best F1 threshold:', operating_point['threshold'], 'Precision:',
+      operating_point['precision'], 'Recall:', operating_point['recall'])
+petAppeal.plotROC(y_test, y_pred_prob, model_name, evaluation=evaluation)
+petAppeal.plot_threshold_curves(evaluation, model_name, threshold=operating_point['threshold'])
+
+##Benchmark against the random forest on the same StratifiedShuffleSplit
+##folds as the script 5 search; uses the tuned forest if script 5 has run
+rf_params_file = local_file_path + 'rForest_best_params'
+if os.path.exists(rf_params_file + '.pickle'):
+    rf_params = petAppeal.loadVar(rf_params_file)
+else:
+    rf_params = {'n_estimators': 100, 'n_jobs': -1, 'random_state': 0}
+
+sss = StratifiedShuffleSplit(n_splits=3,
+                             test_size=0.2,
+                             random_state=0)
+benchmark = petAppeal.benchmark_models({'Random Forest': RandomForestClassifier(**rf_params),
+                                        model_name: model_gb},
+                                       x_train,
+                                       y_train,
+                                       cv=sss)
+
+summary = benchmark.drop('fold', axis=1).groupby('model').mean()
+print(summary.T)
+benchmark.to_csv(local_file_path+'model_benchmark_results.csv')
@@ -0,0 +1,29 @@
+import pandas as pd
+import petAppeal
+
+local_file_path = ''
+model_name = local_file_path + 'petfinder_trained_RF_classifier'
+
+##Memory-map the model's node arrays once; pets are then scored in
+##vectorized batches instead of tree by tree
+flat_forest, model_header = petAppeal.loadModel(model_name)
+features = model_header['schema']['features']
+
+##Newly listed pets, cleaned with the same munging steps as script 3
+new_pets_file = local_file_path + 'petfinder_new_pets_clean.csv'
+scores_file = local_file_path + 'petfinder_new_pets_scores.csv'
+
+##Reads and scores the file in chunks so memory stays flat however many
+##pets were listed
+header = True
+n_scored = 0
+for chunk in pd.read_csv(new_pets_file, chunksize=100000):
+    chunk = chunk[(chunk.animal == 'Cat') | (chunk.animal == 'Dog')]
+    proba = petAppeal.score_pets(flat_forest, chunk, features)
+    proba.columns = ['p_' + str(label) for label in flat_forest.classes]
+    scores = chunk[['id', 'shelter_id', 'animal']].join(proba)
+    scores.to_csv(scores_file, mode='w' if header else 'a', header=header, index=False)
+    header = False
+    n_scored += len(scores)
+
+print 'Scored', n_scored, 'pets'
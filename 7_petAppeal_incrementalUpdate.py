@@ -0,0 +1,50 @@
+import os
+import pandas as pd
+import numpy as np
+import petAppeal
+
+local_file_path = ''
+model_name = local_file_path + 'petfinder_trained_RF_classifier'
+
+##The latest weekly snapshot, cleaned with the same munging steps as script 3
+snapshot_file = local_file_path + 'petfinder_data_clean_weekly.csv'
+
+_, model_header = petAppeal.loadModel(model_name)
+features = model_header['schema']['features']
+data_through = pd.to_datetime(model_header['metadata']['data_through'])
+
+new_pets = pd.read_csv(snapshot_file)
+new_pets = new_pets[(new_pets.animal == 'Cat') | (new_pets.animal == 'Dog')]
+new_pets = new_pets[new_pets.status.isin(['Available', 'Adopted'])]
+
+##Only records written since the model's data was collected are new
+new_pets = new_pets[pd.to_datetime(new_pets.lastUpdate) > data_through]
+print 'Found', len(new_pets), 'new pet records since', data_through
+
+if len(new_pets) > 0:
+    encoded = petAppeal.encode_data(new_pets[features + ['status']].copy())
+    x_new = np.array(encoded[features])
+    y_new = encoded.status.values
+
+    ##Reuse the tuned forest parameters for the new trees when available
+    rf_params_file = local_file_path + 'rForest_best_params'
+    rf_params = petAppeal.loadVar(rf_params_file) if os.path.exists(rf_params_file + '.pickle') else {}
+
+    decision = petAppeal.update_model(model_name,
+                                      x_new,
+                                      y_new,
+                                      forest_params=rf_params,
+                                      n_new_trees=20,
+                                      max_trees=500,
+                                      strata=new_pets.state.values,
+                                      metadata={'data_through': str(pd.to_datetime(new_pets.lastUpdate).max())})
+
+    print 'Feature drift (PSI):'
+    print decision['drift'].head()
+    print 'Precision on new records, balanced like the test split: %0.3f (at training: %0.3f)' \
+        % (decision['precision_macro'], decision['reference_precision'])
+
+    if decision['action'] == 'retrain':
+        print 'Significant drift detected; rerun the full pipeline (scripts 3-5) on the full history'
+    else:
+        print 'Model updated with', len(new_pets), 'new records'
@@ -0,0 +1,101 @@
+'''
+    The PetAppeal helpers, split by what they need to import:
+
+        petAppeal.fetch            Petfinder API requests (pandas only)
+        petAppeal.features         feature engineering, encoding, balancing
+        petAppeal.plotting         matplotlib/squarify figures
+        petAppeal.modeling         search, scoring and model artifacts (sklearn)
+        petAppeal.evaluation       threshold curves and bootstrap confidence intervals
+        petAppeal.dataset          partitioned CSV datasets with filter pushdown
+        petAppeal.shelters         shelter name matching and offline location queries
+        petAppeal.photos           concurrent cached photo downloads and image features (Pillow)
+        petAppeal.serving          micro-batched HTTP scoring service and load test
+        petAppeal.synthetic        synthetic Petfinder-like data
+        petAppeal.instrumentation  opt-in timing and memory reports
+
+    Submodules are imported on first use, so `petAppeal.getPets` loads only
+    the fetch code and the crawl scripts never import matplotlib, TextBlob
+    or sklearn. Every name is still available from the top level.
+'''
+
+from __future__ import absolute_import
+import importlib
+import os
+import sys
+import types
+
+_EXPORTS = {
+    'fetch': ['shelterFinder', 'getPets', 'parse_pets'],
+    'features': ['sort_options', 'description_analysis', 'multi_adoption',
+                 'image_analysis', 'unique_breeds', 'RunningMoments',
+                 'StreamingHistogram', 'accumulate_numeric', 'iter_chunks',
+                 'YES_NO', 'ENCODING', 'encode_data', 'encoder_schema',
+                 'balanced_indices', 'balance_check', 'hashed_text_features',
+                 'pet_text_features', 'minhash_signatures',
+                 'near_duplicate_clusters', 'dedupe_pets', 'STATUS_CODES',
+                 'ANIMALS', 'YES_NO_FLAGS', 'CATEGORIES', 'ORDERED_CATEGORIES',
+                 'DATETIME_COLUMNS', 'decode_status', 'apply_dtypes',
+                 'memory_report', 'category_counts'],
+    'plotting': ['my_autopct', 'piePlot', 'plotROC', 'plot_threshold_curves',
+                 'plot_confusion_matrix', 'horizontal_bar',
+                 'plot_feature_importance', 'group_bar_graph', 'plot_hist',
+                 'plot_treemap'],
+    'modeling': ['saveVar', 'loadVar', 'normalize_param_grid',
+                 'checkpointed_search', 'successive_halving_search',
+                 'FlatForest', 'score_pets', 'ARTIFACT_FORMAT',
+                 'ARTIFACT_VERSION', 'saveModel', 'loadModel',
+                 'benchmark_models', 'permutation_importance', 'merge_forests',
+                 'feature_reference', 'drift_report', 'update_model'],
+    'dataset': ['write_partitioned', 'list_partitions', 'iter_partitioned',
+                'read_partitioned', 'read_pets'],
+    'shelters': ['normalize_shelter_name', 'ShelterMatcher', 'match_shelters',
+                 'EARTH_RADIUS_MILES', 'load_zip_centroids', 'ShelterLocator',
+                 'load_shelter_locator'],
+    'evaluation': ['threshold_curves', 'choose_threshold', 'bootstrap_evaluation'],
+    'photos': ['PHOTO_FEATURES', 'photo_urls', 'PhotoCache', 'fetch_photo',
+               'decode_photo', 'photo_features'],
+    'serving': ['LatencyStats', 'MicroBatcher', 'ScoringService', 'make_server',
+                'service_health', 'load_test'],
+    'synthetic': ['synthetic_pets', 'synthetic_petfinder_response',
+                  'synthetic_clean_pets'],
+    'instrumentation': ['measure_call', 'max_rss_mb', 'Instrumentation', 'stage',
+                        'instrument', 'uninstrument', 'INSTRUMENTED_FUNCTIONS',
+                        'LATENCY_BUCKETS'],
+}
+_LOCATION = dict((name, submodule) for submodule, names in _EXPORTS.items()
+                 for name in names)
+__all__ = sorted(_LOCATION)
+
+
+class _LazyModule(types.ModuleType):
+    '''
+        Module type that imports a submodule the first time one of its names
+        is looked up. Python 2 has no module-level __getattr__, so the
+        package module is swapped for an instance of this class.
+    '''
+
+    def __getattr__(self, name):
+        if name in _EXPORTS:
+            return importlib.import_module('.'+name, __name__)
+        if name not in _LOCATION:
+            raise AttributeError("module %r has no attribute %r" % (__name__, name))
+        module = importlib.import_module('.'+_LOCATION[name], __name__)
+        value = getattr(module, name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_LOCATION) | set(_EXPORTS))
+
+
+_module = _LazyModule(__name__, __doc__)
+_module.__dict__.update(sys.modules[__name__].__dict__)
+##Keeps the original module alive; Python 2 clears a module's globals when
+##it is garbage collected, which would break the functions defined here.
+_module._original = sys.modules[__name__]
+sys.modules[__name__] = _module
+
+##With PETAPPEAL_INSTRUMENT set, instrumentation starts as the package is
+##imported, so a script's stage covers everything after `import petAppeal`
+if os.environ.get('PETAPPEAL_INSTRUMENT'):
+    importlib.import_module('.instrumentation', __name__)
@@ -0,0 +1,190 @@
+from __future__ import absolute_import
+import json
+import os
+import shutil
+import pandas as pd
+from . import instrumentation
+from .features import apply_dtypes
+try:
+    from urllib import quote, unquote
+except ImportError:
+    from urllib.parse import quote, unquote
+
+
+####Partitioned datasets
+
+NULL_PARTITION = '__null__'
+
+
+def _partition_value(name):
+    return None if name==NULL_PARTITION else unquote(name)
+
+
+def write_partitioned(df, path, partition_cols=('animal', 'state')):
+    '''
+        Writes a dataframe as one CSV per combination of the partition
+        columns, in directories named column=value (e.g.
+        animal=Cat/state=CA/part-0.csv), so read_partitioned can skip the
+        partitions a filter excludes. The partition columns are stored in
+        the directory names only, and are read back as strings (None for
+        missing values). An existing dataset at path is replaced.
+
+        Args:
+            df (DataFrame): The records, e.g. the munged pet data.
+            path (str): The dataset directory.
+            partition_cols (list): Columns to partition by, outermost first.
+        Returns:
+            n_partitions (int)
+    '''
+
+    partition_cols = list(partition_cols)
+    tmp_path = path.rstrip('/') + '.tmp'
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    data = df.drop(partition_cols, axis=1)
+    ##object keys, so categorical columns neither reject the null marker nor
+    ##produce empty groups for unused categories
+    groups = data.groupby([df[col].astype(object).fillna(NULL_PARTITION)
+                           for col in partition_cols], sort=True)
+    n_partitions = 0
+    for values, part in groups:
+        if len(partition_cols)==1:
+            values = (values,)
+        part_dir = os.path.join(tmp_path, *['%s=%s' % (col, quote(str(value), safe=''))
+                                            for col, value in zip(partition_cols, values)])
+        os.makedirs(part_dir)
+        part.to_csv(os.path.join(part_dir, 'part-0.csv'), index=False)
+        n_partitions += 1
+
+    with open(os.path.join(tmp_path, '_schema.json'), 'w') as f:
+        json.dump({'columns': list(df.columns), 'partition_cols': partition_cols,
+                   'rows': len(df), 'partitions': n_partitions}, f, indent=2)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.rename(tmp_path, path)
+
+    return n_partitions
+
+
+def _read_schema(path):
+    with open(os.path.join(path, '_schema.json')) as f:
+        schema = json.load(f)
+    schema['columns'] = [str(col) for col in schema['columns']]
+    schema['partition_cols'] = [str(col) for col in schema['partition_cols']]
+    return schema
+
+
+def _as_set(values):
+    if isinstance(values, (list, tuple, set)):
+        return set(values)
+    return set([values])
+
+
+def list_partitions(path, filters=None):
+    '''
+        Lists the partitions of a dataset that can match the filters, using
+        the directory names only.
+
+        Args:
+            path (str): The dataset directory.
+            filters (dict): Column -> allowed value or list of values.
+        Returns:
+            partitions (list): (directory, {column: value}) pairs.
+    '''
+
+    schema = _read_schema(path)
+    filters = filters or {}
+
+    partitions = [(path, {})]
+    for col in schema['partition_cols']:
+        allowed = _as_set(filters[col]) if col in filters else None
+        nested = []
+        for part_dir, values in partitions:
+            for name in sorted(os.listdir(part_dir)):
+                if not name.startswith(col+'='):
+                    continue
+                value = _partition_value(name[len(col)+1:])
+                if allowed is None or value in allowed:
+                    nested.append((os.path.join(part_dir, name), dict(values, **{col: value})))
+        partitions = nested
+
+    return partitions
+
+
+def iter_partitioned(path, filters=None, columns=None):
+    '''
+        Yields the matching rows of a partitioned dataset one partition at a
+        time. Filters on partition columns prune whole directories before
+        anything is read; filters on other columns are applied to the rows
+        of each partition as it is read.
+
+        Args:
+            path (str): The dataset directory.
+            filters (dict): Column -> allowed value or list of values, e.g.
+                {'animal': ['Cat', 'Dog'], 'status': 'Adopted'}.
+            columns (list): Columns to return; None for all.
+        Yields:
+            part (DataFrame)
+    '''
+
+    schema = _read_schema(path)
+    filters = filters or {}
+    unknown = set(filters) - set(schema['columns'])
+    if unknown:
+        raise ValueError('Unknown filter columns: %s' % ', '.join(sorted(unknown)))
+
+    columns = list(columns or schema['columns'])
+    row_filters = dict((col, _as_set(values)) for col, values in filters.items()
+                       if col not in schema['partition_cols'])
+    stored = [col for col in columns if col not in schema['partition_cols']]
+    usecols = set(stored) | set(row_filters)
+
+    for part_dir, values in list_partitions(path, filters):
+        part = pd.read_csv(os.path.join(part_dir, 'part-0.csv'),
+                           usecols=lambda col: col in usecols)
+        for col, allowed in row_filters.items():
+            part = part[part[col].isin(allowed)]
+        if not len(part):
+            continue
+        part = part.assign(**dict((col, values[col]) for col in schema['partition_cols']
+                                  if col in columns))
+        yield part[columns]
+
+
+def read_partitioned(path, filters=None, columns=None):
+    '''
+        Reads the matching rows of a partitioned dataset into one dataframe;
+        see iter_partitioned.
+
+        Returns:
+            df (DataFrame): The rows, with a fresh index.
+    '''
+
+    parts = list(iter_partitioned(path, filters, columns))
+    if not parts:
+        return pd.DataFrame(columns=columns or _read_schema(path)['columns'])
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def read_pets(path, filters=None, columns=None):
+    '''
+        Loads the partitioned clean pet data with the shared dtype policy
+        (apply_dtypes): categoricals with a fixed category order and bool
+        yes/no flags. Categories excluded by the filters are dropped.
+
+        Args:
+            path (str): The dataset directory, e.g. petfinder_data_clean.
+            filters (dict): As for read_partitioned.
+            columns (list): Columns to return; None for all.
+        Returns:
+            pets (DataFrame)
+    '''
+
+    return apply_dtypes(read_partitioned(path, filters, columns), remove_unused=True)
+
+
+instrumentation.wrap_functions(globals())
@@ -0,0 +1,236 @@
+from __future__ import absolute_import
+import numpy as np
+import pandas as pd
+from . import instrumentation
+
+
+####Threshold curves
+
+def _sort_scores(y_true, y_score, pos_label):
+    '''
+        Sorts the scores once, highest first, and returns them with the
+        matching positive flags and the last position of every run of equal
+        scores (the cut points where the threshold can change).
+    '''
+
+    y_score = np.asarray(y_score, dtype=np.float64)
+    order = np.argsort(-y_score, kind='mergesort')
+    sorted_score = y_score[order]
+    positive = (np.asarray(y_true)==pos_label)[order].astype(np.float64)
+    cuts = np.r_[np.flatnonzero(np.diff(sorted_score)), len(sorted_score)-1]
+
+    return sorted_score, positive, cuts
+
+
+def _rates(tp, fp, n_pos, n_neg):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp+fp > 0, tp/(tp+fp), 1.)
+        recall = tp/n_pos
+        fpr = fp/n_neg
+        f1 = np.where(precision+recall > 0, 2*precision*recall/(precision+recall), 0.)
+    return precision, recall, fpr, f1
+
+
+def _curve_metrics(cum_tp, cum_fp, cuts, grid_counts, fpr_grid, recall_grid):
+    '''
+        Every metric of one (possibly resampled) test set from the running
+        totals of true and false positives down the sorted scores; O(n).
+    '''
+
+    n_pos, n_neg = cum_tp[-1], cum_fp[-1]
+    precision, recall, fpr, f1 = _rates(cum_tp[cuts], cum_fp[cuts], n_pos, n_neg)
+    roc_fpr, roc_tpr = np.r_[0., fpr], np.r_[0., recall]
+    ##precision at the first cut reaching each recall level
+    at_recall = np.minimum(np.searchsorted(recall, recall_grid), len(recall)-1)
+
+    ##grid_counts[k] pets score at or above the k-th threshold
+    tp = np.r_[0., cum_tp][grid_counts]
+    fp = np.r_[0., cum_fp][grid_counts]
+    grid_precision, grid_recall, _, grid_f1 = _rates(tp, fp, n_pos, n_neg)
+
+    return {'roc_auc': np.trapz(roc_tpr, roc_fpr),
+            'average_precision': np.sum(np.diff(np.r_[0., recall])*precision),
+            'tpr': np.interp(fpr_grid, roc_fpr, roc_tpr),
+            'precision_at_recall': precision[at_recall],
+            'precision': grid_precision, 'recall': grid_recall, 'f1': grid_f1}
+
+
+def threshold_curves(y_true, y_score, pos_label=1):
+    '''
+        Computes the confusion counts, precision, recall (true positive
+        rate), false positive rate and F1 at every distinct threshold from a
+        single sort of the scores, rather than re-scoring at each threshold.
+
+        Args:
+            y_true (int64): The test set class labels.
+            y_score (float64): The predicted probability of pos_label.
+            pos_label (int): The positive class.
+        Returns:
+            curves (DataFrame): One row per distinct score, highest first;
+                a pet is predicted positive when its score is at least the
+                row's threshold.
+    '''
+
+    return _curves_frame(*_sort_scores(y_true, y_score, pos_label))
+
+
+def _curves_frame(sorted_score, positive, cuts):
+    cum_tp = np.cumsum(positive)
+    cum_fp = np.arange(1, len(positive)+1) - cum_tp
+    tp, fp = cum_tp[cuts], cum_fp[cuts]
+    precision, recall, fpr, f1 = _rates(tp, fp, cum_tp[-1], cum_fp[-1])
+
+    return pd.DataFrame({'threshold': sorted_score[cuts],
+                         'tp': tp.astype(np.int64), 'fp': fp.astype(np.int64),
+                         'fn': (cum_tp[-1]-tp).astype(np.int64),
+                         'tn': (cum_fp[-1]-fp).astype(np.int64),
+                         'precision': precision, 'recall': recall, 'fpr': fpr,
+                         'f1': f1},
+                        columns=['threshold', 'tp', 'fp', 'fn', 'tn', 'precision',
+                                 'recall', 'fpr', 'f1'])
+
+
+def choose_threshold(curves, metric='f1', min_precision=None, min_recall=None):
+    '''
+        Picks an operating threshold from threshold_curves output.
+
+        Args:
+            curves (DataFrame): The output of threshold_curves.
+            metric (str): The column to maximize, e.g. 'f1' or 'recall'.
+            min_precision (float): Only consider thresholds at least this
+                precise.
+            min_recall (float): Only consider thresholds with at least this
+                recall.
+        Returns:
+            row (Series): The chosen row, including its threshold; None if no
+                threshold meets the constraints.
+    '''
+
+    keep = np.ones(len(curves), dtype=bool)
+    if min_precision is not None:
+        keep &= (curves.precision >= min_precision).values
+    if min_recall is not None:
+        keep &= (curves.recall >= min_recall).values
+    if not keep.any():
+        return None
+
+    return curves[keep].loc[curves[keep][metric].idxmax()]
+
+
+####Bootstrap confidence bands
+
+def _bootstrap_chunk(positive, cuts, grid_counts, fpr_grid, recall_grid,
+                     n_bootstraps, seed):
+    '''
+        Runs n_bootstraps resamples of the test set. A resample only changes
+        how many times each pet is counted, so it reuses the order of the
+        single sort: the multiplicities are accumulated down the sorted
+        scores and every metric follows in O(n).
+    '''
+
+    rng = np.random.RandomState(seed)
+    n = len(positive)
+    results = []
+    for _ in range(n_bootstraps):
+        weights = np.bincount(rng.randint(n, size=n), minlength=n).astype(np.float64)
+        cum_tp = np.cumsum(weights*positive)
+        cum_fp = np.cumsum(weights) - cum_tp
+        results.append(_curve_metrics(cum_tp, cum_fp, cuts, grid_counts, fpr_grid,
+                                      recall_grid))
+
+    return dict((key, np.array([r[key] for r in results])) for key in results[0])
+
+
+def bootstrap_evaluation(y_true, y_score, n_bootstraps=1000, pos_label=1,
+                         thresholds=None, confidence=0.95, n_points=101,
+                         n_jobs=-1, random_state=0):
+    '''
+        Bootstraps the test set to put confidence intervals on ROC AUC and
+        average precision, and confidence bands on the ROC and precision-
+        recall curves and on precision, recall and F1 at each threshold.
+
+        The scores are sorted once. Each resample is a vector of
+        multiplicities applied along that order, so the cost is O(n) per
+        resample however many thresholds are reported. Resamples are split
+        into one chunk per job and run in parallel.
+
+        Args:
+            y_true (int64): The test set class labels.
+            y_score (float64): The predicted probability of pos_label.
+            n_bootstraps (int): The number of resamples.
+            pos_label (int): The positive class.
+            thresholds (float64): Thresholds for the precision/recall/F1
+                bands; defaults to n_points evenly spaced over the scores.
+            confidence (float): The coverage of the intervals (0-1).
+            n_points (int): Points on the ROC (FPR) and PR (recall) grids.
+            n_jobs (int): The number of parallel jobs.
+            random_state (int): Seed for the resamples.
+        Returns:
+            evaluation (dict): 'curves' (threshold_curves of the full test
+                set), 'summary' (estimate, low and high of roc_auc and
+                average_precision), 'roc_band' (tpr with low/high per fpr),
+                'pr_band' (precision with low/high per recall) and
+                'threshold_band' (precision, recall and f1 with low/high per
+                threshold).
+    '''
+
+    try:
+        from joblib import Parallel, delayed, effective_n_jobs
+    except ImportError:
+        from sklearn.externals.joblib import Parallel, delayed, effective_n_jobs
+
+    sorted_score, positive, cuts = _sort_scores(y_true, y_score, pos_label)
+    if thresholds is None:
+        thresholds = np.linspace(sorted_score[-1], sorted_score[0], n_points)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    grid_counts = np.searchsorted(-sorted_score, -thresholds, side='right')
+    fpr_grid = np.linspace(0, 1, n_points)
+    recall_grid = np.linspace(0, 1, n_points)
+
+    cum_tp = np.cumsum(positive)
+    point = _curve_metrics(cum_tp, np.arange(1, len(positive)+1) - cum_tp, cuts,
+                           grid_counts, fpr_grid, recall_grid)
+
+    n_chunks = max(1, min(effective_n_jobs(n_jobs), n_bootstraps))
+    sizes = np.diff(np.linspace(0, n_bootstraps, n_chunks+1).astype(int))
+    seeds = np.random.RandomState(random_state).randint(np.iinfo(np.int32).max,
+                                                        size=n_chunks)
+    chunks = Parallel(n_jobs=n_chunks)(
+        delayed(_bootstrap_chunk)(positive, cuts, grid_counts, fpr_grid, recall_grid,
+                                  size, seed)
+        for size, seed in zip(sizes, seeds) if size > 0)
+    samples = dict((key, np.concatenate([c[key] for c in chunks])) for key in point)
+
+    tail = 50*(1-confidence)
+    low, high = {}, {}
+    for key, values in samples.items():
+        ##nanpercentile loops over columns in Python; NaNs only appear when
+        ##a resample has no positives or no negatives
+        percentile = np.nanpercentile if np.isnan(values).any() else np.percentile
+        with np.errstate(invalid='ignore'):
+            low[key], high[key] = percentile(values, [tail, 100-tail], axis=0)
+
+    summary = pd.DataFrame([[point[key], low[key], high[key]]
+                            for key in ['roc_auc', 'average_precision']],
+                           index=['roc_auc', 'average_precision'],
+                           columns=['estimate', 'low', 'high'])
+    roc_band = pd.DataFrame({'fpr': fpr_grid, 'tpr': point['tpr'],
+                             'low': low['tpr'], 'high': high['tpr']},
+                            columns=['fpr', 'tpr', 'low', 'high'])
+    pr_band = pd.DataFrame({'recall': recall_grid,
+                            'precision': point['precision_at_recall'],
+                            'low': low['precision_at_recall'],
+                            'high': high['precision_at_recall']},
+                           columns=['recall', 'precision', 'low', 'high'])
+    threshold_band = pd.DataFrame({'threshold': thresholds})
+    for key in ['precision', 'recall', 'f1']:
+        threshold_band[key] = point[key]
+        threshold_band[key+'_low'] = low[key]
+        threshold_band[key+'_high'] = high[key]
+
+    return {'curves': _curves_frame(sorted_score, positive, cuts),
+            'summary': summary, 'roc_band': roc_band, 'pr_band': pr_band,
+            'threshold_band': threshold_band}
+
+
+instrumentation.wrap_functions(globals())
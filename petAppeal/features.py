@@ -0,0 +1,1019 @@
+from __future__ import absolute_import
+import string
+import re
+import zlib
+import numpy as np
+import pandas as pd
+from . import instrumentation
+
+
+def sort_options(options_col):
+    '''
+        Sorts through the options column provided by the petfinder API and 
+        returns either a yes or a no if the animal meets that condition.
+    
+        Args:
+            options_col (Series): Each row of the column contains a string
+                with the 'options' for that animal
+
+        Returns:
+            options (DataFrame): A dataframe containing a column for each option
+                and either a 'yes' or a 'no' if that option/condition is met
+                for the given animal is returned.
+    '''
+    
+    options_list = ['altered', 'hasShots', 'housetrained', 'noKids', 'noCats',
+               'noDogs', 'noClaws', 'specialNeeds']
+    
+    options =pd.DataFrame(index=range(0, len(options_col)),
+                          columns=options_list)
+    
+    for i in range(len(options_col)):
+        for k in options_list:
+            options_str = str(options_col[i])
+            test = str(k) in options_str
+            
+            if test == True:
+                val='yes'
+            else:
+                val='no'
+            
+            options.ix[i,k]=val
+            
+    return options
+
+
+def description_analysis(description_col):
+    '''
+        Runs the animal description through sentiment analysis quantifies the 
+        number of words.
+    
+        Args:
+            description_col (Series): Each row of the column contains a string
+                of the animal description.
+        Returns:
+            description (DataFrame): The word count (int), polarity (int), 
+                subjectivity (int), and a categorical feature, description
+                exists, which returns either a 'yes' or a 'no' if the
+                description is empty or not.
+    '''
+
+    from textblob import TextBlob
+    
+    num_words = []
+    description_polarity = []
+    description_subjectivity = []
+    description_exists = []
+
+    for i in range(len(description_col)):
+        
+        line = str(description_col[i]).replace('nan', '')
+        num_words.append(len(re.findall(r'\w+', line)))
+        
+        if num_words[i]==0:
+            description_exists.append('no')
+        else:
+            description_exists.append('yes')
+            
+        try:
+            opinion = TextBlob(line)
+            polarity, subjectivity = opinion.sentiment
+            description_polarity.append(polarity)
+            description_subjectivity.append(subjectivity)
+        except:
+            description_polarity.append(0.0)
+            description_subjectivity.append(0.5)
+           
+    description = pd.DataFrame({'description_length': num_words, 
+                                'description_polarity': description_polarity, 
+                                'description_subjectivity': description_subjectivity, 
+                                'description_exists': description_exists})
+    
+    return description
+
+
+def multi_adoption(name_col):
+    '''
+        Checks the name column for potential multiple adoptions.
+        
+        Args:
+            name_col (Series): Each row of the column contains a string of the
+                animals' name(s).
+        Returns:
+            multi_adoption (DataFrame): A categorical variable is returned with
+                either a 'yes' or a 'no' is the name string contains words that
+                suggest a multiple adoption.
+    '''
+            
+    stopwords = ['adopts', 'neutered',"trn'd",'tnr', 'shots', 'spayed', '#',
+                 'petsmart', 'pend', 'pendg','pendin', 'pending', 'hold',
+                 'shelter', 'foster', 'adoption', 'reduced', 'fee', 'adopted',
+                 'care', 'in', 'kitten', 'cat', 'dog', 'puppy', 'pup', 'litter']
+    
+    name_num = []
+    name = []
+    multi_animal_adoption = []
+    multi_adoption_parameters = ['and', 'with', 'two', 'three']
+    
+    for i in range(len(name_col)):
+        line = str(name_col[i])
+        line = ''.join([j for j in line if not j.isdigit()])
+        line = line.replace('&', 'and')
+        line = line.translate(None, string.punctuation)
+        line = ' '.join( [w for w in line.split() if len(w)>1] )
+        line = line.lower()
+        for k in range(len(stopwords)):
+            line = line.replace(stopwords[k], '')
+        name.append(line)
+        name_num.append(len(re.findall(r'\w+', line)))
+        multi_pet_potential = 0
+        for j in range(len(multi_adoption_parameters)):
+            test = multi_adoption_parameters[j] in line
+            if test==True:
+                multi = 1
+            else:
+                multi = 0
+                
+        multi_pet_potential = np.vstack([multi_pet_potential,
+                                         multi])
+        multi_pet_potential = multi_pet_potential.sum()
+        if multi_pet_potential>0:
+            multi_animal_adoption.append('yes')
+        else:
+            multi_animal_adoption.append('no')
+    
+    multi_adoption = pd.DataFrame({'multi_adoption': multi_animal_adoption})
+    
+    return multi_adoption
+
+
+def image_analysis(image_col):
+    '''
+        Currently only determines whether photos have been uploaded.
+    
+        Args:
+            image_col (Series): Each column contains a list of strings with the
+                url of a pet image.
+        Returns:
+            image (DataFrame): A categorical variable is returned with either a 
+                'yes' or a 'no' if the list either contains images or is empty.
+    '''
+            
+    image_exists = []
+    
+    for i in range(len(image_col)):
+        
+        line = str(image_col[i]).replace('nan','')
+    
+        if not line:
+            image_exists.append('no')
+        else:
+            image_exists.append('yes')
+    
+    image = pd.DataFrame({'image_exists': image_exists})
+    
+    return image
+
+
+####Streaming accumulators for chunked data
+
+class RunningMoments(object):
+    '''
+        Mergeable running mean and covariance of a set of numerical features.
+
+        Chunks are folded in with the pairwise (Chan/Welford) update, so the
+        accumulator can be filled chunk by chunk and accumulators built on
+        different workers can be combined with merge(). Missing values are
+        deleted pairwise, as in DataFrame.corr(): each pair of columns is
+        accumulated over the rows where both are present.
+
+        Args:
+            columns (list): The names of the numerical features tracked.
+    '''
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        ##Entry [i, j] is taken over the rows where columns i and j are both
+        ##present: the row count, the mean and sum of squared deviations of
+        ##column i, and the co-moment of i and j
+        self.n = np.zeros((k, k))
+        self.mean = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.comoment = np.zeros((k, k))
+
+    def _combine(self, n, mean, m2, comoment):
+        total = self.n + n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(total>0, n/total, 0)
+        delta = mean - self.mean
+        shared = self.n*weight
+        self.mean = self.mean + delta*weight
+        self.m2 = self.m2 + m2 + delta**2*shared
+        self.comoment = self.comoment + comoment + delta*delta.T*shared
+        self.n = total
+        return self
+
+    def update(self, chunk):
+        '''
+            Folds a chunk of rows into the accumulator.
+
+            Args:
+                chunk (DataFrame): A chunk containing at least the tracked
+                    columns.
+            Returns:
+                self (RunningMoments): The updated accumulator.
+        '''
+
+        values = np.asarray(chunk[self.columns], dtype=np.float64)
+        present = (~np.isnan(values)).astype(np.float64)
+        if not present.any():
+            return self
+        ##Shifting by a column's own mean keeps the sums of squares small
+        with np.errstate(invalid='ignore'):
+            shift = np.nan_to_num(np.nanmean(values, axis=0))
+        values = np.where(present>0, values - shift, 0)
+
+        n = np.dot(present.T, present)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(n>0, np.dot(values.T, present)/n, 0)
+        m2 = np.dot((values**2).T, present) - n*mean**2
+        comoment = np.dot(values.T, values) - n*mean*mean.T
+
+        return self._combine(n, mean + shift[:, None], m2, comoment)
+
+    def merge(self, other):
+        '''
+            Combines the accumulator with one built on another chunk/worker.
+
+            Args:
+                other (RunningMoments): An accumulator over the same columns.
+            Returns:
+                self (RunningMoments): The combined accumulator.
+        '''
+
+        if other.columns!=self.columns:
+            raise ValueError('Cannot merge moments over different columns')
+
+        return self._combine(other.n, other.mean, other.m2, other.comoment)
+
+    def variance(self):
+        '''
+            Returns:
+                variance (Series): The sample variance of each column.
+        '''
+
+        n = np.diag(self.n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = np.where(n>1, np.diag(self.m2)/(n-1), np.nan)
+
+        return pd.Series(variance, index=self.columns)
+
+    def cov(self):
+        '''
+            Returns:
+                cov (DataFrame): The sample covariance matrix, with missing
+                    values deleted pairwise like DataFrame.cov().
+        '''
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = np.where(self.n>1, self.comoment/(self.n-1), np.nan)
+
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+    def corr(self):
+        '''
+            Returns:
+                corr (DataFrame): The Pearson correlation matrix, laid out like
+                    DataFrame.corr() and with its pairwise deletion.
+        '''
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment/np.sqrt(self.m2*self.m2.T)
+
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+class StreamingHistogram(object):
+    '''
+        Mergeable fixed-width histogram of a numerical feature.
+
+        Bins are aligned to multiples of bin_width, so no range has to be
+        known up front and histograms built on different chunks/workers line
+        up exactly when merged. Missing values are skipped.
+
+        Args:
+            bin_width (float): The width of each bin, in the feature's units.
+    '''
+
+    def __init__(self, bin_width):
+        if not bin_width>0:
+            raise ValueError('bin_width must be positive')
+        self.bin_width = float(bin_width)
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _add(self, offset, counts):
+        if len(counts)==0:
+            return self
+        if len(self.counts)==0:
+            self.offset, self.counts = offset, counts.astype(np.int64)
+            return self
+        start = min(self.offset, offset)
+        stop = max(self.offset+len(self.counts), offset+len(counts))
+        merged = np.zeros(stop-start, dtype=np.int64)
+        merged[self.offset-start:self.offset-start+len(self.counts)] += self.counts
+        merged[offset-start:offset-start+len(counts)] += counts
+        self.offset, self.counts = start, merged
+        return self
+
+    def update(self, values):
+        '''
+            Folds a chunk of values into the histogram.
+
+            Args:
+                values (Series): A chunk of the feature's values.
+            Returns:
+                self (StreamingHistogram): The updated histogram.
+        '''
+
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values)==0:
+            return self
+        ##Snap quotients within rounding error of an edge onto it, so that
+        ##e.g. 0.15 lands in the bin starting at 3*0.05, not the one before
+        quotient = values/self.bin_width
+        nearest = np.rint(quotient)
+        bins = np.where(np.isclose(quotient, nearest, rtol=1e-9, atol=0),
+                        nearest, np.floor(quotient)).astype(np.int64)
+        offset = bins.min()
+
+        return self._add(int(offset), np.bincount(bins-offset))
+
+    def merge(self, other):
+        '''
+            Combines the histogram with one built on another chunk/worker.
+
+            Args:
+                other (StreamingHistogram): A histogram with the same bin width.
+            Returns:
+                self (StreamingHistogram): The combined histogram.
+        '''
+
+        if other.bin_width!=self.bin_width:
+            raise ValueError('Cannot merge histograms with different bin widths')
+
+        return self._add(other.offset, other.counts)
+
+    @property
+    def edges(self):
+        return (self.offset+np.arange(len(self.counts)+1))*self.bin_width
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    @classmethod
+    def from_data(cls, values, bin_width=None):
+        '''
+            Builds a histogram from an in-memory array in one go.
+
+            Args:
+                values (Series): The feature's values.
+                bin_width (float): The bin width; if None, it is taken from
+                    numpy's 'auto' bin estimator.
+            Returns:
+                hist (StreamingHistogram)
+        '''
+
+        if bin_width is None:
+            finite = np.asarray(values, dtype=np.float64)
+            finite = finite[~np.isnan(finite)]
+            edges = np.histogram_bin_edges(finite, bins='auto') if len(finite) else [0, 1]
+            bin_width = (edges[1]-edges[0]) or 1.0
+
+        return cls(bin_width).update(values)
+
+
+def accumulate_numeric(chunks, columns, label, bin_widths, moment_columns=None):
+    '''
+        Streams chunks of the pet data into mergeable accumulators for the
+        numerical features: one RunningMoments over all rows and one
+        StreamingHistogram per feature and class label.
+
+        Args:
+            chunks (iterable): DataFrames, e.g. from pd.read_csv(chunksize=...).
+            columns (list): The numerical features to accumulate.
+            label (str): The name of the class label column.
+            bin_widths (dict): The histogram bin width for each feature.
+            moment_columns (list): The columns tracked by the moments; if
+                None, the histogrammed columns.
+        Returns:
+            moments (RunningMoments): Moments/covariance over all rows.
+            hists (dict): {feature: {class label: StreamingHistogram}}
+    '''
+
+    if moment_columns is None:
+        moment_columns = columns
+    moments = RunningMoments(moment_columns)
+    hists = dict((col, {}) for col in columns)
+
+    for chunk in chunks:
+        moments.update(chunk)
+        for status, group in chunk.groupby(label):
+            for col in columns:
+                if status not in hists[col]:
+                    hists[col][status] = StreamingHistogram(bin_widths[col])
+                hists[col][status].update(group[col])
+
+    return moments, hists
+
+
+def iter_chunks(df, chunksize):
+    '''
+        Yields consecutive row chunks of an in-memory DataFrame, mirroring
+        pd.read_csv(chunksize=...).
+    '''
+
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start+chunksize]
+
+
+YES_NO = ['yes', 'no']
+
+##The category order used by encode_data; a column's code is its position
+ENCODING = {'multi_adoption': YES_NO, 'mix': YES_NO, 'altered': YES_NO,
+            'hasShots': YES_NO, 'housetrained': YES_NO, 'noCats': YES_NO,
+            'noClaws': YES_NO, 'noDogs': YES_NO, 'noKids': YES_NO,
+            'specialNeeds': YES_NO, 'description_exists': YES_NO,
+            'image_exists': YES_NO,
+            'sex': ['M', 'F', 'U'],
+            'animal': ['Cat', 'Dog'],
+            'age': ['Baby', 'Young', 'Adult', 'Senior'],
+            'size': ['S', 'M', 'L', 'XL']}
+
+def encode_data(df):
+    '''
+        Encodes the data into the appropriate format for running through 
+        machine learning models. Yes/no flags stored as bools (see
+        apply_dtypes) get the same codes as the strings: True (yes) is 0 and
+        False (no) is 1.
+        
+        Args:
+            df (DataFrame): The entire (clean) feature set.
+        Returns:
+            df (DataFrame): An encoded feature set.
+    '''
+    
+    for col, categories in ENCODING.items():
+        if df[col].dtype==bool and categories==YES_NO:
+            df[col] = (~df[col].values).astype(np.int8)
+        else:
+            df[col] = pd.Categorical(df[col], categories=categories, ordered=True).codes
+    
+    return df
+
+
+def encoder_schema(feature_names):
+    '''
+        Describes the encoding a model trained on encode_data output expects.
+        
+        Args:
+            feature_names (list): The model's feature columns, in order.
+        Returns:
+            schema (dict): The feature order and the category order of every
+                encoded feature.
+    '''
+    
+    return {'features': list(feature_names),
+            'categories': dict((col, ENCODING[col]) for col in feature_names
+                               if col in ENCODING)}
+
+
+####Column dtypes
+
+##Petfinder status codes, in the category order used for status
+STATUS_CODES = [('A', 'Available'), ('X', 'Adopted'), ('H', 'On Hold'), ('P', 'Pending')]
+
+ANIMALS = ['Cat', 'Dog', 'Rabbit', 'Bird', 'Scales, Fins & Other', 'Small & Furry',
+           'Horse', 'Barnyard']
+
+##The yes/no columns, stored as bools
+YES_NO_FLAGS = sorted(col for col, categories in ENCODING.items() if categories==YES_NO)
+
+##The categorical columns and their fixed category order; None takes the
+##sorted values found in the data (for open-ended columns like breed)
+CATEGORIES = {'status': [name for _, name in STATUS_CODES],
+              'animal': ANIMALS,
+              'age': ENCODING['age'],
+              'sex': ENCODING['sex'],
+              'size': ENCODING['size'],
+              'state': None,
+              'breed': None}
+ORDERED_CATEGORIES = ['age', 'size']
+
+##Timestamps, which CSV round trips turn back into strings
+DATETIME_COLUMNS = ['lastUpdate']
+
+
+def decode_status(status_col):
+    '''
+        Maps Petfinder status codes to names with one categorical lookup,
+        instead of a string replace per code over the whole column.
+        
+        Args:
+            status_col (Series): The raw status codes (A, X, H, P).
+        Returns:
+            status (Series): A categorical of the status names, in the order
+                of STATUS_CODES; unknown codes are NaN.
+    '''
+    
+    codes = pd.Categorical(status_col, categories=[code for code, _ in STATUS_CODES])
+    
+    return pd.Series(codes.rename_categories([name for _, name in STATUS_CODES]),
+                     index=status_col.index, name=status_col.name)
+
+
+def apply_dtypes(df, remove_unused=False):
+    '''
+        Applies the shared dtype policy to the pet data: the columns in
+        CATEGORIES become categoricals with a fixed category order, and the
+        yes/no flags become bools (missing values count as 'no') and the
+        DATETIME_COLUMNS are parsed. Other columns and absent ones are left
+        alone.
+        
+        Args:
+            df (DataFrame): Clean pet records, e.g. from read_partitioned.
+            remove_unused (bool): Drops categories with no rows, e.g. after
+                filtering, so counts and plots only show values present.
+        Returns:
+            df (DataFrame): A new frame; the input is not modified.
+    '''
+    
+    df = df.copy(deep=False)
+    for col in YES_NO_FLAGS:
+        if col in df and df[col].dtype!=bool:
+            df[col] = df[col].isin(['yes', True, 'True']).values
+    for col in DATETIME_COLUMNS:
+        if col in df:
+            df[col] = pd.to_datetime(df[col])
+    for col, categories in CATEGORIES.items():
+        if col not in df:
+            continue
+        values = df[col]
+        if categories is None:
+            categories = sorted(values.dropna().unique())
+        values = pd.Categorical(values, categories=categories,
+                                ordered=col in ORDERED_CATEGORIES)
+        if remove_unused:
+            values = values.remove_unused_categories()
+        df[col] = values
+    
+    return df
+
+
+def memory_report(before, after):
+    '''
+        Compares the memory used by each column of two versions of a frame,
+        e.g. before and after apply_dtypes. String contents are counted.
+        
+        Args:
+            before (DataFrame): The original frame.
+            after (DataFrame): The converted frame.
+        Returns:
+            report (DataFrame): dtype and MB before and after and the
+                reduction factor per column, largest savings first, with a
+                'TOTAL' row.
+    '''
+    
+    mb_before = before.memory_usage(index=False, deep=True)/2.**20
+    mb_after = after.memory_usage(index=False, deep=True)/2.**20
+    report = pd.DataFrame({'dtype_before': before.dtypes.astype(str),
+                           'dtype_after': after.dtypes.astype(str),
+                           'mb_before': mb_before, 'mb_after': mb_after},
+                          columns=['dtype_before', 'dtype_after', 'mb_before', 'mb_after'])
+    report = report.loc[(report.mb_before-report.mb_after).sort_values(ascending=False).index]
+    report.loc['TOTAL'] = ['', '', mb_before.sum(), mb_after.sum()]
+    report['reduction'] = report.mb_before/report.mb_after
+    
+    return report
+
+
+def category_counts(col, order):
+    '''
+        Counts the rows of each category in a given order, with 0 for
+        categories that do not occur. Bool flags are counted as 'yes'/'no'.
+        
+        Args:
+            col (Series): A categorical, bool or string column.
+            order (list): The categories to count, in display order.
+        Returns:
+            counts (Series): Indexed by order, with the index named after
+                the column.
+    '''
+    
+    if col.dtype==bool:
+        col = pd.Series(np.where(col.values, 'yes', 'no'), index=col.index, name=col.name)
+    counts = col.value_counts()
+    ##Shaped like groupby(col).size(): the index is named after the column,
+    ##so reset_index() gives it back as a column, and the counts are unnamed
+    counts.index = pd.Index(counts.index.astype(object), name=col.name)
+    counts.name = None
+    
+    return counts.reindex(order).fillna(0)
+
+
+def balanced_indices(labels, strata=None, max_ratio=1.6, replace=False,
+                     random_state=None):
+    '''
+        Down-samples every class to the size of the smallest class, working
+        on row positions only, so no frames are filtered or copied.
+        
+        Args:
+            labels (array): The class label of each row; any number of classes.
+            strata (array): An optional group for each row (e.g., shelter_id
+                or state). Each class is then down-sampled proportionally
+                within every group, so it keeps its shelter/state mix.
+            max_ratio (float): Classes are only resampled when the largest is
+                more than max_ratio times the smallest.
+            replace (bool): Samples with replacement, as sklearn's resample
+                does.
+            random_state (int): Seed for the sampling.
+        Returns:
+            indices (int64): The sorted positions of the rows to keep.
+    '''
+    
+    labels = np.asarray(labels)
+    classes, class_codes, counts = np.unique(labels, return_inverse=True,
+                                             return_counts=True)
+    if counts.max()<=max_ratio*counts.min():
+        return np.arange(len(labels))
+    
+    rng = np.random.RandomState(random_state)
+    n_target = counts.min()
+    if strata is not None:
+        _, strata_codes = np.unique(np.asarray(strata).astype(str),
+                                    return_inverse=True)
+    
+    keep = []
+    for code in range(len(classes)):
+        rows = np.flatnonzero(class_codes==code)
+        if len(rows)==n_target and not replace:
+            keep.append(rows)
+        elif strata is None:
+            keep.append(rng.choice(rows, n_target, replace=replace))
+        else:
+            keep.append(_stratified_choice(rows, strata_codes[rows], n_target,
+                                           replace, rng))
+    
+    return np.sort(np.concatenate(keep))
+
+
+def _stratified_choice(rows, groups, n_samples, replace, rng):
+    '''
+        Picks n_samples of rows with each group represented in proportion to
+        its size (largest-remainder rounding).
+    '''
+    
+    group_ids, group_sizes = np.unique(groups, return_counts=True)
+    exact = group_sizes*float(n_samples)/len(rows)
+    quota = np.floor(exact).astype(np.int64)
+    short = n_samples - quota.sum()
+    quota[np.argsort(quota-exact)[:short]] += 1
+    
+    if replace:
+        return np.concatenate([rng.choice(rows[groups==g], q, replace=True)
+                               for g, q in zip(group_ids, quota) if q>0])
+    
+    ##Shuffle within each group with random sort keys, then keep the first
+    ##quota rows of every group
+    order = np.lexsort((rng.rand(len(rows)), groups))
+    group_start = np.searchsorted(groups[order], group_ids)
+    rank = np.arange(len(rows)) - np.repeat(group_start, group_sizes)
+    quota_per_row = np.repeat(quota, group_sizes)
+    
+    return rows[order[rank<quota_per_row]]
+
+
+def balance_check(df, label, plot=True, strata=None, return_indices=False,
+                  random_state=None):
+    '''
+        Checks the classes for imbalance issues
+        Downsamples the data if the imbalance exceeds a certain threshold
+        Returns either the same df (if below threshold) or the class balanced df
+        
+        Args:
+            df (DataFrame): The entire feature set, including class labels.
+            label (str): The name of the class label column.
+            plot (bool): Plots the class balance before and after resampling.
+            strata (str): An optional column (e.g., 'shelter_id' or 'state')
+                to stratify the down-sampling by; see balanced_indices.
+            return_indices (bool): Returns the kept row positions instead of
+                a frame, e.g. for use inside CV loops.
+            random_state (int): Seed for the sampling.
+        Returns:
+            df (DataFrame): The entire feature set; either unchanged, or 
+                downsampled if the largest class exceeds 1.6x the smallest.
+                With return_indices, the positions of those rows instead.
+    '''
+    
+    labels = df[label].values
+    indices = balanced_indices(labels,
+                               strata=df[strata].values if strata else None,
+                               random_state=random_state)
+    
+    if plot and len(indices)<len(df):
+        from .plotting import piePlot
+        balance_check = pd.Series(labels).value_counts().sort_index()
+        class_labels = balance_check.index.values
+        piePlot(balance_check,
+                class_labels,
+                'Status - Imbalanced')
+        balance_check = pd.Series(labels[indices]).value_counts().sort_index()
+        piePlot(balance_check,
+                class_labels,
+                'Status - Balanced')
+    
+    if return_indices:
+        return indices
+    if len(indices)==len(df):
+        return df
+    
+    return df.iloc[indices]
+
+
+def unique_breeds(breed_col):
+    '''
+        Runs through the column of breeds, removes stop words 
+        (i.e., coat colors), and identifies and quantifies unqiue breeds.
+        Args:
+            breed_col (Series): Each row contains a string with the breed of 
+                the animal.
+        Returns:
+            breeds (Series): The series contains the unique breeds as an index 
+                and the quantity of that breed as the value.
+    '''
+    
+    coat_colors = ['Yellow', 'Chocolate', 'Black', 'Tan']
+    
+    breeds = breed_col.dropna()
+    breeds = [i.split(',') for i in breeds]
+    breeds = [item for sublist in breeds for item in sublist]
+    
+    breeds = [i.split('/') for i in breeds]
+    breeds = [item for sublist in breeds for item in sublist]
+    
+    breeds = [item.translate(None, string.punctuation).strip() for item in breeds]
+    breeds = [re.sub("\((.*?)\)",'', i) for i in breeds]
+    
+    for color in coat_colors:
+        breeds = [re.sub(color,'', i).strip() for i in breeds]
+    
+    breeds = pd.Series(breeds,
+                       name='count')
+    breeds = breeds.groupby(breeds).count()
+    
+    return breeds
+
+
+####Hashed text features
+
+def _hash_chunk(vectorizer, texts):
+    return vectorizer.transform(texts)
+
+
+def hashed_text_features(text_col, n_features=2**18, analyzer='word',
+                         ngram_range=(1, 2), chunksize=10000, n_jobs=1):
+    '''
+        Hashes free text into sparse n-gram counts. There is no vocabulary,
+        so memory is fixed by n_features and chunksize rather than by the
+        corpus, and chunks can be hashed on several cores.
+        
+        Args:
+            text_col (Series): Each row contains a string; NaN is empty.
+            n_features (int): The number of hash buckets (columns).
+            analyzer (str): 'word', 'char' or 'char_wb' n-grams.
+            ngram_range (tuple): The n-gram lengths.
+            chunksize (int): Rows hashed per task.
+            n_jobs (int): Parallel workers; -1 for all cores.
+        Returns:
+            features (csr_matrix): One L2-normalized row per text.
+    '''
+    
+    from scipy import sparse
+    from sklearn.feature_extraction.text import HashingVectorizer
+    try:
+        from joblib import Parallel, delayed
+    except ImportError:
+        from sklearn.externals.joblib import Parallel, delayed
+    
+    vectorizer = HashingVectorizer(n_features=n_features, analyzer=analyzer,
+                                   ngram_range=ngram_range, alternate_sign=False,
+                                   decode_error='replace', dtype=np.float32)
+    texts = pd.Series(text_col).fillna('').astype(str).values
+    chunks = [texts[start:start+chunksize] for start in range(0, len(texts), chunksize)]
+    if not chunks:
+        return sparse.csr_matrix((0, n_features), dtype=np.float32)
+    
+    parts = Parallel(n_jobs=n_jobs)(delayed(_hash_chunk)(vectorizer, chunk)
+                                    for chunk in chunks)
+    
+    return sparse.vstack(parts, format='csr')
+
+
+def pet_text_features(df, description_col='description', name_col='name',
+                      chunksize=10000, n_jobs=1):
+    '''
+        Hashed features for the raw pet text: word 1-2 grams of the
+        description (2**18 columns) and character 2-4 grams of the name
+        (2**12 columns), side by side.
+        
+        Args:
+            df (DataFrame): Pets with description and name columns.
+            chunksize (int): Rows hashed per task.
+            n_jobs (int): Parallel workers; -1 for all cores.
+        Returns:
+            features (csr_matrix)
+    '''
+    
+    from scipy import sparse
+    
+    description = hashed_text_features(df[description_col], n_features=2**18,
+                                       analyzer='word', ngram_range=(1, 2),
+                                       chunksize=chunksize, n_jobs=n_jobs)
+    name = hashed_text_features(df[name_col], n_features=2**12,
+                                analyzer='char_wb', ngram_range=(2, 4),
+                                chunksize=chunksize, n_jobs=n_jobs)
+    
+    return sparse.hstack([description, name], format='csr')
+
+
+####Near-duplicate detection
+
+##The largest prime below 2**32, so (a*h + b) for 32-bit a, b and h fits in uint64
+_MINHASH_PRIME = 4294967291
+
+
+def _pet_shingles(row, columns):
+    shingles = set()
+    for col, value in zip(columns, row):
+        if not isinstance(value, str) or not value:
+            continue
+        if col=='description':
+            words = re.findall(r'\w+', value.lower())
+            shingles.update(' '.join(words[i:i+3]) for i in range(max(1, len(words)-2)))
+        elif col=='photos':
+            shingles.update('photos:'+url for url in re.findall(r"[^\s'\",\[\]]+", value))
+        else:
+            shingles.add(col+':'+' '.join(re.findall(r'\w+', value.lower())))
+    return shingles
+
+
+def minhash_signatures(df, columns=('description', 'name', 'breed', 'photos'),
+                       num_perm=128, min_shingles=5, random_state=0, chunksize=5000):
+    '''
+        MinHash signatures over the shingles of each pet record: word
+        3-grams of the description, the normalized name and breed, and each
+        photo URL. The share of equal entries between two signatures
+        estimates the Jaccard similarity of their shingle sets.
+        
+        Args:
+            df (DataFrame): Pet records.
+            columns (list): The text columns to shingle.
+            num_perm (int): The signature length.
+            min_shingles (int): Rows with fewer shingles (e.g. only a name
+                and breed) are too generic to match and are left out.
+            random_state (int): Seed for the hash permutations.
+            chunksize (int): Rows hashed at a time, which bounds memory.
+        Returns:
+            signatures (ndarray): (n_rows, num_perm) uint64; rows left out
+                are all -1 (max uint64).
+    '''
+    
+    rng = np.random.RandomState(random_state)
+    a = rng.randint(1, _MINHASH_PRIME, size=num_perm, dtype=np.int64).astype(np.uint64)
+    b = rng.randint(0, _MINHASH_PRIME, size=num_perm, dtype=np.int64).astype(np.uint64)
+    columns = list(columns)
+    rows = df[columns].values
+    signatures = np.full((len(df), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+    
+    for start in range(0, len(df), chunksize):
+        counts = []
+        hashes = []
+        for row in rows[start:start+chunksize]:
+            shingles = _pet_shingles(row, columns)
+            if len(shingles)<min_shingles:
+                shingles = ()
+            counts.append(len(shingles))
+            hashes.extend(zlib.crc32(s.encode('utf-8') if not isinstance(s, bytes) else s)
+                          & 0xffffffff for s in shingles)
+        counts = np.array(counts)
+        if not hashes:
+            continue
+        permuted = (np.array(hashes, dtype=np.uint64)[:, None]*a + b) % np.uint64(_MINHASH_PRIME)
+        has = np.flatnonzero(counts)
+        offsets = np.concatenate([[0], np.cumsum(counts[has])[:-1]])
+        signatures[start+has] = np.minimum.reduceat(permuted, offsets, axis=0)
+    
+    return signatures
+
+
+def near_duplicate_clusters(signatures, bands=32, threshold=0.7):
+    '''
+        Groups near-duplicate records with banded locality-sensitive hashing.
+        Rows sharing a band bucket are linked to the bucket's first row when
+        their signatures agree on at least threshold of entries, so the work
+        is linear in the number of rows rather than in pairs.
+        
+        Args:
+            signatures (ndarray): Output of minhash_signatures.
+            bands (int): The number of LSH bands; must divide num_perm.
+            threshold (float): The estimated Jaccard similarity to link.
+        Returns:
+            clusters (ndarray): A cluster id per row (the smallest row number
+                in its cluster); singletons are their own cluster.
+    '''
+    
+    n_rows, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError('bands (%d) must divide the signature length (%d)'
+                         % (bands, num_perm))
+    width = num_perm//bands
+    parent = np.arange(n_rows)
+    
+    def find(i):
+        while parent[i]!=i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    has_shingles = signatures[:, 0]!=np.iinfo(np.uint64).max
+    ##Each band is reduced to one 64-bit key; a rare key collision only adds
+    ##a candidate, which the signature comparison then rejects
+    multipliers = np.random.RandomState(0).randint(1, 1 << 62, size=width).astype(np.uint64) | 1
+    for band in range(bands):
+        block = signatures[:, band*width:(band+1)*width]
+        keys = np.unique((block*multipliers).sum(axis=1), return_inverse=True)[1]
+        keys[~has_shingles] = -1
+        order = np.argsort(keys, kind='mergesort')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:]!=sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, len(order)])
+        for start, size in zip(starts[sizes>1], sizes[sizes>1]):
+            if sorted_keys[start]<0:
+                continue
+            members = order[start:start+size]
+            head = members[0]
+            similar = (signatures[members[1:]]==signatures[head]).mean(axis=1)>=threshold
+            for member in members[1:][similar]:
+                root_a, root_b = find(head), find(member)
+                if root_a!=root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+    
+    return np.array([find(i) for i in range(n_rows)])
+
+
+def dedupe_pets(df, action='collapse', columns=('description', 'name', 'breed', 'photos'),
+                num_perm=128, bands=32, threshold=0.7, min_shingles=5):
+    '''
+        Finds pets cross-posted under different ids (e.g. at partner
+        shelters) and collapses or flags them, so they are neither counted
+        twice nor split across train and test.
+        
+        Args:
+            df (DataFrame): Pet records.
+            action (str): 'collapse' keeps the most recently updated record
+                of each cluster (the first when there is no lastUpdate
+                column); 'flag' keeps every row.
+            columns (list): The text columns compared.
+            num_perm (int): The MinHash signature length.
+            bands (int): The number of LSH bands.
+            threshold (float): The estimated Jaccard similarity to link.
+            min_shingles (int): Rows with fewer shingles are never merged.
+        Returns:
+            pets (DataFrame): With a duplicate_cluster column (shared by the
+                rows of a cluster) and duplicate_count (the cluster size).
+    '''
+    
+    if action not in ('collapse', 'flag'):
+        raise ValueError("action must be 'collapse' or 'flag'")
+    
+    signatures = minhash_signatures(df, columns, num_perm=num_perm,
+                                    min_shingles=min_shingles)
+    clusters = near_duplicate_clusters(signatures, bands=bands, threshold=threshold)
+    
+    pets = df.copy()
+    pets['duplicate_cluster'] = clusters
+    pets['duplicate_count'] = pets.groupby('duplicate_cluster')['duplicate_cluster'].transform('size')
+    if action=='collapse':
+        order = np.arange(len(pets))
+        if 'lastUpdate' in pets:
+            order = np.argsort(pd.to_datetime(pets['lastUpdate']).values, kind='mergesort')[::-1]
+        keep = ~pd.Series(clusters[order]).duplicated().values
+        pets = pets.iloc[np.sort(order[keep])]
+    
+    return pets
+
+
+instrumentation.wrap_functions(globals())
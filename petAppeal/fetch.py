@@ -0,0 +1,209 @@
+from __future__ import absolute_import
+import json
+import sys
+import urllib
+import time
+import numpy as np
+import pandas as pd
+from . import instrumentation
+
+
+def _fetch_json(url, method):
+    '''
+        Requests a Petfinder API url and decodes the JSON response. The
+        request is counted and timed when instrumentation is on.
+    '''
+    
+    start = time.time()
+    try:
+        data = json.load(urllib.urlopen(url))
+    except:
+        instrumentation.record_request(method, time.time() - start, False)
+        raise
+    instrumentation.record_request(method, time.time() - start, True)
+    
+    return data
+
+
+def shelterFinder(zipcode, petFinder_api_key):
+    '''
+        Calls the petfinder API shelter.find method to get animal shelter info.
+        
+        See https://www.petfinder.com/developers/api-docs for more info.
+        
+        Args:
+            zipcode (str): A US or Canadian ZIP code.
+            petfinder_api_key (str): API key requested from Petfinder.
+
+        Returns:
+            shelters (DataFrame): A dataframe with detailed shelter information
+    '''
+    
+    url = 'http://api.petfinder.com/shelter.find?key='+petFinder_api_key+\
+    '&location='+zipcode+'&format=json'
+    
+    try:
+        data = _fetch_json(url, 'shelter.find')
+
+        individual_shelters = data['petfinder']['shelters']['shelter']
+        
+        shelter_vars = ['address1', 'address2', 'city', 'country', 'email',
+                        'fax', 'id', 'phone', 'latitude', 'longitude', 'name',
+                        'state', 'zip']
+        
+        shelters = pd.DataFrame(index =range(0,len(individual_shelters)),
+                                columns=shelter_vars)
+ 
+        for i in range(len(individual_shelters)):
+            shelter_info = individual_shelters[i]
+            for j in shelter_vars:
+
+                try:
+                    val = shelter_info[j]['$t'].encode("utf-8")
+                except:
+                    val = np.nan
+                    
+                shelters.ix[i,j]=val
+                    
+    except:
+        print "Oops!",sys.exc_info(),\
+        "occured.\nThere appear to be no animal shelters in this zip code"
+    
+    return shelters
+
+
+def getPets(shelter_id, petFinder_api_key, status):
+    '''
+        Calls the petfinder API shelter.getPets method to get pet info.
+    
+        See https://www.petfinder.com/developers/api-docs for more info.
+        
+        Args:
+            shelter_id (str): A Petfinder specific ID.
+            petfinder_api_key (str): API key requested from Petfinder.
+
+        Returns:
+            pets (DataFrame): A dataframe with detailed pet information
+    '''
+        
+    url = 'http://api.petfinder.com/shelter.getPets?key='+petFinder_api_key+\
+    '&id='+shelter_id+'&status='+status+'&format=json&count=1000&output=full'
+
+    data = None
+    try:
+        data = _fetch_json(url, 'shelter.getPets')
+    except:
+        print "Oops!",sys.exc_info(),\
+        "occured.\nThere appear to be no animals at", shelter_id
+        
+    return parse_pets(data, shelter_id)
+
+
+def parse_pets(data, shelter_id=None):
+    '''
+        Parses a shelter.getPets JSON response into a dataframe.
+        
+        Args:
+            data (dict): The decoded JSON response; None for a failed request.
+            shelter_id (str): The Petfinder shelter ID, used in messages.
+
+        Returns:
+            pets (DataFrame): A dataframe with detailed pet information
+    '''
+
+    pet_vars = ['age', 'animal', 'breeds', 'description', 'id', 'contact',
+                    'lastUpdate', 'media', 'mix', 'name', 'options', 'sex',
+                    'shelterId', 'shelterPetId', 'size', 'status']
+        
+    shelter_vars = ['address1', 'address2', 'city', 'email', 'fax',
+                        'phone', 'state', 'zip']
+        
+    pets = pd.DataFrame(columns=pet_vars+shelter_vars)
+
+    try:
+        if data is None:
+            individual_pets = []
+        else:
+            individual_pets = data['petfinder']['pets']['pet']
+        
+        if type(individual_pets)==dict:
+            copy = individual_pets
+            individual_pets = []
+            individual_pets.append(copy)
+        
+        pet_vars = ['age', 'animal', 'breeds', 'description', 'id', 'contact',
+                    'lastUpdate', 'media', 'mix', 'name', 'options', 'sex',
+                    'shelterId', 'shelterPetId', 'size', 'status']
+        
+        shelter_vars = ['address1', 'address2', 'city', 'email', 'fax',
+                        'phone', 'state', 'zip']
+        
+        pets = pets.reindex(index=range(len(individual_pets)))
+        
+        for i in range(len(individual_pets)):
+            pet_info = individual_pets[i] 
+            for j in pet_vars:
+                
+                try:
+                   val = pet_info[j]['$t'].encode("utf-8")
+                except:
+                    val = np.nan
+                    
+                if j=='breeds':                    
+                    try:
+                        val_main = pet_info['breeds']['breed']
+                        val = []
+                        for k in range(len(val_main)):
+                            val.append(val_main[k]['$t'].encode("utf-8"))
+                    except:
+                        val = np.nan
+                        
+                elif j=='contact':
+                    try:
+                        val_main = pet_info['contact']
+                        for k in shelter_vars:
+                            try:
+                                val = val_main[k]['$t'].encode("utf-8")
+                            except:
+                                val = np.nan
+                            pets.ix[i,k]=val
+                    except:
+                        val = np.nan
+                        
+                elif j=='media':
+                    try:
+                        val_main = pet_info['media']['photos']['photo']
+                        val = []
+                        for k in range(len(val_main)):
+                            val.append(val_main[k]['$t'].encode("utf-8"))
+                    except:
+                        val = np.nan
+                    
+                elif j=='options':
+                    try:
+                        val_main = pet_info['options']['option']
+                        val = []
+                        for k in range(len(val_main)):
+                            val.append(val_main[k]['$t'].encode("utf-8"))
+                    except:
+                        val = np.nan
+                        
+                pets.ix[i,j]=val
+                del val
+        
+                
+    except:
+        print "Oops!",sys.exc_info(),\
+        "occured.\nThere appear to be no animals at", shelter_id
+        
+    rename_cols = {'breeds': 'breed', 'shelterId': 'shelter_id',
+                       'media': 'photos', 'shelterPetId': 'pet_id'}
+    pets.rename(columns=rename_cols,
+                inplace=True)
+    pets = pets.drop(labels='contact',
+                     axis=1)
+    
+    return pets
+
+
+instrumentation.wrap_functions(globals())
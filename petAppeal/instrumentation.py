@@ -0,0 +1,451 @@
+from __future__ import absolute_import
+import json
+import sys
+import time
+import os
+import functools
+import threading
+import atexit
+import cProfile
+import numpy as np
+import pandas as pd
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+try:
+    import resource
+except ImportError:
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def measure_call(func, *args):
+    '''
+        Calls func(*args) and returns its result, the wall time and the peak
+        Python/NumPy memory it allocated in MB. Without tracemalloc (Python 2)
+        the peak is the growth of the sampled resident memory instead (see
+        RSSSampler), or None where that cannot be read either.
+    '''
+    
+    if tracemalloc is None:
+        sampler = RSSSampler().start()
+        start = time.time()
+        result = func(*args)
+        elapsed = time.time() - start
+        return result, elapsed, sampler.stop()
+    
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.clear_traces()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.time()
+    result = func(*args)
+    elapsed = time.time() - start
+    peak_mb = (tracemalloc.get_traced_memory()[1] - base)/1e6
+    if not was_tracing:
+        tracemalloc.stop()
+    
+    return result, elapsed, peak_mb
+
+
+INSTRUMENTED_FUNCTIONS = ['shelterFinder', 'getPets', 'parse_pets', 'sort_options',
+                          'description_analysis', 'multi_adoption',
+                          'image_analysis', 'unique_breeds', 'encode_data',
+                          'balance_check', 'accumulate_numeric',
+                          'normalize_param_grid', 'checkpointed_search',
+                          'successive_halving_search', 'score_pets', 'saveModel',
+                          'loadModel', 'benchmark_models',
+                          'permutation_importance', 'update_model',
+                          'match_shelters', 'pet_text_features',
+                          'dedupe_pets', 'write_partitioned', 'read_partitioned',
+                          'photo_features', 'bootstrap_evaluation',
+                          'apply_dtypes', 'read_pets']
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+_instrumentation = None
+
+
+def max_rss_mb():
+    '''
+        Returns the peak resident memory of this process in MB, or None where
+        the resource module is unavailable.
+    '''
+    
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    ##bytes on macOS, kilobytes elsewhere
+    return rss/1e6 if sys.platform=='darwin' else rss/1e3
+
+
+def current_rss_mb():
+    '''
+        Returns the current resident memory of this process in MB, read with
+        psutil if installed or from /proc/self/statm, or None where neither
+        is available.
+    '''
+    
+    if psutil is not None:
+        return psutil.Process(os.getpid()).memory_info().rss/1e6
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+    return pages*os.sysconf('SC_PAGE_SIZE')/1e6
+
+
+class RSSSampler(object):
+    '''
+        Tracks the peak growth of the current resident memory over a block by
+        sampling it from a background thread, for interpreters without
+        tracemalloc. Unlike the process-lifetime ru_maxrss, the growth is not
+        hidden by an earlier, higher peak. Allocations that are freed between
+        two samples can be missed.
+        
+        Args:
+            interval (float): Seconds between samples.
+    '''
+    
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.base = None
+        self.peak = None
+        self._done = threading.Event()
+        self._thread = None
+    
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, current_rss_mb())
+    
+    def start(self):
+        self.base = self.peak = current_rss_mb()
+        if self.base is not None:
+            self._thread = threading.Thread(target=self._sample)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+    
+    def stop(self):
+        '''
+            Returns:
+                peak_mb (float): The peak growth since start() in MB; None if
+                    the resident memory cannot be read.
+        '''
+        
+        if self._thread is None:
+            return None
+        self._done.set()
+        self._thread.join()
+        self._thread = None
+        return max(self.peak, current_rss_mb()) - self.base
+
+
+def _n_rows(args):
+    if args and isinstance(args[0], (pd.Series, pd.DataFrame, np.ndarray, list)):
+        return len(args[0])
+    return None
+
+
+class Instrumentation(object):
+    '''
+        Collects per-call timings, row throughput and peak memory for the
+        petAppeal functions, request counts and latency histograms for the
+        Petfinder API, and optionally a cProfile dump of one stage.
+        
+        Args:
+            profile_stage (str): A function or stage name to run under
+                cProfile; None to profile nothing.
+            profile_dir (str): Where <stage>.prof files are written.
+    '''
+    
+    def __init__(self, profile_stage=None, profile_dir=''):
+        self.profile_stage = profile_stage
+        self.profile_dir = profile_dir
+        self.calls = {}
+        self.requests = {}
+        self.started = time.time()
+        self._open = []
+    
+    def record_request(self, method, seconds, ok):
+        stats = self.requests.setdefault(method, {'count': 0, 'errors': 0,
+                                                  'seconds': 0.0,
+                                                  'histogram': [0]*(len(LATENCY_BUCKETS)+1)})
+        stats['count'] += 1
+        stats['errors'] += not ok
+        stats['seconds'] += seconds
+        stats['histogram'][np.searchsorted(LATENCY_BUCKETS, seconds)] += 1
+    
+    def _enter(self, name):
+        '''
+            Starts timing a call or stage. With tracemalloc, a nested
+            measurement folds the peak so far into its parent's before
+            resetting the peak, and hands its own peak back when it ends, so
+            a stage and the calls inside it all get their peak. Without
+            reset_peak only the outermost measurement is traced; the others,
+            and all of them without tracemalloc, use the growth of the
+            sampled resident memory (see RSSSampler).
+        '''
+        
+        frame = {'name': name, 'profiler': None, 'traced': False, 'rss': None}
+        if name==self.profile_stage:
+            frame['profiler'] = cProfile.Profile()
+            frame['profiler'].enable()
+        can_reset = hasattr(tracemalloc, 'reset_peak')
+        if tracemalloc is not None and (not self._open or can_reset):
+            if self._open:
+                parent = self._open[-1]
+                parent['peak'] = max(parent['peak'], tracemalloc.get_traced_memory()[1])
+            else:
+                frame['was_tracing'] = tracemalloc.is_tracing()
+                if not frame['was_tracing']:
+                    tracemalloc.start()
+            if can_reset:
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.clear_traces()
+            frame['traced'] = True
+            frame['base'] = frame['peak'] = tracemalloc.get_traced_memory()[0]
+        else:
+            frame['rss'] = RSSSampler().start()
+        self._open.append(frame)
+        frame['start'] = time.time()
+        return frame
+    
+    def _exit(self, frame):
+        '''
+            Ends a measurement started by _enter.
+            
+            Returns:
+                seconds (float), peak_mb (float): None if memory could not
+                    be measured.
+        '''
+        
+        seconds = time.time() - frame['start']
+        self._open.pop()
+        if frame['profiler'] is not None:
+            frame['profiler'].disable()
+            frame['profiler'].dump_stats(os.path.join(self.profile_dir,
+                                                      frame['name']+'.prof'))
+        peak_mb = None
+        if frame['traced']:
+            peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            peak_mb = (peak - frame['base'])/1e6
+            if self._open:
+                self._open[-1]['peak'] = max(self._open[-1]['peak'], peak)
+            elif not frame['was_tracing']:
+                tracemalloc.stop()
+        else:
+            peak_mb = frame['rss'].stop()
+        
+        return seconds, peak_mb
+    
+    def _record(self, name, seconds, peak_mb, n_rows):
+        stats = self.calls.setdefault(name, {'count': 0, 'seconds': 0.0, 'rows': 0,
+                                             'peak_mb': None})
+        stats['count'] += 1
+        stats['seconds'] += seconds
+        stats['rows'] += n_rows or 0
+        if peak_mb is not None and (stats['peak_mb'] is None or peak_mb>stats['peak_mb']):
+            stats['peak_mb'] = peak_mb
+    
+    def run(self, name, func, args, kwargs, n_rows=None):
+        '''
+            Calls func(*args, **kwargs) and records it under name.
+        '''
+        
+        frame = self._enter(name)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            seconds, peak_mb = self._exit(frame)
+        if n_rows is None and isinstance(result, pd.DataFrame):
+            n_rows = len(result)
+        self._record(name, seconds, peak_mb, n_rows)
+        
+        return result
+    
+    def summary(self):
+        '''
+            Returns:
+                summary (dict): Per-function and per-API-method statistics.
+        '''
+        
+        calls = {}
+        for name, stats in self.calls.items():
+            calls[name] = dict(stats, rows_per_sec=stats['rows']/stats['seconds']
+                               if stats['rows'] and stats['seconds']>0 else None)
+        requests = {}
+        for method, stats in self.requests.items():
+            requests[method] = dict(stats, mean_seconds=stats['seconds']/stats['count'],
+                                    buckets=LATENCY_BUCKETS)
+        
+        return {'script': os.path.basename(sys.argv[0]) if sys.argv else None,
+                'wall_seconds': time.time() - self.started,
+                'max_rss_mb': max_rss_mb(),
+                'peak_memory': 'traced allocations' if tracemalloc is not None
+                               else 'resident memory growth',
+                'calls': calls,
+                'requests': requests,
+                'profile': os.path.join(self.profile_dir, self.profile_stage+'.prof')
+                           if self.profile_stage else None}
+    
+    def report(self, path=None):
+        '''
+            Prints the run summary and writes it as JSON.
+            
+            Args:
+                path (str): The JSON file; None to only print.
+        '''
+        
+        summary = self.summary()
+        lines = ['\nInstrumentation report: %s (%.1fs wall)' % (summary['script'],
+                                                               summary['wall_seconds']),
+                 '%-26s %6s %10s %12s %10s' % ('stage', 'calls', 'seconds',
+                                               'rows/sec', 'peak MB')]
+        for name, stats in sorted(summary['calls'].items(),
+                                  key=lambda item: -item[1]['seconds']):
+            lines.append('%-26s %6d %10.2f %12s %10s' % (
+                name, stats['count'], stats['seconds'],
+                '-' if stats['rows_per_sec'] is None else '%.0f' % stats['rows_per_sec'],
+                '-' if stats['peak_mb'] is None else '%.1f' % stats['peak_mb']))
+        lines.append('peak MB: %s' % summary['peak_memory'])
+        for method, stats in sorted(summary['requests'].items()):
+            lines.append('%s: %d requests, %d errors, mean %.3fs' % (
+                method, stats['count'], stats['errors'], stats['mean_seconds']))
+            edges = ['<=%gs' % b for b in LATENCY_BUCKETS] + ['>%gs' % LATENCY_BUCKETS[-1]]
+            lines.append('    ' + '  '.join('%s: %d' % (e, c) for e, c
+                                            in zip(edges, stats['histogram']) if c))
+        print('\n'.join(lines))
+        
+        if path:
+            with open(path, 'w') as f:
+                json.dump(summary, f, indent=2, sort_keys=True)
+
+
+def record_request(method, seconds, ok):
+    '''
+        Records one Petfinder API request; does nothing while
+        instrumentation is off.
+    '''
+    
+    if _instrumentation is not None:
+        _instrumentation.record_request(method, seconds, ok)
+
+
+def _instrumented(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _instrumentation is None:
+            return func(*args, **kwargs)
+        return _instrumentation.run(name, func, args, kwargs, _n_rows(args))
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+class stage(object):
+    '''
+        Context manager that records a block of a script as a named stage,
+        e.g. `with petAppeal.stage('munge'):`, with the same wall time, peak
+        memory and optional cProfile dump as the instrumented functions.
+        n_rows may also be set inside the block once it is known. It does
+        nothing while instrumentation is off.
+    '''
+    
+    def __init__(self, name, n_rows=None):
+        self.name = name
+        self.n_rows = n_rows
+        self._instrumentation = None
+    
+    def __enter__(self):
+        self._instrumentation = _instrumentation
+        if self._instrumentation is not None:
+            self._frame = self._instrumentation._enter(self.name)
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self._instrumentation is not None:
+            seconds, peak_mb = self._instrumentation._exit(self._frame)
+            self._instrumentation._record(self.name, seconds, peak_mb, self.n_rows)
+            self._instrumentation = None
+        return False
+
+
+def instrument(profile_stage=None, profile_dir='', report_path='petAppeal_instrumentation.json',
+               stage_name=None):
+    '''
+        Turns on instrumentation for the rest of the run. The petAppeal
+        functions in INSTRUMENTED_FUNCTIONS record each call, the rest of the
+        run is recorded as a stage, and a summary is printed and saved when
+        the interpreter exits.
+        
+        Instrumentation can also be turned on without code changes by
+        setting PETAPPEAL_INSTRUMENT=1 (and optionally PETAPPEAL_PROFILE to a
+        stage name, PETAPPEAL_REPORT to the JSON path and PETAPPEAL_STAGE to
+        the stage name) before running any of the numbered scripts; the
+        pipeline runner names each script's stage this way.
+        
+        Args:
+            profile_stage (str): A function or stage name to dump with cProfile.
+            profile_dir (str): Where the .prof file is written.
+            report_path (str): Where the JSON summary is written.
+            stage_name (str): The name the run is recorded under; defaults
+                to the script's file name.
+        Returns:
+            instrumentation (Instrumentation)
+    '''
+    
+    global _instrumentation
+    if _instrumentation is None:
+        _instrumentation = Instrumentation(profile_stage, profile_dir)
+        if stage_name is None:
+            script = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else ''
+            stage_name = os.path.splitext(script)[0] or 'run'
+        run_stage = stage(stage_name)
+        run_stage.__enter__()
+        
+        def finish():
+            run_stage.__exit__(None, None, None)
+            if _instrumentation is not None:
+                _instrumentation.report(report_path)
+        atexit.register(finish)
+    
+    return _instrumentation
+
+
+def uninstrument():
+    '''
+        Turns instrumentation off; the wrapped functions call straight through.
+    '''
+    
+    global _instrumentation
+    _instrumentation = None
+
+
+def wrap_functions(namespace):
+    '''
+        Replaces the functions of a petAppeal submodule that are listed in
+        INSTRUMENTED_FUNCTIONS with wrappers that report to the active
+        Instrumentation. Called at the end of each submodule.
+        
+        Args:
+            namespace (dict): The submodule globals().
+    '''
+    
+    for name in INSTRUMENTED_FUNCTIONS:
+        if name in namespace:
+            namespace[name] = _instrumented(name, namespace[name])
+
+
+if os.environ.get('PETAPPEAL_INSTRUMENT'):
+    instrument(profile_stage=os.environ.get('PETAPPEAL_PROFILE'),
+               report_path=os.environ.get('PETAPPEAL_REPORT',
+                                          'petAppeal_instrumentation.json'),
+               stage_name=os.environ.get('PETAPPEAL_STAGE'))
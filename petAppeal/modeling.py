@@ -0,0 +1,1397 @@
+from __future__ import absolute_import
+import copy
+import json
+import pickle
+import math
+import time
+import os
+import shutil
+import hashlib
+import re
+import uuid
+import numpy as np
+import pandas as pd
+from sklearn.utils.random import sample_without_replacement
+from sklearn.base import clone
+from sklearn.metrics import get_scorer, precision_score
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import ParameterGrid, StratifiedShuffleSplit
+try:
+    import numba
+except ImportError:
+    numba = None
+try:
+    from joblib import Parallel, delayed, effective_n_jobs
+except ImportError:
+    from sklearn.externals.joblib import Parallel, delayed, effective_n_jobs
+from . import instrumentation
+from .instrumentation import measure_call
+from .features import ENCODING, encode_data, encoder_schema, balanced_indices
+
+
+def saveVar(variable, file_name):
+    '''
+        Pickles a variable
+        
+        Args:
+            variable (): The variable to be saved.
+            file_name (str): The string that the pickled variable will be
+                saved as.
+        Returns:
+            file_name.pickle: A pickle file of the variable.
+    '''
+    
+    with open(file_name+'.pickle',"wb") as f:
+        pickle.dump(variable, f)
+
+def loadVar(file_name):
+    '''
+        Loads a variable pickled with saveVar
+        
+        Args:
+            file_name (str): The name the variable was saved as.
+        Returns:
+            variable (): The unpickled variable.
+    '''
+    
+    with open(file_name+'.pickle',"rb") as f:
+        return pickle.load(f)
+
+
+####Parameter grid normalization
+
+_EXECUTION_PARAMS = ['n_jobs', 'verbose', 'random_state', 'warm_start', 'oob_score']
+
+
+def _value_key(value):
+    '''
+        Hashable key for a grid value; dicts (e.g., class_weight) compare by
+        their sorted items.
+    '''
+
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted(value.items())))
+
+    return (type(value).__name__, value)
+
+
+def _unique(values):
+    seen = set()
+    unique = []
+    for value in values:
+        key = _value_key(value)
+        if key not in seen:
+            seen.add(key)
+            unique.append(value)
+
+    return unique
+
+
+def _canonical_class_weight(value):
+    '''
+        Scales a class_weight dict so its smallest weight is 1; uniform
+        weights are equivalent to no weighting at all.
+    '''
+
+    if not isinstance(value, dict) or not value:
+        return value
+    smallest = float(min(value.values()))
+    if smallest<=0:
+        return value
+    scaled = dict((k, v/smallest) for k, v in value.items())
+    if all(v==1 for v in scaled.values()):
+        return None
+    return dict((k, int(v) if float(v).is_integer() else v) for k, v in scaled.items())
+
+
+def _canonical_max_features(value, n_features):
+    '''
+        Resolves max_features to the number of features sklearn will draw at
+        each split; returns None for values that are invalid.
+    '''
+
+    if value is None:
+        return n_features
+    if value in ('auto', 'sqrt'):
+        return max(1, int(np.sqrt(n_features)))
+    if value=='log2':
+        return max(1, int(np.log2(n_features)))
+    if isinstance(value, float):
+        return max(1, int(value*n_features)) if 0<value<=1 else None
+    if isinstance(value, (int, np.integer)):
+        return int(value) if 1<=value<=n_features else None
+
+    return None
+
+
+def normalize_param_grid(param_grid, n_features=None):
+    '''
+        Collapses duplicate, equivalent and invalid configurations out of a
+        RandomForestClassifier parameter grid before any fitting starts.
+
+        - Duplicate values are removed and class_weight dicts are rescaled so
+          that uniform weights collapse to None.
+        - Execution-only parameters (n_jobs, verbose, random_state,
+          warm_start) are taken out of the grid and returned as fixed
+          estimator parameters. oob_score only adds an out-of-bag estimate and
+          never changes the trees, so it is removed as well, which also drops
+          the invalid oob_score=True/bootstrap=False combinations.
+        - min_weight_fraction_leaf values of 0.5 or more are dropped, as they
+          leave at most a single split.
+        - With n_features given, max_features is resolved to an integer so
+          'sqrt', 'auto', None and equivalent ints/floats collapse, and values
+          larger than the feature set are dropped.
+        - sklearn enforces min_samples_split >= 2*min_samples_leaf, so the
+          split values at or below that bound are collapsed per leaf value.
+
+        Args:
+            param_grid (dict or list): A grid in the GridSearchCV format.
+            n_features (int): The number of columns of the training set.
+        Returns:
+            grid (list): The normalized grid as a list of dicts.
+            fixed_params (dict): The execution-only parameters to set on the
+                estimator.
+            report (dict): The original and normalized grid sizes, the
+                reduction factor and what was stripped or dropped.
+    '''
+
+    if isinstance(param_grid, dict):
+        param_grid = [param_grid]
+
+    fixed_params = {}
+    dropped = {}
+    grid = []
+
+    def drop(name, values):
+        if values:
+            dropped.setdefault(name, []).extend(values)
+
+    for sub_grid in param_grid:
+        sub_grid = dict((name, list(values)) for name, values in sub_grid.items())
+
+        for name in _EXECUTION_PARAMS:
+            if name not in sub_grid:
+                continue
+            values = sub_grid.pop(name)
+            if name in ('warm_start', 'oob_score'):
+                fixed_params[name] = False
+            elif name=='random_state':
+                fixed_params[name] = next((v for v in values if v is not None), None)
+            elif name=='n_jobs':
+                fixed_params[name] = -1 if -1 in values else values[0]
+            else:
+                fixed_params[name] = values[0]
+
+        if 'class_weight' in sub_grid:
+            sub_grid['class_weight'] = [_canonical_class_weight(v)
+                                        for v in sub_grid['class_weight']]
+
+        if 'min_weight_fraction_leaf' in sub_grid:
+            values = sub_grid['min_weight_fraction_leaf']
+            drop('min_weight_fraction_leaf', [v for v in values if v>=0.5])
+            sub_grid['min_weight_fraction_leaf'] = [v for v in values if v<0.5]
+
+        if 'max_features' in sub_grid and n_features is not None:
+            values = sub_grid['max_features']
+            resolved = [_canonical_max_features(v, n_features) for v in values]
+            drop('max_features', [v for v, r in zip(values, resolved) if r is None])
+            sub_grid['max_features'] = [r for r in resolved if r is not None]
+
+        for name in sub_grid:
+            sub_grid[name] = _unique(sub_grid[name])
+
+        if any(len(values)==0 for values in sub_grid.values()):
+            continue
+
+        if 'min_samples_split' in sub_grid and 'min_samples_leaf' in sub_grid:
+            splits = sorted(sub_grid['min_samples_split'])
+            for leaf in sorted(sub_grid['min_samples_leaf']):
+                bound = 2*leaf if isinstance(leaf, (int, np.integer)) else None
+                if bound is None or not all(isinstance(s, (int, np.integer)) for s in splits):
+                    leaf_splits = splits
+                else:
+                    leaf_splits = [s for s in splits if s<=bound][:1] +\
+                                  [s for s in splits if s>bound]
+                grid.append(dict(sub_grid,
+                                 min_samples_leaf=[leaf],
+                                 min_samples_split=leaf_splits))
+        else:
+            grid.append(sub_grid)
+
+    def grid_size(grids):
+        return sum(int(np.prod([len(v) for v in g.values()], dtype=np.float64))
+                   for g in grids)
+
+    original_size = grid_size(param_grid)
+    normalized_size = grid_size(grid)
+    report = {'original_size': original_size,
+              'normalized_size': normalized_size,
+              'reduction': float(original_size)/max(normalized_size, 1),
+              'fixed_params': fixed_params,
+              'dropped_values': dict((k, _unique(v)) for k, v in dropped.items())}
+
+    return grid, fixed_params, report
+
+
+####Budgeted hyperparameter search
+
+def _stratified_subsample(indices, y, n_samples, random_state):
+    '''
+        Draws a class-stratified subsample of size n_samples from indices.
+    '''
+
+    if n_samples>=len(indices):
+        return indices
+    n_classes = len(np.unique(y[indices]))
+    n_samples = max(n_samples, n_classes)
+    if len(indices)-n_samples<n_classes:
+        return indices
+    splitter = StratifiedShuffleSplit(n_splits=1,
+                                      train_size=n_samples,
+                                      test_size=len(indices)-n_samples,
+                                      random_state=random_state)
+    keep, _ = next(splitter.split(np.zeros(len(indices)), y[indices]))
+
+    return indices[np.sort(keep)]
+
+
+def _fit_and_score_path(estimator, params, x, y, train, test, scorers, n_estimators):
+    '''
+        Grows one forest on a train fold through the ascending n_estimators
+        checkpoints with warm_start, scoring every scorer at each checkpoint.
+        Each checkpoint only fits the trees added since the previous one, and
+        with a fixed random_state the trees are the same as those of a forest
+        fitted from scratch. A failed fit scores NaN for the checkpoints left.
+
+        Returns:
+            path (list): (scores, fit_time) for each checkpoint, where
+                fit_time is the cumulative time spent growing the forest.
+    '''
+
+    path = []
+    fit_time = 0.0
+    try:
+        model = clone(estimator).set_params(**params)
+        if len(n_estimators)>1:
+            model.set_params(warm_start=True)
+        x_train, y_train = x[train], y[train]
+        x_test, y_test = x[test], y[test]
+        for n in n_estimators:
+            if n is not None:
+                model.set_params(n_estimators=n)
+            start = time.time()
+            model.fit(x_train, y_train)
+            fit_time += time.time() - start
+            scores = dict((name, scorer(model, x_test, y_test))
+                          for name, scorer in scorers.items())
+            path.append((scores, fit_time))
+    except (ValueError, TypeError):
+        nan_scores = dict((name, np.nan) for name in scorers)
+        path.extend([(nan_scores, fit_time)]*(len(n_estimators)-len(path)))
+
+    return path
+
+
+def _group_tree_sweeps(estimator, candidates, tasks):
+    '''
+        Groups (candidate, fold) tasks whose candidates differ only in
+        n_estimators, ordered by tree count, so each group can be grown as a
+        single warm-started forest. Estimators without warm_start keep one
+        task per group.
+    '''
+
+    if 'warm_start' not in estimator.get_params():
+        return [[task] for task in tasks]
+
+    groups = {}
+    order = []
+    for i, j in tasks:
+        params = candidates[i]
+        if not isinstance(params.get('n_estimators'), (int, np.integer)):
+            key = (i, j)
+        else:
+            rest = dict((k, v) for k, v in params.items() if k!='n_estimators')
+            key = (json.dumps(rest, sort_keys=True, default=repr), j)
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append((i, j))
+
+    return [sorted(groups[group_key], key=lambda task: candidates[task[0]].get('n_estimators'))
+            for group_key in order]
+
+
+def _expand_tree_sweeps(configs):
+    '''
+        Expands each configuration whose n_estimators is a tuple of tree
+        counts into one candidate per count; other configurations are kept
+        as they are.
+
+        Returns:
+            candidates (list): The candidate parameter dicts.
+            owners (list): The index in configs of each candidate.
+    '''
+
+    candidates = []
+    owners = []
+    for k, params in enumerate(configs):
+        sweep = params.get('n_estimators')
+        if isinstance(sweep, tuple):
+            candidates.extend(dict(params, n_estimators=n) for n in sweep)
+            owners.extend([k]*len(sweep))
+        else:
+            candidates.append(params)
+            owners.append(k)
+
+    return candidates, owners
+
+
+def _hash_arrays(*arrays):
+    sha = hashlib.sha1()
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        sha.update(str(arr.dtype).encode('utf-8'))
+        sha.update(str(arr.shape).encode('utf-8'))
+        sha.update(arr.view(np.uint8))
+
+    return sha.hexdigest()
+
+
+def _fit_key(params, fold_hash, tag):
+    '''
+        Checkpoint key for one (params, fold) fit.
+    '''
+
+    params_str = json.dumps(params, sort_keys=True, default=repr)
+
+    return hashlib.sha1((params_str+'|'+fold_hash+'|'+str(tag)).encode('utf-8')).hexdigest()
+
+
+def _open_checkpoint(checkpoint_dir, x, y):
+    '''
+        Memory-maps the training matrix and labels from checkpoint_dir (saving
+        them first if needed) and loads the fits completed by earlier runs.
+        A checkpoint of a search over a different training set is discarded.
+
+        Returns:
+            x (memmap), y (memmap), results_path (str), done (dict)
+    '''
+
+    if not os.path.isdir(checkpoint_dir):
+        os.makedirs(checkpoint_dir)
+
+    data_hash = _hash_arrays(x, y)
+    meta_path = os.path.join(checkpoint_dir, 'meta.json')
+    x_path = os.path.join(checkpoint_dir, 'x_train.npy')
+    y_path = os.path.join(checkpoint_dir, 'y_train.npy')
+    results_path = os.path.join(checkpoint_dir, 'results.jsonl')
+
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['data_hash']!=data_hash:
+            ##e.g. the data was refreshed; the old fits do not apply. The
+            ##results go before the meta file, so an interrupted discard is
+            ##redone on the next run rather than leaving stale fits behind
+            print('%s holds a search over a different training set; starting over'
+                  % checkpoint_dir)
+            for path in (results_path, meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+    if not os.path.exists(meta_path):
+        np.save(x_path, np.ascontiguousarray(x))
+        np.save(y_path, np.ascontiguousarray(y))
+        with open(meta_path, 'w') as f:
+            json.dump({'data_hash': data_hash}, f)
+
+    done = {}
+    if os.path.exists(results_path):
+        with open(results_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a write cut short by an interruption
+                done[record['key']] = record
+
+    return np.load(x_path, mmap_mode='r'), np.load(y_path, mmap_mode='r'), results_path, done
+
+
+def _run_fits(estimator, candidates, x, y, folds, scorers, done, results_path=None,
+              tag='', n_jobs=1, max_fits=None, deadline=None):
+    '''
+        Fits and scores every (candidate, fold) pair that is not already in
+        done, in parallel batches. Each finished batch is appended to
+        results_path, so an interrupted run loses at most one batch.
+
+        max_fits counts forests grown: a sweep over n_estimators grown with
+        warm_start on one fold is a single fit. Fits already in done count
+        against it, so a restarted search does not get a fresh budget.
+
+        Returns:
+            rows (list): One dict per candidate whose folds are all complete.
+            n_fits (int): The number of fits spent on these pairs, new and
+                reused.
+    '''
+
+    fold_hashes = [_hash_arrays(train, test) for train, test in folds]
+    keys = [[_fit_key(params, fold_hash, tag) for fold_hash in fold_hashes]
+            for params in candidates]
+
+    pairs = [(i, j) for i in range(len(candidates)) for j in range(len(folds))]
+    groups = _group_tree_sweeps(estimator, candidates, pairs)
+    tasks = [[(i, j) for i, j in group if keys[i][j] not in done] for group in groups]
+    n_reused = sum(1 for group in tasks if not group)
+    tasks = [group for group in tasks if group]
+    if max_fits is not None:
+        tasks = tasks[:max(0, max_fits-n_reused)]
+
+    batch_size = 4*effective_n_jobs(n_jobs)
+    n_fits = n_reused
+    for start in range(0, len(tasks), batch_size):
+        if deadline is not None and time.time()>deadline:
+            break
+        batch = tasks[start:start+batch_size]
+        out = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_and_score_path)(estimator, candidates[group[0][0]], x, y,
+                                         folds[group[0][1]][0], folds[group[0][1]][1],
+                                         scorers, [candidates[i].get('n_estimators')
+                                                   for i, _ in group])
+            for group in batch)
+        records = []
+        for group, path in zip(batch, out):
+            for (i, j), (scores, fit_time) in zip(group, path):
+                record = {'key': keys[i][j], 'fold': j, 'scores': scores,
+                          'fit_time': fit_time}
+                done[record['key']] = record
+                records.append(record)
+        if results_path is not None:
+            with open(results_path, 'a') as f:
+                for record in records:
+                    f.write(json.dumps(record)+'\n')
+                f.flush()
+                os.fsync(f.fileno())
+        n_fits += len(batch)
+
+    rows = []
+    for params, candidate_keys in zip(candidates, keys):
+        if not all(key in done for key in candidate_keys):
+            continue
+        records = [done[key] for key in candidate_keys]
+        row = {'params': params,
+               'mean_fit_time': np.mean([r['fit_time'] for r in records])}
+        for name in scorers:
+            fold_scores = [r['scores'][name] for r in records]
+            row['mean_test_'+name] = np.mean(fold_scores)
+            row['std_test_'+name] = np.std(fold_scores)
+        rows.append(row)
+
+    return rows, n_fits
+
+
+def _prepare_search(x, y, scoring, checkpoint_dir):
+    if isinstance(scoring, str):
+        scoring = [scoring]
+    scorers = dict((name, get_scorer(name)) for name in scoring)
+
+    if checkpoint_dir is not None:
+        x, y, results_path, done = _open_checkpoint(checkpoint_dir, x, y)
+    else:
+        x, y, results_path, done = np.asarray(x), np.asarray(y), None, {}
+
+    return scoring, scorers, x, y, results_path, done
+
+
+def checkpointed_search(estimator, param_grid, x, y, cv, scoring,
+                        checkpoint_dir, n_jobs=-1, verbose=1):
+    '''
+        Exhaustive search over a parameter grid that scores every fit with
+        several scorers in one pass and can be resumed after an interruption.
+
+        The training matrix is saved once to checkpoint_dir and memory-mapped,
+        so parallel workers share the same pages instead of each receiving a
+        copy of x. Every completed (params, fold) result is appended to
+        checkpoint_dir/results.jsonl; rerunning with the same directory skips
+        the fits that are already there.
+
+        Args:
+            estimator (object): An unfitted sklearn estimator.
+            param_grid (dict or list): A grid in the GridSearchCV format.
+            x (float64): The encoded training set.
+            y (int64): The training labels.
+            cv (object): A CV splitter, e.g. StratifiedShuffleSplit.
+            scoring (list): sklearn scorer names; the first one ranks.
+            checkpoint_dir (str): The directory holding the memory-mapped
+                training data and the completed fits.
+            n_jobs (int): The number of parallel fits.
+            verbose (int): Prints progress if > 0.
+        Returns:
+            best_params (dict): The best configuration by the first scorer.
+            results (DataFrame): One row per configuration with the mean/std
+                of every scorer and its rank.
+    '''
+
+    scoring, scorers, x, y, results_path, done = _prepare_search(x, y, scoring,
+                                                                 checkpoint_dir)
+    folds = list(cv.split(x, y))
+    candidates = list(ParameterGrid(param_grid))
+
+    if verbose>0:
+        print('Fitting %d folds for each of %d candidates, %d fits already done'
+              % (len(folds), len(candidates), len(done)))
+
+    rows, n_fits = _run_fits(estimator, candidates, x, y, folds, scorers, done,
+                             results_path, n_jobs=n_jobs)
+    results = pd.DataFrame(rows)
+    primary = 'mean_test_'+scoring[0]
+    results['rank_test_'+scoring[0]] = results[primary].rank(ascending=False,
+                                                             method='min')
+
+    return results.loc[results[primary].fillna(-np.inf).idxmax(), 'params'], results
+
+
+def successive_halving_search(estimator, param_grid, x, y, cv, scoring,
+                              max_fits=None, max_seconds=None, eta=3,
+                              resource='n_samples', min_resource=None,
+                              max_resource=None, random_state=0,
+                              checkpoint_dir=None, n_jobs=1, verbose=1):
+    '''
+        Budgeted successive-halving search over a parameter grid.
+
+        A random sample of the grid is evaluated with a small resource (a
+        stratified subsample of each training fold, or a small forest); only
+        the best 1/eta of the candidates are promoted to the next rung, where
+        the resource is multiplied by eta. Every fit is scored with all of the
+        scorers in one pass; candidates are ranked by the first one.
+
+        With resource='n_samples' and a warm_start estimator, the sample is
+        drawn over the other parameters and every sampled configuration is
+        swept over all of the grid's n_estimators values. The sweep is grown
+        once per fold as a single warm-started forest, so the whole tree-count
+        curve costs about as much as its largest forest and counts as one fit.
+        Sweeps are promoted whole, ranked by their best tree count.
+
+        Args:
+            estimator (object): An unfitted sklearn estimator.
+            param_grid (dict or list): A grid in the GridSearchCV format.
+            x (float64): The encoded training set.
+            y (int64): The training labels.
+            cv (object): A CV splitter, e.g. StratifiedShuffleSplit.
+            scoring (list): sklearn scorer names, e.g. ['precision_macro',
+                'recall_macro']; the first one is used for ranking.
+            max_fits (int): The total number of fits (forests grown) the
+                search may spend, including fits reused from checkpoint_dir,
+                so the budget is shared by all the runs of a resumed search.
+            max_seconds (float): A wall-clock budget for this run; no new
+                batch of fits is started once it is exhausted.
+            eta (int): The halving factor.
+            resource (str): 'n_samples' or 'n_estimators'.
+            min_resource (int): The resource given to the first rung.
+            max_resource (int): The resource given to the last rung.
+            random_state (int): Seed for candidate sampling and subsampling.
+            checkpoint_dir (str): If given, the training data is memory-mapped
+                from and every fit checkpointed to this directory (see
+                checkpointed_search); restarted searches reuse finished fits.
+            n_jobs (int): The number of parallel fits.
+            verbose (int): Prints a line per rung if > 0.
+        Returns:
+            best_params (dict): The best configuration of the deepest rung
+                that was completed.
+            results (DataFrame): One row per evaluated (rung, candidate) with
+                the mean/std of every scorer.
+    '''
+
+    if max_fits is None and max_seconds is None:
+        raise ValueError('A max_fits or max_seconds budget is required')
+    if resource not in ('n_samples', 'n_estimators'):
+        raise ValueError("resource must be 'n_samples' or 'n_estimators'")
+
+    scoring, scorers, x, y, results_path, done = _prepare_search(x, y, scoring,
+                                                                 checkpoint_dir)
+    primary = scoring[0]
+    splits = list(cv.split(x, y))
+    n_splits = len(splits)
+
+    if isinstance(param_grid, dict):
+        param_grid = [param_grid]
+    if resource=='n_estimators':
+        param_grid = [dict((k, v) for k, v in grid.items() if k!='n_estimators')
+                      for grid in param_grid]
+    elif 'warm_start' in estimator.get_params():
+        ##Random points of a large grid almost never differ only in
+        ##n_estimators, so the tree counts are left out of the sample and
+        ##each sampled configuration carries the whole sweep as a tuple
+        param_grid = [dict(grid, n_estimators=[tuple(sorted(grid['n_estimators']))])
+                      if len(grid.get('n_estimators', []))>1 else grid
+                      for grid in param_grid]
+    grid = ParameterGrid(param_grid)
+
+    if max_resource is None:
+        if resource=='n_samples':
+            max_resource = min(len(train) for train, _ in splits)
+        else:
+            max_resource = 100
+    if min_resource is None:
+        if resource=='n_samples':
+            min_resource = max(10*len(np.unique(y)), max_resource//eta**3)
+        else:
+            min_resource = max(1, max_resource//eta**3)
+    n_rungs = 1 + int(math.floor(math.log(float(max_resource)/min_resource, eta)))
+
+    rung_weights = sum(eta**-float(i) for i in range(n_rungs))
+    if max_fits is not None:
+        n_candidates = int(max_fits/(n_splits*rung_weights))
+    else:
+        n_candidates = eta**n_rungs
+    n_candidates = max(1, min(n_candidates, len(grid)))
+
+    rng = np.random.RandomState(random_state)
+    picks = sample_without_replacement(len(grid), n_candidates, random_state=rng)
+    configs = [grid[int(i)] for i in picks]
+
+    start = time.time()
+    deadline = start + max_seconds if max_seconds is not None else None
+    n_fits = 0
+    rows = []
+    best_params = None
+
+    for rung in range(n_rungs):
+        if rung==n_rungs-1:
+            res = max_resource
+        else:
+            res = min(max_resource, int(min_resource*eta**rung))
+
+        candidates, owners = _expand_tree_sweeps(configs)
+        if resource=='n_samples':
+            folds = [(_stratified_subsample(train, y, res, random_state), test)
+                     for train, test in splits]
+        else:
+            folds = splits
+            candidates = [dict(params, n_estimators=res) for params in candidates]
+
+        remaining = max_fits - n_fits if max_fits is not None else None
+        rung_rows, rung_fits = _run_fits(estimator, candidates, x, y, folds,
+                                         scorers, done, results_path,
+                                         tag='%s=%d' % (resource, res),
+                                         n_jobs=n_jobs, max_fits=remaining,
+                                         deadline=deadline)
+        n_fits += rung_fits
+        for row in rung_rows:
+            row.update(rung=rung, resource=res)
+        rows.extend(rung_rows)
+
+        complete = len(rung_rows)==len(candidates)
+        if not rung_rows or (not complete and best_params is not None):
+            break
+
+        ranked = sorted(rung_rows,
+                        key=lambda r: -np.nan_to_num(r['mean_test_'+primary]))
+        best_params = ranked[0]['params']
+
+        if verbose>0:
+            print('Rung %d: %d candidates with %s=%d, best %s=%0.3f (%d fits, %0.0fs)'
+                  % (rung, len(rung_rows), resource, res, primary,
+                     ranked[0]['mean_test_'+primary], n_fits, time.time()-start))
+
+        if not complete:
+            break
+        owner_of = dict((json.dumps(params, sort_keys=True, default=repr), owner)
+                        for params, owner in zip(candidates, owners))
+        promoted = []
+        for row in ranked:
+            owner = owner_of[json.dumps(row['params'], sort_keys=True, default=repr)]
+            if owner not in promoted:
+                promoted.append(owner)
+        n_keep = max(1, int(math.ceil(len(configs)/float(eta))))
+        configs = [configs[i] for i in promoted[:n_keep]]
+
+    results = pd.DataFrame(rows)
+
+    return best_params, results
+
+
+####Batch scoring
+
+if numba is not None:
+    @numba.njit(parallel=True)
+    def _sum_leaf_values(x, left, feature, threshold, right, value, roots, out):
+        '''
+            Compiled traversal: adds the leaf value reached in every tree to
+            out. Blocks of samples run in parallel, and each block walks one
+            tree at a time so that tree's nodes stay in cache.
+        '''
+
+        block = 256
+        n_samples = x.shape[0]
+        for b in numba.prange((n_samples+block-1)//block):
+            stop = min(n_samples, (b+1)*block)
+            for t in range(roots.shape[0]):
+                for i in range(b*block, stop):
+                    node = roots[t]
+                    while left[node]!=node:
+                        if x[i, feature[node]]<=threshold[node]:
+                            node = left[node]
+                        else:
+                            node = right[node]
+                    for c in range(value.shape[1]):
+                        out[i, c] += value[node, c]
+
+
+class FlatForest(object):
+    '''
+        A fitted random forest flattened into contiguous NumPy node arrays for
+        vectorized batch scoring.
+
+        The nodes of every tree are concatenated into one set of arrays. Leaf
+        nodes point to themselves, so a batch of samples can be pushed down
+        all trees at once for max_depth steps without any per-sample or
+        per-tree Python loop. When numba is installed the traversal is
+        compiled and runs across all cores instead. Probabilities match the
+        forest's predict_proba.
+
+        Args:
+            left (int32): Left child of each node (the node itself for leaves).
+            right (int32): Right child of each node (the node itself for leaves).
+            feature (int32): The feature tested at each node (0 for leaves).
+            threshold (float64): The split threshold at each node.
+            value (float64): The class probabilities at each node.
+            roots (int32): The root node of each tree.
+            classes (array): The class labels.
+            max_depth (int): The depth of the deepest tree.
+    '''
+
+    def __init__(self, left, right, feature, threshold, value, roots, classes,
+                 max_depth):
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_forest(cls, forest):
+        '''
+            Flattens a fitted sklearn forest classifier.
+
+            Args:
+                forest (RandomForestClassifier): The fitted model.
+            Returns:
+                flat (FlatForest)
+        '''
+
+        left, right, feature, threshold, value, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left==-1
+            left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            counts = tree.value[:, 0, :]
+            value.append(counts/counts.sum(axis=1, keepdims=True))
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(np.concatenate(left).astype(np.int32),
+                   np.concatenate(right).astype(np.int32),
+                   np.concatenate(feature).astype(np.int32),
+                   np.concatenate(threshold).astype(np.float64),
+                   np.concatenate(value).astype(np.float64),
+                   np.array(roots, dtype=np.int32),
+                   np.asarray(forest.classes_),
+                   max_depth)
+
+    def apply(self, x):
+        '''
+            Returns:
+                leaves (int32): The leaf reached in every tree, (n_samples,
+                    n_trees).
+        '''
+
+        x = np.asarray(x, dtype=np.float32)
+        n_samples, n_features = x.shape
+        n_trees = len(self.roots)
+        flat_x = x.ravel()
+        node = np.tile(self.roots, n_samples)
+        row_offset = np.repeat(np.arange(n_samples)*n_features, n_trees)
+        active = np.arange(len(node))
+
+        ##Only (sample, tree) pairs that have not reached a leaf are advanced,
+        ##so each level costs the number of pairs still descending
+        for _ in range(self.max_depth):
+            current = node[active]
+            descending = self.left[current]!=current
+            active = active[descending]
+            if len(active)==0:
+                break
+            current = current[descending]
+            go_left = flat_x[row_offset[active]+self.feature[current]] <= self.threshold[current]
+            node[active] = np.where(go_left, self.left[current], self.right[current])
+
+        return node.reshape(n_samples, n_trees)
+
+    def predict_proba(self, x, batch_size=10000):
+        '''
+            Scores samples in batches of batch_size to bound memory.
+
+            Args:
+                x (float64): The encoded feature set.
+                batch_size (int): The number of samples pushed down the trees
+                    at once.
+            Returns:
+                proba (float64): The class probabilities, (n_samples, n_classes).
+        '''
+
+        proba = np.zeros((len(x), self.value.shape[1]))
+        for start in range(0, len(x), batch_size):
+            batch = x[start:start+batch_size]
+            if numba is not None:
+                _sum_leaf_values(np.asarray(batch, dtype=np.float32), self.left,
+                                 self.feature, self.threshold, self.right,
+                                 self.value, self.roots, proba[start:start+batch_size])
+            else:
+                leaves = self.apply(batch)
+                proba[start:start+batch_size] = self.value[leaves].sum(axis=1)
+
+        return proba/len(self.roots)
+
+    def predict(self, x, batch_size=10000):
+        return self.classes[np.argmax(self.predict_proba(x, batch_size), axis=1)]
+
+
+def score_pets(flat_forest, df, feature_names, batch_size=10000):
+    '''
+        Encodes a frame of clean pet records with encode_data and scores it.
+
+        Args:
+            flat_forest (FlatForest): The flattened model.
+            df (DataFrame): Clean pet records (the output of the munging step).
+            feature_names (list): The model's feature columns, in training order.
+            batch_size (int): The number of pets scored at once.
+        Returns:
+            proba (DataFrame): The class probabilities, indexed like df.
+    '''
+
+    encoded = encode_data(df[feature_names].copy())
+    proba = flat_forest.predict_proba(np.asarray(encoded[feature_names]), batch_size)
+
+    return pd.DataFrame(proba, index=df.index, columns=flat_forest.classes)
+
+
+####Model artifacts
+
+ARTIFACT_FORMAT = 'petAppeal-flatforest'
+ARTIFACT_VERSION = 1
+_ARTIFACT_ARRAYS = ['left', 'right', 'feature', 'threshold', 'value', 'roots',
+                    'classes']
+
+
+def _publish_artifact(version_dir, path):
+    '''
+        Points the symlink at path to a fully written version directory in a
+        single rename, then removes the versions older than the one it
+        replaced. The replaced version is kept for loaders that resolved the
+        link just before the switch; arrays memory-mapped from any version
+        are never truncated, only unlinked.
+    '''
+
+    parent, name = os.path.split(path)
+    previous = None
+    if os.path.islink(path):
+        previous = os.path.realpath(path)
+    elif os.path.isdir(path):
+        ##An artifact saved before versioned saves, or an empty directory;
+        ##it is moved aside as a version, the one moment without an artifact
+        if os.listdir(path):
+            previous = os.path.join(parent, '%s.%s' % (name, uuid.uuid4().hex[:12]))
+            os.rename(path, previous)
+        else:
+            os.rmdir(path)
+
+    link = version_dir+'.link'
+    os.symlink(os.path.basename(version_dir), link)
+    os.rename(link, path)
+
+    version = re.compile(re.escape(name)+r'\.[0-9a-f]{12}$')
+    keep = set([os.path.realpath(version_dir), previous])
+    for entry in os.listdir(parent or os.curdir):
+        entry_path = os.path.realpath(os.path.join(parent, entry))
+        if version.match(entry) and entry_path not in keep:
+            shutil.rmtree(entry_path, ignore_errors=True)
+
+
+def saveModel(model, path, feature_names, classes=None, compress=False,
+              metadata=None):
+    '''
+        Saves a forest as a directory of raw .npy node arrays plus a JSON
+        header, so the arrays can be memory-mapped by every scoring process
+        instead of unpickled into each one.
+
+        Every save writes a new '<path>.<id>' directory and then switches
+        path, a symlink, over to it, so loaders see either the old artifact
+        or the new one and never a partial write, and arrays that a running
+        process has memory-mapped are never overwritten in place.
+        
+        Args:
+            model (RandomForestClassifier or FlatForest): The fitted model.
+            path (str): The artifact directory.
+            feature_names (list): The model's feature columns, in order.
+            classes (list): Names for the model's classes (e.g., the label
+                encoder classes); defaults to the model's classes.
+            compress (bool): Stores the arrays in one compressed .npz. The
+                artifact is smaller, but has to be read into memory to load.
+            metadata (dict): Optional JSON-serializable information kept in
+                the header (e.g., the drift reference used by update_model).
+        Returns:
+            header (dict): The header written to path/header.json.
+    '''
+    
+    if not isinstance(model, FlatForest):
+        model = FlatForest.from_forest(model)
+    
+    arrays = dict((name, np.ascontiguousarray(getattr(model, name)))
+                  for name in _ARTIFACT_ARRAYS)
+    if classes is not None:
+        arrays['classes'] = np.asarray(classes)
+    if arrays['classes'].dtype==object:
+        arrays['classes'] = arrays['classes'].astype(str)
+    
+    path = os.path.abspath(path.rstrip(os.sep))
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    version_dir = '%s.%s' % (path, uuid.uuid4().hex[:12])
+    os.makedirs(version_dir)
+    
+    if compress:
+        np.savez_compressed(os.path.join(version_dir, 'arrays.npz'), **arrays)
+    else:
+        for name, arr in arrays.items():
+            np.save(os.path.join(version_dir, name+'.npy'), arr)
+    
+    header = {'format': ARTIFACT_FORMAT,
+              'version': ARTIFACT_VERSION,
+              'compressed': bool(compress),
+              'max_depth': model.max_depth,
+              'n_trees': len(model.roots),
+              'n_nodes': len(model.left),
+              'schema': encoder_schema(feature_names),
+              'arrays': dict((name, {'dtype': str(arr.dtype),
+                                     'shape': list(arr.shape)})
+                             for name, arr in arrays.items()),
+              'metadata': metadata or {}}
+    
+    with open(os.path.join(version_dir, 'header.json'), 'w') as f:
+        json.dump(header, f, indent=2, sort_keys=True)
+    _publish_artifact(version_dir, path)
+    
+    return header
+
+
+def loadModel(path, feature_names=None, mmap=True):
+    '''
+        Loads a model saved with saveModel and checks it against the current
+        encoder.
+        
+        Args:
+            path (str): The artifact directory.
+            feature_names (list): If given, the feature columns the caller
+                will score with; they must match the artifact's.
+            mmap (bool): Memory-maps uncompressed arrays read-only, so the
+                pages are shared by every process that loads the artifact.
+        Returns:
+            model (FlatForest): The model, ready for predict_proba.
+            header (dict): The artifact header, including the feature order
+                under header['schema']['features'].
+    '''
+    
+    ##Read everything from the version the link points to now, even if a
+    ##save switches it while loading
+    path = os.path.realpath(path)
+    with open(os.path.join(path, 'header.json')) as f:
+        header = json.load(f)
+    
+    if header.get('format')!=ARTIFACT_FORMAT:
+        raise ValueError('%s is not a %s artifact' % (path, ARTIFACT_FORMAT))
+    if header['version']>ARTIFACT_VERSION:
+        raise ValueError('%s is artifact version %d; this code reads up to %d'
+                         % (path, header['version'], ARTIFACT_VERSION))
+    
+    features = header['schema']['features']
+    if feature_names is not None and list(feature_names)!=features:
+        raise ValueError('The artifact was trained on features %s, not %s'
+                         % (features, list(feature_names)))
+    if header['schema']!=json.loads(json.dumps(encoder_schema(features))):
+        raise ValueError('The artifact was trained with a different encode_data '
+                         'category order: %s' % header['schema']['categories'])
+    
+    if header['compressed']:
+        with np.load(os.path.join(path, 'arrays.npz')) as npz:
+            arrays = dict((name, npz[name]) for name in _ARTIFACT_ARRAYS)
+    else:
+        mode = 'r' if mmap else None
+        arrays = dict((name, np.load(os.path.join(path, name+'.npy'), mmap_mode=mode))
+                      for name in _ARTIFACT_ARRAYS)
+    
+    for name, spec in header['arrays'].items():
+        if list(arrays[name].shape)!=spec['shape']:
+            raise ValueError('%s: %s has shape %s, expected %s'
+                             % (path, name, arrays[name].shape, spec['shape']))
+    
+    model = FlatForest(arrays['left'], arrays['right'], arrays['feature'],
+                       arrays['threshold'], arrays['value'], arrays['roots'],
+                       arrays['classes'], header['max_depth'])
+    
+    return model, header
+
+
+####Model benchmarking
+
+
+def benchmark_models(models, x, y, cv, scoring=('precision_macro', 'recall_macro'),
+                     n_latency=200):
+    '''
+        Compares models on the same CV splits: fit time, batch and
+        single-row predict latency, memory and the given scores.
+        
+        Args:
+            models (dict): {name: unfitted sklearn estimator}
+            x (float64): The encoded feature set.
+            y (int64): The labels.
+            cv (object): A CV splitter, e.g. StratifiedShuffleSplit; every
+                model sees exactly the same splits.
+            scoring (list): sklearn scorer names.
+            n_latency (int): The number of single-row predictions timed.
+        Returns:
+            results (DataFrame): One row per model and fold with fit_seconds,
+                fit_peak_mb (Python/NumPy allocations traced during the fit,
+                or the resident memory growth without tracemalloc),
+                model_mb (the pickled size), predict_us_per_row (batch),
+                predict_single_ms_p50/p99 and each score.
+    '''
+    
+    x = np.asarray(x)
+    y = np.asarray(y)
+    scorers = dict((name, get_scorer(name)) for name in scoring)
+    splits = list(cv.split(x, y))
+    rows = []
+    
+    for name, estimator in sorted(models.items()):
+        for fold, (train, test) in enumerate(splits):
+            model = clone(estimator)
+            _, fit_seconds, fit_peak_mb = measure_call(model.fit, x[train], y[train])
+            _, predict_seconds, _ = measure_call(model.predict_proba, x[test])
+            
+            single = []
+            for i in test[:n_latency]:
+                start = time.time()
+                model.predict_proba(x[i:i+1])
+                single.append((time.time() - start)*1e3)
+            
+            row = {'model': name, 'fold': fold,
+                   'fit_seconds': fit_seconds,
+                   'fit_peak_mb': fit_peak_mb,
+                   'model_mb': len(pickle.dumps(model, protocol=2))/1e6,
+                   'predict_us_per_row': predict_seconds/len(test)*1e6,
+                   'predict_single_ms_p50': np.percentile(single, 50),
+                   'predict_single_ms_p99': np.percentile(single, 99)}
+            for score_name, scorer in scorers.items():
+                row[score_name] = scorer(model, x[test], y[test])
+            rows.append(row)
+    
+    return pd.DataFrame(rows)
+
+
+####Permutation importance
+
+def _permuted_scores(model, scorer, x, y, jobs):
+    '''
+        Scores the model once per (feature, seed) job with that feature's
+        column shuffled. The matrix is copied once per task; each column is
+        put back before the next job.
+    '''
+    
+    x_permuted = np.array(x)
+    scores = []
+    for feature, seed in jobs:
+        column = x[:, feature]
+        rng = np.random.RandomState(seed)
+        x_permuted[:, feature] = column[rng.permutation(len(column))]
+        scores.append(scorer(model, x_permuted, y))
+        x_permuted[:, feature] = column
+    
+    return scores
+
+
+def permutation_importance(model, x, y, scoring='precision_macro', n_repeats=10,
+                           n_jobs=-1, random_state=0, cache_dir=None):
+    '''
+        Computes permutation importances: the drop in score when a single
+        feature is shuffled, which, unlike impurity importances, is not biased
+        towards high-cardinality features.
+        
+        Every (feature, repeat) pair is a separate job; the jobs are split
+        into a few tasks per worker, each copying the matrix once, and run in
+        parallel with the model predicting on a single core, so the workers
+        do not oversubscribe the machine. If cache_dir is given, results are
+        stored under a hash of the fitted model, the data and the settings,
+        so re-plotting reuses them instead of recomputing.
+        
+        Args:
+            model (object): A fitted sklearn estimator.
+            x (float64): The encoded evaluation set (e.g., the test set).
+            y (int64): The evaluation labels.
+            scoring (str): An sklearn scorer name.
+            n_repeats (int): The number of shuffles per feature.
+            n_jobs (int): The number of parallel jobs.
+            random_state (int): Seed for the shuffles.
+            cache_dir (str): An optional directory for cached results.
+        Returns:
+            importances_mean (float64): The mean score drop per feature.
+            importances_std (float64): The std of the drop per feature.
+            importances (float64): Every drop, (n_features, n_repeats).
+    '''
+    
+    x = np.asarray(x)
+    y = np.asarray(y)
+    
+    cache_path = None
+    if cache_dir is not None:
+        model_hash = hashlib.sha1(pickle.dumps(model, protocol=2)).hexdigest()
+        settings = '%s|%d|%s' % (scoring, n_repeats, random_state)
+        key = hashlib.sha1((model_hash+_hash_arrays(x, y)+settings).encode('utf-8')).hexdigest()
+        cache_path = os.path.join(cache_dir, 'permutation_importance_%s.npy' % key)
+        if os.path.exists(cache_path):
+            importances = np.load(cache_path)
+            return importances.mean(axis=1), importances.std(axis=1), importances
+    
+    scorer = get_scorer(scoring)
+    baseline = scorer(model, x, y)
+    n_features = x.shape[1]
+    seeds = np.random.RandomState(random_state).randint(np.iinfo(np.int32).max,
+                                                        size=(n_features, n_repeats))
+    
+    n_workers = effective_n_jobs(n_jobs)
+    if n_workers>1 and 'n_jobs' in getattr(model, 'get_params', dict)():
+        ##a copy, so the caller's model keeps its n_jobs
+        model = copy.copy(model)
+        model.set_params(n_jobs=1)
+    jobs = [(j, seeds[j, r]) for j in range(n_features) for r in range(n_repeats)]
+    n_tasks = min(len(jobs), 4*n_workers)
+    tasks = [jobs[i*len(jobs)//n_tasks:(i+1)*len(jobs)//n_tasks] for i in range(n_tasks)]
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_permuted_scores)(model, scorer, x, y, task) for task in tasks)
+    importances = baseline - np.array(sum(scores, [])).reshape(n_features, n_repeats)
+    
+    if cache_path is not None:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        np.save(cache_path, importances)
+    
+    return importances.mean(axis=1), importances.std(axis=1), importances
+
+
+####Incremental updates
+
+def merge_forests(base, new, max_trees=None):
+    '''
+        Appends the trees of one flattened forest to another. The merged
+        forest averages over all trees, so new trees weigh in proportion to
+        their number.
+        
+        Args:
+            base (FlatForest): The current model.
+            new (FlatForest): Trees trained on new records; its class
+                columns must follow base.classes.
+            max_trees (int): If given, the oldest trees are dropped so that
+                at most max_trees remain.
+        Returns:
+            merged (FlatForest)
+    '''
+    
+    offset = len(base.left)
+    merged = FlatForest(np.concatenate([base.left, new.left+offset]),
+                        np.concatenate([base.right, new.right+offset]),
+                        np.concatenate([base.feature, new.feature]),
+                        np.concatenate([base.threshold, new.threshold]),
+                        np.concatenate([base.value, new.value]),
+                        np.concatenate([base.roots, new.roots+offset]),
+                        np.asarray(base.classes),
+                        max(base.max_depth, new.max_depth))
+    
+    if max_trees is not None and len(merged.roots)>max_trees:
+        first = merged.roots[len(merged.roots)-max_trees]
+        merged = FlatForest(merged.left[first:]-first, merged.right[first:]-first,
+                            merged.feature[first:], merged.threshold[first:],
+                            merged.value[first:],
+                            merged.roots[len(merged.roots)-max_trees:]-first,
+                            merged.classes, merged.max_depth)
+    
+    return merged
+
+
+def feature_reference(x, feature_names, n_bins=10):
+    '''
+        Summarizes the distribution of each encoded feature for later drift
+        checks: the share of every category code for encode_data columns,
+        and the share per training-set decile for numerical columns.
+        
+        Args:
+            x (float64): The encoded training set.
+            feature_names (list): The feature columns of x.
+            n_bins (int): The number of quantile bins for numerical columns.
+        Returns:
+            reference (dict): A JSON-serializable summary per feature.
+    '''
+    
+    x = np.asarray(x, dtype=np.float64)
+    reference = {}
+    for j, name in enumerate(feature_names):
+        col = x[:, j][~np.isnan(x[:, j])]
+        if name in ENCODING:
+            spec = {'values': list(range(-1, len(ENCODING[name])))}
+        else:
+            edges = np.percentile(col, np.linspace(0, 100, n_bins+1)[1:-1])
+            spec = {'edges': np.unique(edges).tolist()}
+        spec['fractions'] = _bin_fractions(spec, col).tolist()
+        reference[name] = spec
+    
+    return reference
+
+
+def _bin_fractions(spec, col):
+    if 'values' in spec:
+        counts = np.array([(col==v).sum() for v in spec['values']], dtype=np.float64)
+    else:
+        bins = np.searchsorted(np.asarray(spec['edges']), col, side='right')
+        counts = np.bincount(bins, minlength=len(spec['edges'])+1).astype(np.float64)
+    
+    return counts/max(counts.sum(), 1)
+
+
+def drift_report(reference, x, feature_names):
+    '''
+        Measures how far new records have drifted from the training data
+        with the population stability index (PSI) of each feature; as a rule
+        of thumb, below 0.1 is stable and above 0.25 is a significant shift.
+        
+        Args:
+            reference (dict): The output of feature_reference.
+            x (float64): The encoded new records.
+            feature_names (list): The feature columns of x.
+        Returns:
+            drift (Series): The PSI per feature, largest first.
+    '''
+    
+    x = np.asarray(x, dtype=np.float64)
+    psi = {}
+    for j, name in enumerate(feature_names):
+        col = x[:, j][~np.isnan(x[:, j])]
+        expected = np.clip(np.asarray(reference[name]['fractions']), 1e-4, None)
+        actual = np.clip(_bin_fractions(reference[name], col), 1e-4, None)
+        psi[name] = float(np.sum((actual-expected)*np.log(actual/expected)))
+    
+    return pd.Series(psi).sort_values(ascending=False)
+
+
+def update_model(path, x_new, y_new, forest_params=None, n_new_trees=20,
+                 max_trees=None, psi_threshold=0.25, max_precision_drop=0.05,
+                 metadata=None, strata=None, random_state=0):
+    '''
+        Updates a saved forest from new records only: trees trained on the
+        new records are appended to the artifact, unless the records have
+        drifted so far that a full retrain is needed instead.
+        
+        A full retrain is requested when any feature's PSI against the
+        training reference exceeds psi_threshold, or when the current
+        model's macro precision on the new records has fallen more than
+        max_precision_drop below the precision recorded at training time.
+        Precision depends on the base rate, so like the balanced test split
+        it is compared with, it is measured on the new records down-sampled
+        with balanced_indices; it is skipped if they hold a single class.
+        
+        The updated artifact replaces the old one with saveModel's symlink
+        switch, so loaders always find either version.
+        
+        Args:
+            path (str): The artifact saved by saveModel, with 'reference' and
+                'precision_macro' in its metadata.
+            x_new (float64): The encoded new records.
+            y_new (array): Their labels, named like the artifact's classes.
+            forest_params (dict): RandomForestClassifier parameters for the
+                new trees (e.g., the tuned parameters from script 5).
+            n_new_trees (int): The number of trees added per update.
+            max_trees (int): Drops the oldest trees beyond this many.
+            psi_threshold (float): The PSI that triggers a full retrain.
+            max_precision_drop (float): The precision drop that triggers a
+                full retrain.
+            metadata (dict): Extra metadata to record in the updated header.
+            strata (array): The groups the training data was balanced within
+                (script 5 uses state), one per new record.
+            random_state (int): Seed for the down-sampling.
+        Returns:
+            decision (dict): 'action' ('updated' or 'retrain'), the 'drift'
+                Series, and the 'precision_macro' of the current model on the
+                balanced new records (NaN if they hold a single class) next
+                to the 'reference_precision'.
+    '''
+    
+    model, header = loadModel(path)
+    features = header['schema']['features']
+    reference = header['metadata']['reference']
+    
+    x_new = np.asarray(x_new, dtype=np.float64)
+    class_codes = dict((str(label), code) for code, label in enumerate(model.classes))
+    try:
+        y_codes = np.array([class_codes[str(label)] for label in y_new])
+    except KeyError as e:
+        raise ValueError('Label %s is not one of the model classes %s'
+                         % (e, list(model.classes)))
+    
+    drift = drift_report(reference, x_new, features)
+    precision = np.nan
+    if len(np.unique(y_codes))>1:
+        ##max_ratio=1 always balances; balance_check left the training data as
+        ##it was only when it was already close to even
+        balanced = balanced_indices(y_codes, strata=strata, max_ratio=1,
+                                    random_state=random_state)
+        y_pred = np.argmax(model.predict_proba(x_new[balanced]), axis=1)
+        precision = precision_score(y_codes[balanced], y_pred, average='macro')
+    reference_precision = header['metadata']['precision_macro']
+    decision = {'drift': drift,
+                'precision_macro': precision,
+                'reference_precision': reference_precision}
+    
+    if drift.max()>psi_threshold or reference_precision-precision>max_precision_drop:
+        decision['action'] = 'retrain'
+        return decision
+    
+    params = dict(forest_params or {}, n_estimators=n_new_trees, warm_start=False)
+    new_forest = RandomForestClassifier(**params).fit(x_new, y_codes)
+    new_trees = FlatForest.from_forest(new_forest)
+    ##Trees only see the classes present in the new records; align their
+    ##value columns with the model's classes
+    value = np.zeros((len(new_trees.value), len(model.classes)))
+    value[:, new_forest.classes_] = new_trees.value
+    new_trees.value = value
+    
+    merged = merge_forests(model, new_trees, max_trees=max_trees)
+    updated_metadata = dict(header['metadata'], **(metadata or {}))
+    updated_metadata['n_updates'] = updated_metadata.get('n_updates', 0) + 1
+    
+    ##A new version directory, switched in with one rename (see saveModel);
+    ##processes that memory-mapped the old arrays are not disturbed
+    saveModel(merged, path, features, compress=header['compressed'],
+              metadata=updated_metadata)
+    
+    decision['action'] = 'updated'
+    return decision
+
+
+instrumentation.wrap_functions(globals())
@@ -0,0 +1,240 @@
+from __future__ import absolute_import
+import io
+import os
+import re
+import time
+import hashlib
+import threading
+from multiprocessing.pool import ThreadPool
+import numpy as np
+import pandas as pd
+from . import instrumentation
+try:
+    from urllib2 import urlopen, HTTPError
+except ImportError:
+    from urllib.request import urlopen
+    from urllib.error import HTTPError
+
+
+####Photo downloads
+
+PHOTO_FEATURES = ['photo_count', 'photos_decoded', 'photo_width', 'photo_height',
+                  'photo_brightness', 'photo_contrast', 'photo_sharpness']
+
+
+def photo_urls(photos):
+    '''
+        Parses one entry of the photos column, a stringified list of URLs,
+        into one URL per photo. Petfinder lists each photo in several sizes
+        that differ only in the query string; the first size listed is kept.
+
+        Args:
+            photos (str): e.g. "['http://photos.petfinder.com/.../1/?width=500']"
+        Returns:
+            urls (list)
+    '''
+
+    urls = []
+    seen = set()
+    if not isinstance(photos, str) and not isinstance(photos, type(u'')):
+        return urls
+    for url in re.findall(r"[^\s'\",\[\]]+", photos):
+        key = url.split('?')[0]
+        if key not in seen:
+            seen.add(key)
+            urls.append(url)
+
+    return urls
+
+
+class PhotoCache(object):
+    '''
+        Downloaded photos kept on disk under <cache_dir>/<sha1[:2]>/<sha1>,
+        keyed by URL, so photos are only fetched once across runs. Photos
+        the server reported as gone are kept as empty files, so they are not
+        requested again either. Other failures (timeouts, refused or
+        unresolvable hosts) leave a <sha1>.failed marker, so runs without
+        network do not wait on every photo again; they are retried once the
+        marker is older than retry_after seconds. Files are written to a
+        temporary name and renamed, so an interrupted download never leaves
+        a partial photo in the cache.
+    '''
+
+    def __init__(self, cache_dir, retry_after=24*60*60):
+        self.cache_dir = cache_dir
+        self.retry_after = retry_after
+
+    def path(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, url):
+        path = self.path(url)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def failed_recently(self, url):
+        try:
+            return time.time() - os.path.getmtime(self.path(url)+'.failed') < self.retry_after
+        except OSError:
+            return False
+
+    def put_failure(self, url):
+        self.put(url, b'', suffix='.failed')
+
+    def put(self, url, data, suffix=''):
+        path = self.path(url) + suffix
+        if not os.path.exists(os.path.dirname(path)):
+            try:
+                os.makedirs(os.path.dirname(path))
+            except OSError:
+                ##another worker created it first
+                pass
+        tmp_path = '%s.%d.tmp' % (path, threading.current_thread().ident)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.rename(tmp_path, path)
+        if not suffix and os.path.exists(path+'.failed'):
+            os.remove(path+'.failed')
+
+
+def fetch_photo(url, cache, timeout=10):
+    '''
+        Returns the bytes of a photo from the cache, downloading and caching
+        it first if needed. Any URL urlopen handles works, including
+        file:// URLs. A URL that failed within the cache's retry_after is not
+        requested again. Downloads are counted as 'photo' requests when
+        instrumentation is on.
+
+        Returns:
+            data (bytes): None if the download failed or the photo is gone.
+    '''
+
+    data = cache.get(url)
+    if data is not None:
+        return data or None
+    if cache.failed_recently(url):
+        return None
+
+    start = time.time()
+    try:
+        response = urlopen(url, timeout=timeout)
+        data = response.read()
+        response.close()
+    except HTTPError as e:
+        instrumentation.record_request('photo', time.time() - start, False)
+        if e.code in (404, 410):
+            cache.put(url, b'')
+        return None
+    except Exception:
+        ##timeouts and connection errors are retried after cache.retry_after
+        instrumentation.record_request('photo', time.time() - start, False)
+        cache.put_failure(url)
+        return None
+    instrumentation.record_request('photo', time.time() - start, True)
+    cache.put(url, data)
+
+    return data
+
+
+####Photo features
+
+def decode_photo(data, size=64):
+    '''
+        Decodes a photo at reduced resolution and measures it. JPEGs are
+        decoded directly at 1/2, 1/4 or 1/8 scale (Image.draft), so a large
+        photo is never decoded at full size.
+
+        Args:
+            data (bytes): The encoded photo.
+            size (int): The approximate side of the decoded thumbnail.
+        Returns:
+            features (dict): The original width and height in pixels, and
+                the brightness (mean), contrast (standard deviation) and
+                sharpness (variance of the Laplacian) of the grey levels,
+                scaled to 0-1. None if the photo cannot be decoded.
+    '''
+
+    from PIL import Image
+
+    try:
+        img = Image.open(io.BytesIO(data))
+        width, height = img.size
+        img.draft('L', (size, size))
+        img = img.convert('L')
+        img.thumbnail((size, size))
+    except Exception:
+        return None
+
+    grey = np.asarray(img, dtype=np.float32)/255.
+    if grey.shape[0] < 3 or grey.shape[1] < 3:
+        laplacian = np.zeros(1, dtype=np.float32)
+    else:
+        laplacian = (4*grey[1:-1, 1:-1] - grey[:-2, 1:-1] - grey[2:, 1:-1]
+                     - grey[1:-1, :-2] - grey[1:-1, 2:])
+
+    return {'photo_width': width, 'photo_height': height,
+            'photo_brightness': float(grey.mean()),
+            'photo_contrast': float(grey.std()),
+            'photo_sharpness': float(laplacian.var())}
+
+
+def photo_features(image_col, cache_dir='petfinder_photos', max_photos=1, n_workers=16,
+                   timeout=10, size=64, retry_after=24*60*60):
+    '''
+        Downloads pet photos with a bounded pool of threads and extracts
+        cheap image features. Each worker fetches (or reads from the cache)
+        and decodes one photo, so downloads overlap with decoding.
+
+        Args:
+            image_col (Series): The photos column, as written by getPets.
+            cache_dir (str): The on-disk photo cache.
+            max_photos (int): Photos fetched per pet, from the first (the
+                main profile photo) on; None for all.
+            n_workers (int): Concurrent downloads.
+            timeout (float): Seconds before a download is abandoned.
+            size (int): The approximate side of the decoded thumbnails.
+            retry_after (float): Seconds before a failed download is tried
+                again.
+        Returns:
+            photos (DataFrame): Indexed like image_col with the number of
+                photos listed and decoded, and the mean width, height,
+                brightness, contrast and sharpness of the decoded photos
+                (0 for pets without a decoded photo).
+    '''
+
+    cache = PhotoCache(cache_dir, retry_after)
+    urls = [photo_urls(photos) for photos in image_col]
+    jobs = [(i, url) for i, pet_urls in enumerate(urls)
+            for url in pet_urls[:max_photos]]
+
+    def work(job):
+        data = fetch_photo(job[1], cache, timeout)
+        return job[0], None if data is None else decode_photo(data, size)
+
+    pool = ThreadPool(max(1, min(n_workers, len(jobs))))
+    try:
+        results = pool.map(work, jobs, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+    measured = PHOTO_FEATURES[2:]
+    totals = np.zeros((len(urls), len(measured)))
+    decoded = np.zeros(len(urls), dtype=np.int64)
+    for i, features in results:
+        if features is not None:
+            totals[i] += [features[name] for name in measured]
+            decoded[i] += 1
+
+    photos = pd.DataFrame(totals/np.maximum(decoded, 1)[:, None], columns=measured,
+                          index=image_col.index)
+    photos.insert(0, 'photos_decoded', decoded)
+    photos.insert(0, 'photo_count', [len(pet_urls) for pet_urls in urls])
+
+    return photos
+
+
+instrumentation.wrap_functions(globals())
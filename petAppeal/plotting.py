@@ -0,0 +1,565 @@
+from __future__ import absolute_import
+import itertools
+import math
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib as mpl
+import squarify
+
+
+####Data visualizations customized to the Petfinder color scheme
+
+def my_autopct(pct):
+    '''
+        Determines the percentage of each variable in the total dataset
+    
+        Args:
+            pct (): The percentage of each quantity for the specified variable.
+        Returns:
+            pct (): Returns only the percentages that are at least 
+                10% of the data
+    '''
+    
+    return ('%.1f%%' % pct) if pct > 10 else ''
+    
+def piePlot(data, labels, title):
+    '''
+        Creates a pie plots with a bright color scheme.
+    
+        Args:
+            data (Series): A series with the categories as the index and
+                the quantity as the value.
+            labels (object): An array of the categories for the specific
+                feature to be plotted.
+            title (str): A string of the plot title.
+        Returns:
+            plt
+    '''
+            
+    colors = ['#820fdf', '#0bc7ff', '#f8685f', '#f1b82d', '#df0fd9', '#0fdf35', 
+              '#f17e24', '#244ff1']
+    fig = plt.figure()
+    fig = plt.gcf() # get current figure
+    fig.set_size_inches(8, 5)
+    mpl.rcParams['font.size'] = 15.0
+    plt.pie(data, 
+            colors=colors, 
+            autopct=my_autopct,
+            startangle=140,
+            pctdistance=0.5,
+            labeldistance=1.0)
+   
+    plt.legend(loc='upper left',
+               labels=labels,
+               frameon=False,
+               bbox_to_anchor=(0.85,1.025))
+    plt.axis('equal')
+    plt.title(title.upper())
+    plt.tight_layout()
+    plt.show()
+    fname = title+'.png'
+    fig.savefig(fname,
+                transparent=False)
+    plt.close()
+    
+    return plt
+
+
+def plotROC(y_test, y_pred_prob, model_str, evaluation=None):
+    '''
+        Plots a ROC curve.
+        
+        Args:
+            y_test (int64): An array of the test set class labels.
+            y_pred_prob (float64): An array of the prediction probabilities.
+            model_str (str): The name of the model (e.g., Random Forest,
+                      Decision Tree, etc.)
+            evaluation (dict): Optional bootstrap_evaluation output; its
+                confidence band is shaded and its AUC interval added to
+                the legend.
+        Returns:
+            plt
+    '''
+    
+    from sklearn.metrics import roc_curve, auc
+    
+    fpr, tpr, _ = roc_curve(y_test,
+                            y_pred_prob)
+    roc_auc=auc(fpr,
+                tpr)
+    label = 'AUC=%0.2f' % roc_auc
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+    if evaluation is not None:
+        band = evaluation['roc_band']
+        interval = evaluation['summary'].loc['roc_auc']
+        label += ' (%0.2f-%0.2f)' % (interval['low'], interval['high'])
+        plt.fill_between(band.fpr,
+                         band.low,
+                         band.high,
+                         color='#0bc7ff',
+                         alpha=0.3,
+                         linewidth=0)
+    plt.plot(fpr,
+             tpr,
+             label=label,
+             color='#0bc7ff',
+             linewidth=2.0)
+    
+    plt.ylabel('True Positive Rate',
+               fontsize=(18),
+               color='white')
+    
+    plt.xlabel('False Positive Rate',
+               fontsize=(18),
+               color='white')
+    
+    plt.tick_params(axis='both',
+                    which='both'
+                    , labelsize=14,
+                    color='white')
+    
+    plt.title('ROC Curve',
+              fontsize=(18),
+              color='white',
+              fontweight='bold')
+    
+    leg = plt.legend(framealpha = 0,
+                     loc = 'lower right',
+                     fontsize=(14),
+                     frameon=False)
+    for text in leg.get_texts():
+        plt.setp(text, color = 'w')
+    plt.plot([0,1],[0,1],
+             color='#f1b82d',
+             linestyle='--',
+             linewidth=2.0)
+    axes = plt.gca()
+    axes.set_xlim([0,1])
+    axes.set_ylim([0,1])
+    ax.spines['bottom'].set_color('white')
+    ax.spines['top'].set_visible(False)
+    ax.spines['left'].set_color('white')
+    ax.spines['right'].set_visible(False)
+    ax.xaxis.label.set_color('white')
+    ax.tick_params(axis='both',
+                   colors='white')
+    plt.tight_layout()
+    plt.show()
+    fname = model_str+' ROC Curve.png'
+    fig.savefig(fname,
+                transparent=False)
+    plt.close()
+    
+    return plt
+    
+def plot_threshold_curves(evaluation, model_str, threshold=None):
+    '''
+        Plots precision, recall and F1 against the decision threshold with
+        their bootstrap confidence bands, to help choose an operating point.
+        
+        Args:
+            evaluation (dict): The output of bootstrap_evaluation.
+            model_str (str): The name of the model; used for the file name.
+            threshold (float): An optional chosen threshold, marked with a
+                vertical line.
+        Returns:
+            plt
+    '''
+    
+    band = evaluation['threshold_band']
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+    for metric, color in [('precision', '#0bc7ff'), ('recall', '#f1b82d'),
+                          ('f1', '#f8685f')]:
+        plt.fill_between(band.threshold,
+                         band[metric+'_low'],
+                         band[metric+'_high'],
+                         color=color,
+                         alpha=0.3,
+                         linewidth=0)
+        plt.plot(band.threshold,
+                 band[metric],
+                 label=metric.capitalize() if metric!='f1' else 'F1',
+                 color=color,
+                 linewidth=2.0)
+    if threshold is not None:
+        plt.axvline(threshold,
+                    color='white',
+                    linestyle='--',
+                    linewidth=1.5)
+    
+    plt.ylabel('Score',
+               fontsize=(18),
+               color='white')
+    
+    plt.xlabel('Threshold',
+               fontsize=(18),
+               color='white')
+    
+    plt.tick_params(axis='both',
+                    which='both',
+                    labelsize=14,
+                    color='white')
+    
+    plt.title('Threshold Sweep',
+              fontsize=(18),
+              color='white',
+              fontweight='bold')
+    
+    leg = plt.legend(framealpha = 0,
+                     loc = 'lower left',
+                     fontsize=(14),
+                     frameon=False)
+    for text in leg.get_texts():
+        plt.setp(text, color = 'w')
+    axes = plt.gca()
+    axes.set_ylim([0,1])
+    ax.spines['bottom'].set_color('white')
+    ax.spines['top'].set_visible(False)
+    ax.spines['left'].set_color('white')
+    ax.spines['right'].set_visible(False)
+    ax.xaxis.label.set_color('white')
+    ax.tick_params(axis='both',
+                   colors='white')
+    plt.tight_layout()
+    plt.show()
+    fname = model_str+' Threshold Sweep.png'
+    fig.savefig(fname,
+                transparent=False)
+    plt.close()
+    
+    return plt
+
+
+def plot_confusion_matrix(cm, classes, normalize=False, title='Confusion matrix'):
+    '''
+        This function prints and plots the confusion matrix.
+        Normalization can be applied by setting `normalize=True`.
+        
+        Args:
+            cm (int64): An int array created by the sklearn.metrics 
+                confusion_matrix function.
+            classes (object): An object array containing the class labels.
+            normalize (Boolean): True plots normalized confusion matrix.
+            title (str): A string with the title for the plot.
+        Returns:
+            plt
+    '''
+    
+    if normalize:
+        cm = cm.astype('float') / cm.sum(axis=1)[:, np.newaxis]
+        print("Normalized confusion matrix")
+    else:
+        print('Confusion matrix, without normalization')
+
+    print(cm)
+    fig = plt.figure()
+    fname = title +'.png'
+    plt.imshow(cm,
+               interpolation='nearest',
+               cmap=plt.cm.Purples)
+    plt.title(title,
+              fontsize=(18),
+              fontweight='bold')
+    cbar = plt.colorbar()
+    cbar.ax.tick_params(labelsize=14)
+    tick_marks = np.arange(len(classes))
+    plt.xticks(tick_marks,
+               classes,
+               rotation=0,
+               fontsize=(14))
+    plt.yticks(tick_marks,
+               classes,
+               fontsize=(14))
+
+    fmt = '.2f' if normalize else 'd'
+    thresh = cm.max() / 2.
+    for i, j in itertools.product(range(cm.shape[0]), range(cm.shape[1])):
+        plt.text(j,
+                 i,
+                 format(cm[i, j], fmt),
+                 horizontalalignment="center",
+                 color="white" if cm[i, j] > thresh else "black")
+
+    
+    plt.ylabel('True label',
+               fontsize=(18),
+               fontweight='bold')
+    plt.xlabel('Predicted label',
+               fontsize=(18),
+               fontweight='bold')
+    plt.tight_layout()
+    plt.show()
+    fname = title+'.png'
+    fig.savefig(fname,
+                transparent=False)
+    plt.close()
+    
+    return plt
+    
+
+def horizontal_bar(data, title):
+    '''
+        Creates a horizontal bar chart.
+        
+        Args:
+            data (float64): Dataset to plot in the form of a NumPy array.
+            title (str): A string with the plot title
+        Returns:
+            plt
+    '''
+       
+    #np.random.seed(19680801)
+    plt.rcdefaults()
+    fig, ax = plt.subplots()
+    fig = plt.figure(1)
+
+    plt.tick_params(axis='both',
+                    which='major',
+                    labelsize=14)
+    status = ('Available', 'Adopted')
+    y_pos = np.arange(len(status))
+    colors = ['#f8685f', '#f1b82d']
+    ax.barh(y_pos,
+            data,
+            color=colors,
+            ecolor='black')
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels(status,
+                       fontsize=(18))
+    ax.invert_yaxis()  # labels read top-to-bottom
+    ax.set_xlabel('Count',
+                  fontsize=(18))
+    xmax = (max(data)/ 100.0) * 100+100
+    ax.set_xlim([0, xmax])
+    plt.tight_layout()
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    plt.show()
+    fname = title+'.png'
+    fig.savefig(fname,
+                transparent=False)
+    plt.close()
+    
+    return plt
+    
+def plot_feature_importance(x_train, importances, features, color, std=None):
+    '''
+        Plots the feature importances as a horizontal bar graph in
+        descending order of importance
+        
+        Args:
+            x_train (float64): The encoded training set.
+            importances (float64): An array the length of the feature set with
+                the numerical (0-1) level of importance.
+            features (list): A list containing a string of each feature.
+            color (str): The desired font color; either white or black.
+            std (float64): Optional spread of each importance (e.g., from
+                permutation_importance), drawn as error bars.
+        Returns:
+            plt
+    '''
+    
+    indices = np.argsort(importances)[::-1]
+    arr1 = indices
+    arr2 = np.array(features) #featureHeaders is the name of my list of features
+    sorted_arr2 = arr2[arr1[::1]]
+    
+    print("Feature ranking:")
+
+    for f in range(x_train.shape[1]):
+      print("%d. %s (%f)" % (f + 1, sorted_arr2[f], importances[indices[f]]))
+    
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+    plt.barh(range(x_train.shape[1]), importances[indices], color="#f1b82d",
+             xerr=None if std is None else std[indices],
+             ecolor=color)
+    if color=='white':
+        plt.title("Feature Importance",
+                  fontsize=(22),
+                  fontweight='bold',
+                  color='white')
+        ax.invert_yaxis()
+        ax.spines['bottom'].set_visible(False)
+        ax.spines['top'].set_visible(False)
+        ax.spines['left'].set_color('white')
+        ax.spines['right'].set_visible(False)
+        plt.yticks(range(x_train.shape[1]), sorted_arr2, ha='right')
+        plt.tick_params(axis='both',
+                        which='both',
+                        labelsize=14,
+                        color='white')
+        ax.tick_params(axis='both',
+                       colors='white')
+    else:
+        plt.title("Feature Importance",
+                  fontsize=(22),
+                  fontweight='bold')
+        ax.invert_yaxis()
+        ax.spines['bottom'].set_visible(False)
+        ax.spines['top'].set_visible(False)
+        ax.spines['left'].set_color('white')
+        ax.spines['right'].set_visible(False)
+        plt.yticks(range(x_train.shape[1]), sorted_arr2, ha='right')
+        plt.tick_params(axis='both',
+                        which='both',
+                        labelsize=14)
+        
+    plt.gcf().set_size_inches(8,8)
+    plt.tight_layout()
+    ax.grid(False)
+    plt.show()
+    fig.savefig('Feature Importance',
+                transparent=False)
+    plt.close()
+    
+    return plt
+    
+def group_bar_graph(df, labels, feature):
+    '''
+        Create a vertical grouped bar graph to view each feature by status.
+        
+        Args:
+            df (DataFrame): A subset of the full feature set containing only 
+                the categorical variables.
+            labels (list): An ordered list of the categories for the specified
+                feature.
+            feature (str): The name of the feature to be plotted.
+        Returns:
+            plt
+    '''
+
+    pos = list(range(len(df)))
+    width = 0.25 
+    
+    # Plotting the bars
+    fig, ax = plt.subplots(figsize=(10,5))
+    
+    plt.bar(pos, 
+            df[labels[0]], 
+            width,
+            color='#f8685f', 
+            label=df[feature][0]) 
+    
+    plt.bar([p + width for p in pos], 
+            df[labels[1]],
+            width, 
+            color='#f1b82d', 
+            label=df[feature][1]) 
+    ax.set_ylabel('Count')
+    ax.set_facecolor('white')
+    ax.set_title(feature)
+    ax.set_xticks([p + 1.5 * width for p in pos])
+    ax.set_xticklabels(df[feature],
+                       rotation=45)
+    ax.grid(False)
+    plt.xlim(min(pos)-width, max(pos)+width*4)
+    y_max = int(math.ceil(max(df[labels[0]].max(), df[labels[1]].max()) / 100.0)) * 100+100
+    plt.ylim([0, y_max] )
+    plt.legend(labels,
+               loc='upper left', 
+               frameon=False)
+    fname = feature+'.png'
+    fig.savefig(fname,
+                transparent=False)
+    plt.close()
+    
+    return plt
+
+
+def plot_hist(data1, data2, feature, units):
+    '''
+        Plots the distribution(s) of the numerical variables by status
+        
+        Args:
+            data1 (StreamingHistogram): The histogram for the first class; a
+                Series is also accepted and binned with numpy's 'auto' width.
+            data2 (StreamingHistogram): The histogram for the second class.
+            feature (str): The feature displayed on the histogram;
+                            used for the title
+            units (str): The units of the feature; used for the x label.
+        Returns:
+            plt: A histogram with the distributions for both dataset 1
+                    and dataset 2 on top of one another.
+    '''
+    
+    from .features import StreamingHistogram
+    
+    if not isinstance(data1, StreamingHistogram):
+        data1 = StreamingHistogram.from_data(data1)
+    if not isinstance(data2, StreamingHistogram):
+        data2 = StreamingHistogram.from_data(data2)
+    
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+    plt.hist(data1.edges[:-1] + data1.bin_width/2,
+             bins=data1.edges,
+             weights=data1.counts,
+             facecolor='#f8685f')
+    plt.hist(data2.edges[:-1] + data2.bin_width/2,
+             bins=data2.edges,
+             weights=data2.counts,
+             facecolor='#f1b82d',
+             alpha=0.5)
+    plt.title(feature.upper(),
+              fontdict= {'fontsize': 20,
+               'fontweight': 'bold'})
+    plt.legend(loc='upper right',
+               frameon=False,
+               prop={'size': 16})
+    ax.set_ylabel('Count',
+                  fontsize=(18))
+    ax.set_xlabel(units,
+                  fontsize=(18))
+    ax.grid(False)
+    ax.set_facecolor('white')
+    plt.tick_params(axis='both',
+                    which='both',
+                    labelsize=14)
+    plt.legend(['Adopted', 'Available'],
+               loc='best', 
+               frameon=False,
+               fontsize=14)
+    plt.show()
+    fname = feature+'.png'
+    fig.savefig(fname,
+                transparent=False)
+    plt.close()
+    
+    return plt
+    
+
+
+def plot_treemap(breed_col, animal_type):
+    '''
+        Creates a treemap of the breeds for each animal type. The large the
+        quantity of a given breed, the larger the box.
+        Args:
+            breed_col (Series): The series contains the breeds as an index and
+                the quantity of that breed as the value for the given i.
+            animal_type (str): The animal type plotted (e.g., cat, dog, etc.)
+        Returns:
+            plt
+    '''
+    
+    colors = ['#820fdf', '#0bc7ff', '#f8685f', '#f1b82d', '#df0fd9', '#0fdf35', 
+              '#f17e24', '#244ff1']
+    fig = plt.figure()
+    
+    labels= [breed_col.index[i]+' ('+str(breed_col[i])+')' for i in range(len(breed_col))]   
+    squarify.plot(sizes=breed_col,
+                  label=labels,
+                  color=colors,
+                  alpha=.4)
+    plt.axis('off')
+    plt.rc('font',
+           size=10)
+    plt.title(animal_type)
+    plt.show()
+    fname = animal_type+'_treemap.png'
+    fig.savefig(fname,
+                transparent=False)
+    plt.close()
+    
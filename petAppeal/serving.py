@@ -0,0 +1,473 @@
+from __future__ import absolute_import
+import collections
+import json
+import numbers
+import socket
+import threading
+import time
+import numpy as np
+from . import instrumentation
+from .features import YES_NO
+from .modeling import loadModel
+try:
+    import Queue as queue
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from httplib import HTTPConnection
+    from urlparse import urlparse
+except ImportError:
+    import queue
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from http.client import HTTPConnection
+    from urllib.parse import urlparse
+
+_STRING_TYPES = (str, type(u''))
+
+
+####Request micro-batching
+
+class LatencyStats(object):
+    '''
+        Thread-safe record of the most recent request latencies and batch
+        sizes, summarized as percentiles and throughput over that window.
+
+        Args:
+            window (int): The number of recent requests summarized.
+    '''
+
+    def __init__(self, window=10000):
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=window)
+        self.finished = collections.deque(maxlen=window)
+        self.batch_sizes = collections.deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.started = time.time()
+
+    def record(self, seconds, ok=True):
+        with self.lock:
+            self.latencies.append(seconds)
+            self.finished.append(time.time())
+            self.requests += 1
+            self.errors += not ok
+
+    def record_batch(self, size):
+        with self.lock:
+            self.batch_sizes.append(size)
+
+    def snapshot(self):
+        '''
+            Returns:
+                metrics (dict): Request and error counts, p50/p99/max latency
+                    in milliseconds and requests per second over the window,
+                    and the mean and largest micro-batch.
+        '''
+
+        with self.lock:
+            latencies = np.array(self.latencies)
+            finished = np.array(self.finished)
+            batch_sizes = np.array(self.batch_sizes)
+            metrics = {'requests': self.requests, 'errors': self.errors,
+                       'uptime_seconds': time.time() - self.started}
+
+        if len(latencies):
+            p50, p99 = np.percentile(latencies, [50, 99])*1000
+            metrics.update(p50_ms=p50, p99_ms=p99, max_ms=latencies.max()*1000)
+        if len(finished) > 1:
+            metrics['requests_per_sec'] = (len(finished)-1)/max(finished[-1]-finished[0], 1e-9)
+        if len(batch_sizes):
+            metrics.update(mean_batch_size=batch_sizes.mean(),
+                           max_batch_size=int(batch_sizes.max()))
+
+        return metrics
+
+
+class _Pending(object):
+
+    def __init__(self, item):
+        self.item = item
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher(object):
+    '''
+        Coalesces items submitted from many threads into batches for one
+        vectorized call. A background thread takes the first waiting item,
+        then keeps collecting until max_batch_size items are waiting or
+        max_wait seconds have passed, and hands the whole batch to
+        score_batch. A lone request therefore waits at most max_wait.
+
+        Args:
+            score_batch (function): Maps a list of items to a list of
+                results in the same order.
+            max_batch_size (int): The most items scored together.
+            max_wait (float): Seconds the first item of a batch waits for
+                others.
+            stats (LatencyStats): Receives the size of every batch.
+    '''
+
+    def __init__(self, score_batch, max_batch_size=64, max_wait=0.002, stats=None):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.stats = stats
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, item):
+        '''
+            Queues an item and blocks until its batch has been scored.
+
+            Returns:
+                result: The item's entry of score_batch's output; the
+                    exception score_batch raised is re-raised here.
+        '''
+
+        pending = _Pending(item)
+        self.queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.time()
+            try:
+                if timeout > 0:
+                    pending = self.queue.get(timeout=timeout)
+                else:
+                    ##past the deadline, only take what is already waiting
+                    pending = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is None:
+                self.queue.put(None)
+                break
+            batch.append(pending)
+        return batch
+
+    def _loop(self):
+        while True:
+            first = self.queue.get()
+            if first is None:
+                break
+            batch = self._collect(first)
+            try:
+                results = self.score_batch([pending.item for pending in batch])
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            if self.stats is not None:
+                self.stats.record_batch(len(batch))
+            for pending in batch:
+                pending.done.set()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+####Scoring service
+
+class ScoringService(object):
+    '''
+        Scores pet records with a model saved by saveModel. The model and its
+        encode_data categories are loaded once, and records are encoded with
+        a dict lookup per category rather than through a DataFrame, which
+        would cost more than scoring a small batch. Concurrent requests are
+        micro-batched into a single predict_proba call.
+
+        Args:
+            model_path (str): The artifact directory, e.g.
+                petfinder_trained_RF_classifier.
+            max_batch_size (int): The most requests scored together.
+            max_wait (float): Seconds a request waits for others to batch
+                with.
+    '''
+
+    def __init__(self, model_path, max_batch_size=64, max_wait=0.002):
+        self.model, self.header = loadModel(model_path)
+        self.features = self.header['schema']['features']
+        self.categories = self.header['schema']['categories']
+        self.classes = [str(c) for c in self.model.classes]
+        ##Same codes as encode_data: a value's position in its category list
+        self.codes = dict((col, dict((value, code) for code, value in enumerate(categories)))
+                          for col, categories in self.categories.items())
+        ##Yes/no flags may also arrive as JSON booleans, as stored by
+        ##apply_dtypes; true is 'yes'
+        self.flags = set(col for col, categories in self.categories.items()
+                         if categories==YES_NO)
+        ##Score one record up front so one-time costs (e.g. numba compiling
+        ##the traversal) are not charged to the first request
+        self._score_batch([[dict((col, self.categories[col][0] if col in self.codes else 0)
+                                 for col in self.features)]])
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(self._score_batch, max_batch_size, max_wait,
+                                    self.stats)
+
+    def validate(self, records):
+        '''
+            Checks that every record has the model's features, that encoded
+            features use known categories (or booleans, for yes/no flags) and
+            that the others are numbers. Values are type-checked before they
+            are looked up, so 0/1 do not pass as false/true and unhashable
+            values are rejected rather than raising TypeError.
+
+            Raises:
+                ValueError: Describing the first problem found.
+        '''
+
+        if not isinstance(records, list) or not records:
+            raise ValueError('Expected a pet record or a non-empty list of records')
+        for i, record in enumerate(records):
+            if not isinstance(record, dict):
+                raise ValueError('Record %d is not an object' % i)
+            missing = [f for f in self.features if f not in record]
+            if missing:
+                raise ValueError('Record %d is missing %s' % (i, ', '.join(missing)))
+            for col in self.features:
+                value = record[col]
+                if col in self.codes:
+                    if isinstance(value, bool):
+                        known = col in self.flags
+                    else:
+                        known = isinstance(value, _STRING_TYPES) and value in self.codes[col]
+                    if not known:
+                        raise ValueError('Record %d: %s must be one of %s%s, not %r'
+                                         % (i, col, self.categories[col],
+                                            ' or a boolean' if col in self.flags else '',
+                                            value))
+                elif isinstance(value, bool) or not isinstance(value, numbers.Number):
+                    raise ValueError('Record %d: %s must be a number, not %r'
+                                     % (i, col, value))
+
+    def encode(self, records):
+        '''
+            Returns:
+                x (float32): The records encoded like encode_data output,
+                    (n_records, n_features).
+        '''
+
+        x = np.empty((len(records), len(self.features)), dtype=np.float32)
+        for j, col in enumerate(self.features):
+            codes = self.codes.get(col)
+            if codes is None:
+                x[:, j] = [record[col] for record in records]
+            elif col in self.flags:
+                x[:, j] = [(not record[col]) if isinstance(record[col], bool)
+                           else codes[record[col]] for record in records]
+            else:
+                x[:, j] = [codes[record[col]] for record in records]
+        return x
+
+    def _score_batch(self, batches):
+        records = [record for batch in batches for record in batch]
+        proba = self.model.predict_proba(self.encode(records))
+        bounds = np.cumsum([0] + [len(batch) for batch in batches])
+        return [proba[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def score(self, records):
+        '''
+            Scores one request's records.
+
+            Args:
+                records (list): Pet records (dicts of feature values).
+            Returns:
+                proba (ndarray): (n_records, n_classes), columns in the
+                    order of self.classes.
+        '''
+
+        self.validate(records)
+        return self.batcher.submit(records)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    ##The default backlog of 5 drops connections from a burst of clients,
+    ##which then retry after a second
+    request_queue_size = 128
+
+
+class _ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    ##Buffer each response into one write and send it without waiting for
+    ##the client's ACK; otherwise Nagle's algorithm adds ~40ms per request
+    wbufsize = -1
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _send_json(self, code, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path=='/metrics':
+            self._send_json(200, service.stats.snapshot())
+        elif self.path=='/health':
+            self._send_json(200, {'status': 'ok', 'classes': service.classes,
+                                  'features': service.features,
+                                  'n_trees': service.header['n_trees']})
+        else:
+            self._send_json(404, {'error': 'Unknown path %s' % self.path})
+
+    def do_POST(self):
+        service = self.server.service
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if self.path!='/score':
+            self._send_json(404, {'error': 'Unknown path %s' % self.path})
+            return
+
+        start = time.time()
+        try:
+            records = json.loads(body.decode('utf-8'))
+            if isinstance(records, dict):
+                records = records['pets'] if 'pets' in records else [records]
+            proba = service.score(records)
+        except (ValueError, TypeError) as e:
+            ##a malformed request, e.g. invalid JSON or an unknown category
+            service.stats.record(time.time() - start, ok=False)
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            service.stats.record(time.time() - start, ok=False)
+            self._send_json(500, {'error': repr(e)})
+            return
+        service.stats.record(time.time() - start)
+
+        self._send_json(200, {'classes': service.classes,
+                              'scores': [dict(zip(service.classes, row))
+                                         for row in proba.tolist()]})
+
+    def log_message(self, format, *args):
+        ##one line per request would cost more than scoring it
+        pass
+
+
+def make_server(service, host='127.0.0.1', port=8000):
+    '''
+        Builds the HTTP server for a ScoringService; call serve_forever().
+
+        POST /score takes one record, a list of records or {"pets": [...]}
+        and returns each pet's class probabilities. GET /metrics returns
+        LatencyStats.snapshot() and GET /health the model's classes and
+        features.
+
+        Returns:
+            server (HTTPServer): server.server_address has the bound port
+                (pass port=0 for any free port).
+    '''
+
+    server = _ThreadingHTTPServer((host, port), _ScoringHandler)
+    server.service = service
+
+    return server
+
+
+####Load testing
+
+def _get_json(url, path):
+    parsed = urlparse(url)
+    connection = HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+    try:
+        connection.request('GET', path)
+        return json.loads(connection.getresponse().read().decode('utf-8'))
+    finally:
+        connection.close()
+
+
+def service_health(url):
+    '''
+        Returns:
+            health (dict): The service's /health response, including the
+                features every record must have.
+    '''
+
+    return _get_json(url, '/health')
+
+
+def load_test(url, records, n_requests=1000, concurrency=16, pets_per_request=1):
+    '''
+        Sends scoring requests from concurrent clients, each keeping one
+        connection open, and measures latency as the clients see it.
+
+        Args:
+            url (str): The service, e.g. http://127.0.0.1:8000.
+            records (list): Pet records, cycled through as request bodies.
+            n_requests (int): The total number of requests.
+            concurrency (int): The number of client threads.
+            pets_per_request (int): Records sent per request.
+        Returns:
+            report (dict): Client-side p50/p99/max latency in milliseconds,
+                requests per second and error count, and the service's own
+                /metrics under 'server'.
+    '''
+
+    parsed = urlparse(url)
+    bodies = [json.dumps(records[i:i+pets_per_request])
+              for i in range(0, len(records), pets_per_request)]
+    counter = iter(range(n_requests))
+    lock = threading.Lock()
+    latencies = []
+    errors = []
+
+    def client():
+        connection = HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            start = time.time()
+            try:
+                connection.request('POST', '/score', bodies[i % len(bodies)],
+                                   {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                ok = response.status==200
+            except Exception:
+                connection.close()
+                connection = HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+                ok = False
+            with lock:
+                latencies.append(time.time() - start)
+                if not ok:
+                    errors.append(i)
+        connection.close()
+
+    start = time.time()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    p50, p99 = np.percentile(latencies, [50, 99])*1000
+    server_metrics = _get_json(url, '/metrics')
+
+    return {'requests': len(latencies), 'errors': len(errors),
+            'seconds': elapsed, 'requests_per_sec': len(latencies)/elapsed,
+            'p50_ms': p50, 'p99_ms': p99, 'max_ms': max(latencies)*1000,
+            'concurrency': concurrency, 'pets_per_request': pets_per_request,
+            'server': server_metrics}
+
+
+instrumentation.wrap_functions(globals())
@@ -0,0 +1,355 @@
+from __future__ import absolute_import
+import re
+import os
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.neighbors import BallTree
+from . import instrumentation
+
+
+####Fuzzy shelter name matching
+
+_NAME_STOPWORDS = ['inc', 'incorporated', 'llc', 'corp', 'the']
+
+
+def normalize_shelter_name(name):
+    '''
+        Lower-cases a shelter name and strips punctuation, '&' and legal
+        suffixes so trivially different spellings compare equal.
+
+        Args:
+            name (str): A shelter name.
+        Returns:
+            name (str)
+    '''
+
+    if not isinstance(name, str) and not isinstance(name, type(u'')):
+        return ''
+    name = name.lower().replace('&', ' and ')
+    name = re.sub(r'[^\w\s]', ' ', name)
+    words = [w for w in name.split() if w not in _NAME_STOPWORDS]
+
+    return ' '.join(words)
+
+
+class ShelterMatcher(object):
+    '''
+        Character n-gram TF-IDF index over shelter names, blocked by state.
+        Queries are only compared with shelters in the same state, and each
+        block is scored with one sparse matrix product, so matching grows
+        with the size of the largest state rather than with all pairs.
+
+        Args:
+            shelters (DataFrame): The shelters to match against.
+            name_col (str): The shelter name column.
+            state_col (str): The state column used for blocking.
+            ngram_range (tuple): Character n-gram lengths.
+    '''
+
+    def __init__(self, shelters, name_col='name', state_col='state', ngram_range=(2, 4)):
+        self.shelters = shelters
+        names = [normalize_shelter_name(n) for n in shelters[name_col]]
+        ##IDF is fitted on all shelters so words shared by many names
+        ##(rescue, humane, society) count for little in every block
+        self.vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=ngram_range,
+                                          decode_error='replace', dtype=np.float32)
+        self.matrix = self.vectorizer.fit_transform(names).tocsr()
+        states = shelters[state_col].astype(str).str.upper().values
+        self.blocks = dict((state, np.flatnonzero(states==state))
+                           for state in np.unique(states))
+
+    def match(self, names, states, chunksize=1000):
+        '''
+            Finds the best match in the same state for each query name.
+
+            Args:
+                names (Series): The query shelter names.
+                states (Series): The query states.
+                chunksize (int): Queries scored per matrix product.
+            Returns:
+                matches (DataFrame): Indexed like names, with the matched
+                    row label of the shelter frame ('match'), its cosine
+                    similarity ('score', the confidence) and the score of
+                    the runner-up ('runner_up_score'). Unmatched rows (no
+                    shelters in that state) have NaN.
+        '''
+
+        index = getattr(names, 'index', None)
+        names = pd.Series(list(names))
+        states = pd.Series(list(states)).astype(str).str.upper().values
+        queries = self.vectorizer.transform([normalize_shelter_name(n) for n in names]).tocsr()
+
+        best = np.full(len(names), -1, dtype=np.int64)
+        score = np.full(len(names), np.nan)
+        runner_up = np.full(len(names), np.nan)
+        for state in np.unique(states):
+            block = self.blocks.get(state)
+            if block is None:
+                continue
+            rows = np.flatnonzero(states==state)
+            candidates = self.matrix[block].T.tocsc()
+            for start in range(0, len(rows), chunksize):
+                chunk = rows[start:start+chunksize]
+                sims = queries[chunk].dot(candidates).toarray()
+                top = sims.argmax(axis=1)
+                best[chunk] = block[top]
+                score[chunk] = sims[np.arange(len(chunk)), top]
+                if sims.shape[1] > 1:
+                    sims[np.arange(len(chunk)), top] = -1
+                    runner_up[chunk] = sims.max(axis=1)
+
+        matched = best >= 0
+        match = pd.Series(np.nan, index=range(len(names)), dtype=object)
+        match[matched] = self.shelters.index.values[best[matched]]
+
+        return pd.DataFrame({'match': match.values, 'score': score,
+                             'runner_up_score': runner_up},
+                            index=index if index is not None else names.index)
+
+
+def match_shelters(left, right, left_on, right_on, min_score=0.8):
+    '''
+        Fuzzy version of pd.merge(left, right, left_on, right_on) for shelter
+        lists: rows are joined on the most similar name within the same
+        state, keeping pairs scoring at least min_score.
+
+        Args:
+            left (DataFrame): e.g. the scraped No Kill Network list.
+            right (DataFrame): e.g. Petfinder shelters.
+            left_on (list): The [name, state] columns of left.
+            right_on (list): The [name, state] columns of right.
+            min_score (float): The lowest cosine similarity kept (0-1).
+        Returns:
+            merged (DataFrame): The joined rows with a match_score column.
+    '''
+
+    matcher = ShelterMatcher(right, name_col=right_on[0], state_col=right_on[1])
+    matches = matcher.match(left[left_on[0]], left[left_on[1]])
+    keep = (matches.score >= min_score).values
+
+    overlap = set(left.columns) & set(right.columns)
+    left_part = left[keep].reset_index(drop=True)
+    right_part = right.loc[matches.match[keep]].reset_index(drop=True)
+    merged = pd.concat([left_part.rename(columns=dict((c, c+'_x') for c in overlap)),
+                        right_part.rename(columns=dict((c, c+'_y') for c in overlap))],
+                       axis=1)
+    merged['match_score'] = matches.score[keep].values
+
+    return merged
+
+
+####Offline spatial queries
+
+EARTH_RADIUS_MILES = 3958.8
+
+
+def _zip_int(zip_codes):
+    return pd.to_numeric(pd.Series(zip_codes).astype(str).str[:5], errors='coerce').values
+
+
+def load_zip_centroids(gazetteer_file):
+    '''
+        Reads zip code centroids from a Census ZCTA gazetteer file, e.g.
+        2020_Gaz_zcta_national.txt from
+        https://www.census.gov/geographies/reference-files/time-series/geo/gazetteer-files.html
+
+        Args:
+            gazetteer_file (str): The tab-separated gazetteer file.
+        Returns:
+            centroids (DataFrame): latitude and longitude indexed by the
+                zip code as an integer.
+    '''
+
+    gazetteer = pd.read_csv(gazetteer_file, sep='\t', dtype={'GEOID': str})
+    gazetteer.columns = gazetteer.columns.str.strip()
+    centroids = pd.DataFrame({'latitude': gazetteer.INTPTLAT.values,
+                              'longitude': gazetteer.INTPTLONG.values},
+                             index=_zip_int(gazetteer.GEOID),
+                             columns=['latitude', 'longitude'])
+
+    return centroids[~np.isnan(centroids.index.values)]
+
+
+class ShelterLocator(object):
+    '''
+        Haversine BallTree over shelter coordinates for radius and nearest
+        queries without calling the Petfinder API. Zip codes are located
+        with a zip centroid table such as the Census ZCTA gazetteer (see
+        load_zip_centroids). Without one, only the zip codes that have a
+        shelter are known, at the mean coordinates of their shelters.
+
+        Args:
+            shelters (DataFrame): Shelters with latitude, longitude and
+                zip_code columns, e.g. "Petfinder Shelter List (US).csv".
+                Rows without coordinates are dropped.
+            zip_centroids (DataFrame): Optional latitude/longitude per zip
+                code, indexed by the zip code as an integer.
+    '''
+
+    def __init__(self, shelters, zip_centroids=None):
+        shelters = shelters.dropna(subset=['latitude', 'longitude'])
+        self.shelters = shelters.reset_index(drop=True)
+        coords = self.shelters[['latitude', 'longitude']].values.astype(np.float64)
+        self.tree = BallTree(np.radians(coords), metric='haversine')
+        centroids = self.shelters[['latitude', 'longitude']].groupby(
+            _zip_int(self.shelters.zip_code)).mean()
+        if zip_centroids is not None:
+            centroids = zip_centroids[['latitude', 'longitude']].combine_first(centroids)
+        self.zip_centroids = centroids
+
+    def points(self, where, unknown='raise'):
+        '''
+            Converts zip codes or (latitude, longitude) pairs to an (n, 2)
+            array of degrees.
+
+            Args:
+                where: A zip code, a list of zip codes, a (lat, lon) pair or
+                    an (n, 2) array of pairs.
+                unknown (str): 'raise' to reject zip codes missing from the
+                    centroid table, or 'ignore' to give them NaN rows.
+            Returns:
+                points (ndarray)
+        '''
+
+        if isinstance(where, tuple) and len(where)==2:
+            return np.array([where], dtype=np.float64)
+        arr = np.asarray(where)
+        if arr.ndim==2 and arr.shape[1]==2:
+            return arr.astype(np.float64)
+        zips = np.atleast_1d(arr)
+        pts = self.zip_centroids.reindex(_zip_int(zips)).values
+        missing = np.isnan(pts).any(axis=1)
+        if unknown=='raise' and missing.any():
+            raise ValueError('Unknown zip codes %s; build the locator with a zip centroid '
+                             'table (see load_zip_centroids) to locate zip codes without '
+                             'a shelter' % ', '.join(str(z) for z in zips[missing][:10]))
+        return pts
+
+    def radius(self, where, miles, unknown='raise'):
+        '''
+            Finds the shelters within a distance of each point.
+
+            Args:
+                where: Points or zip codes, as accepted by points().
+                miles (float): The search radius.
+                unknown (str): How unknown zip codes are handled; see points().
+            Returns:
+                indices (list): An array of shelter rows per point, nearest
+                    first; empty for ignored unknown zip codes.
+                distances (list): The matching distances in miles.
+        '''
+
+        pts = self.points(where, unknown)
+        known = ~np.isnan(pts).any(axis=1)
+        indices = [np.array([], dtype=np.int64)]*len(pts)
+        distances = [np.array([])]*len(pts)
+        if known.any():
+            ind, dist = self.tree.query_radius(np.radians(pts[known]),
+                                               r=miles/EARTH_RADIUS_MILES,
+                                               return_distance=True,
+                                               sort_results=True)
+            for i, row in enumerate(np.flatnonzero(known)):
+                indices[row] = ind[i]
+                distances[row] = dist[i]*EARTH_RADIUS_MILES
+
+        return indices, distances
+
+    def nearest(self, where, k=5, unknown='raise'):
+        '''
+            Finds the k nearest shelters to each point.
+
+            Args:
+                where: Points or zip codes, as accepted by points().
+                k (int): The number of shelters per point.
+                unknown (str): How unknown zip codes are handled; see points().
+            Returns:
+                distances (ndarray): (n, k) distances in miles; NaN for
+                    ignored unknown zip codes.
+                indices (ndarray): (n, k) shelter rows; -1 for ignored
+                    unknown zip codes.
+        '''
+
+        pts = self.points(where, unknown)
+        known = ~np.isnan(pts).any(axis=1)
+        k = min(k, len(self.shelters))
+        distances = np.full((len(pts), k), np.nan)
+        indices = np.full((len(pts), k), -1, dtype=np.int64)
+        if known.any():
+            ##breadth-first is several times faster here for batches of zips
+            dist, ind = self.tree.query(np.radians(pts[known]), k=k, breadth_first=True)
+            distances[known] = dist*EARTH_RADIUS_MILES
+            indices[known] = ind
+
+        return distances, indices
+
+    def shelters_within(self, where, miles):
+        '''
+            Returns:
+                shelters (DataFrame): The shelters within miles of a single
+                    zip code or (lat, lon) pair, with a distance_miles
+                    column, nearest first.
+        '''
+
+        indices, distances = self.radius(where, miles)
+        found = self.shelters.iloc[indices[0]].copy()
+        found['distance_miles'] = distances[0]
+        return found
+
+    def shelters_nearest(self, where, k=5):
+        '''
+            Returns:
+                shelters (DataFrame): The k shelters nearest to a single zip
+                    code or (lat, lon) pair, with a distance_miles column.
+        '''
+
+        distances, indices = self.nearest(where, k)
+        keep = indices[0] >= 0
+        found = self.shelters.iloc[indices[0][keep]].copy()
+        found['distance_miles'] = distances[0][keep]
+        return found
+
+
+def load_shelter_locator(csv_file='Petfinder Shelter List (US).csv', index_file=None,
+                         gazetteer_file=None):
+    '''
+        Loads the persisted ShelterLocator for a shelter list, building and
+        saving it first if it is missing or its source files have changed
+        since.
+
+        Args:
+            csv_file (str): The shelter list.
+            index_file (str): Where the index is kept; defaults to
+                <csv_file>.balltree.pickle.
+            gazetteer_file (str): An optional Census ZCTA gazetteer used to
+                locate every zip code (see load_zip_centroids).
+        Returns:
+            locator (ShelterLocator)
+    '''
+
+    index_file = index_file or csv_file + '.balltree.pickle'
+    sha = hashlib.sha1()
+    for path in [csv_file] + ([gazetteer_file] if gazetteer_file else []):
+        with open(path, 'rb') as f:
+            sha.update(f.read())
+    source_hash = sha.hexdigest()
+
+    if os.path.exists(index_file):
+        with open(index_file, 'rb') as f:
+            saved = pickle.load(f)
+        if saved.get('source_hash')==source_hash:
+            return saved['locator']
+
+    zip_centroids = load_zip_centroids(gazetteer_file) if gazetteer_file else None
+    locator = ShelterLocator(pd.read_csv(csv_file), zip_centroids)
+    tmp_file = index_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        pickle.dump({'source_hash': source_hash, 'locator': locator}, f, protocol=2)
+    os.rename(tmp_file, index_file)
+
+    return locator
+
+
+instrumentation.wrap_functions(globals())
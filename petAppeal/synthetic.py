@@ -0,0 +1,180 @@
+from __future__ import absolute_import
+import ast
+import numpy as np
+import pandas as pd
+from .features import ENCODING
+
+
+####Synthetic data
+
+_SYNTHETIC_WORDS = ['sweet', 'loving', 'playful', 'shy', 'gentle', 'energetic',
+                    'friendly', 'calm', 'curious', 'adorable', 'loyal', 'smart',
+                    'cuddly', 'quiet', 'happy', 'good', 'great', 'with', 'kids',
+                    'cats', 'dogs', 'home', 'family', 'walks', 'treats', 'toys',
+                    'she', 'he', 'loves', 'needs', 'a', 'the', 'and', 'is', 'to',
+                    'very', 'not', 'house', 'trained', 'crate']
+_SYNTHETIC_NAMES = ['Bella', 'Max', 'Luna', 'Charlie', 'Lucy', 'Cooper', 'Daisy',
+                    'Milo', 'Oliver', 'Sadie', 'Tiger', 'Smokey', 'Shadow', 'Buddy']
+_SYNTHETIC_BREEDS = {'Cat': ['Domestic Short Hair', 'Domestic Medium Hair',
+                             'Siamese', 'Tabby', 'Maine Coon', 'Tuxedo'],
+                     'Dog': ['Labrador Retriever', 'Black Labrador Retriever',
+                             'Pit Bull Terrier', 'Chihuahua', 'Beagle',
+                             'German Shepherd Dog', 'Boxer'],
+                     'Rabbit': ['Bunny Rabbit', 'Lop Eared'],
+                     'Bird': ['Parakeet', 'Cockatiel']}
+_SYNTHETIC_STATES = ['CA', 'TX', 'NY', 'FL', 'PA', 'OH', 'NJ', 'GA', 'WA', 'AK']
+
+
+def synthetic_pets(n_rows, random_state=0):
+    '''
+        Generates Petfinder-like pet records shaped like the getPets output
+        (before munging), e.g. for benchmarks. The value mix loosely follows
+        the real data: mostly cats and dogs, lists stored as strings, and
+        some missing descriptions, photos and options.
+        
+        Args:
+            n_rows (int): The number of pets.
+            random_state (int): Seed for the generator.
+        Returns:
+            pets (DataFrame)
+    '''
+    
+    rng = np.random.RandomState(random_state)
+    options_list = ['altered', 'hasShots', 'housetrained', 'noKids', 'noCats',
+                    'noDogs', 'noClaws', 'specialNeeds']
+    
+    animal = rng.choice(['Cat', 'Dog', 'Rabbit', 'Bird'], n_rows,
+                        p=[0.45, 0.45, 0.05, 0.05])
+    breed = []
+    for a, two_breeds in zip(animal, rng.rand(n_rows)<0.3):
+        choices = _SYNTHETIC_BREEDS[a]
+        picks = rng.choice(choices, 2 if two_breeds else 1, replace=False)
+        breed.append(str(list(picks)))
+    
+    has_option = rng.rand(n_rows, len(options_list))<0.4
+    options = [str([o for o, has in zip(options_list, row) if has]) if row.any()
+               else np.nan for row in has_option]
+    
+    n_words = rng.poisson(40, n_rows)
+    n_words[rng.rand(n_rows)<0.15] = 0
+    words = np.array(_SYNTHETIC_WORDS)[rng.randint(len(_SYNTHETIC_WORDS),
+                                                   size=n_words.sum())]
+    ends = np.cumsum(n_words)
+    description = [' '.join(words[end-n:end]) if n else np.nan
+                   for n, end in zip(n_words, ends)]
+    
+    first = rng.choice(_SYNTHETIC_NAMES, n_rows)
+    second = rng.choice(_SYNTHETIC_NAMES, n_rows)
+    name = [f+' and '+s if multi else f
+            for f, s, multi in zip(first, second, rng.rand(n_rows)<0.05)]
+    
+    n_photos = rng.poisson(2, n_rows)
+    pet_ids = np.arange(n_rows) + 30000000
+    photos = [str(['http://photos.petfinder.com/photos/pets/%d/%d/' % (pid, k+1)
+                   for k in range(n)]) if n else np.nan
+              for pid, n in zip(pet_ids, n_photos)]
+    
+    state = rng.choice(_SYNTHETIC_STATES, n_rows)
+    shelter_num = rng.randint(1, 300, n_rows)
+    last_update = pd.Timestamp('2017-11-01') + pd.to_timedelta(rng.randint(0, 60*24*3600, n_rows), unit='s')
+    
+    return pd.DataFrame({'age': rng.choice(['Baby', 'Young', 'Adult', 'Senior'], n_rows),
+                         'animal': animal,
+                         'breed': breed,
+                         'description': description,
+                         'id': pet_ids,
+                         'lastUpdate': last_update.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                         'photos': photos,
+                         'mix': rng.choice(['yes', 'no'], n_rows),
+                         'name': name,
+                         'options': options,
+                         'sex': rng.choice(['M', 'F', 'U'], n_rows, p=[0.48, 0.48, 0.04]),
+                         'shelter_id': [s+str(k) for s, k in zip(state, shelter_num)],
+                         'pet_id': pet_ids % 100000,
+                         'size': rng.choice(['S', 'M', 'L', 'XL'], n_rows),
+                         'status': rng.choice(['A', 'X', 'H', 'P'], n_rows,
+                                              p=[0.5, 0.35, 0.1, 0.05]),
+                         'address1': np.nan,
+                         'address2': np.nan,
+                         'city': 'Springfield',
+                         'email': 'adopt@example.org',
+                         'fax': np.nan,
+                         'phone': '555-0100',
+                         'state': state,
+                         'zip': rng.randint(1000, 99999, n_rows)})
+
+
+def synthetic_petfinder_response(pets):
+    '''
+        Wraps pet records in the JSON layout of a shelter.getPets response,
+        so parse_pets can be exercised without calling the API.
+        
+        Args:
+            pets (DataFrame): Records as returned by synthetic_pets.
+        Returns:
+            data (dict): The decoded JSON response.
+    '''
+    
+    def text(value):
+        return {} if isinstance(value, float) else {'$t': value}
+    
+    def listed(value, key):
+        if isinstance(value, float):
+            return {}
+        return {key: [{'$t': v} for v in ast.literal_eval(value)]}
+    
+    pet_list = []
+    for row in pets.itertuples(index=False):
+        pet_list.append({'age': text(row.age), 'animal': text(row.animal),
+                         'breeds': listed(row.breed, 'breed'),
+                         'description': text(row.description),
+                         'id': text(str(row.id)),
+                         'lastUpdate': text(row.lastUpdate),
+                         'media': {'photos': listed(row.photos, 'photo')},
+                         'mix': text(row.mix), 'name': text(row.name),
+                         'options': listed(row.options, 'option'),
+                         'sex': text(row.sex),
+                         'shelterId': text(row.shelter_id),
+                         'shelterPetId': text(str(row.pet_id)),
+                         'size': text(row.size), 'status': text(row.status),
+                         'contact': {'city': text(row.city),
+                                     'email': text(row.email),
+                                     'phone': text(row.phone),
+                                     'state': text(row.state),
+                                     'zip': text(str(row.zip))}})
+    
+    return {'petfinder': {'pets': {'pet': pet_list}}}
+
+
+def synthetic_clean_pets(n_rows, random_state=0):
+    '''
+        Generates records shaped like the munged petfinder_data_clean.csv
+        (script 3 output, with status names), e.g. for benchmarks.
+        
+        Args:
+            n_rows (int): The number of pets.
+            random_state (int): Seed for the generator.
+        Returns:
+            pets (DataFrame)
+    '''
+    
+    rng = np.random.RandomState(random_state)
+    pets = pd.DataFrame(dict((col, rng.choice(categories, n_rows))
+                             for col, categories in ENCODING.items()))
+    pets['status'] = rng.choice(['Available', 'Adopted', 'On Hold', 'Pending'],
+                                n_rows, p=[0.5, 0.35, 0.1, 0.05])
+    pets['description_length'] = rng.poisson(40, n_rows)
+    pets['description_polarity'] = np.round(rng.uniform(-1, 1, n_rows), 3)
+    pets['description_subjectivity'] = np.round(rng.uniform(0, 1, n_rows), 3)
+    pets['state'] = rng.choice(_SYNTHETIC_STATES, n_rows)
+    pets['shelter_id'] = [s+str(k) for s, k in zip(pets.state, rng.randint(1, 300, n_rows))]
+    pets['photo_count'] = rng.poisson(2, n_rows)
+    pets['photos_decoded'] = np.minimum(pets.photo_count, 1)
+    has_photo = pets.photos_decoded.values > 0
+    pets['photo_width'] = np.where(has_photo, rng.choice([300, 500, 640], n_rows), 0)
+    pets['photo_height'] = np.where(has_photo, rng.choice([225, 375, 480], n_rows), 0)
+    for col, low, high in [('photo_brightness', 0.2, 0.8), ('photo_contrast', 0.05, 0.3),
+                           ('photo_sharpness', 0.0, 0.02)]:
+        pets[col] = np.where(has_photo, np.round(rng.uniform(low, high, n_rows), 4), 0.)
+    
+    return pets
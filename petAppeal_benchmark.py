@@ -0,0 +1,228 @@
+"""
+Benchmarks the petAppeal functions on synthetic Petfinder-like data.
+
+Each function is timed at several row counts (10k, 100k and 1M by default)
+in its own process, so peak memory is not polluted by earlier cases. Results
+are written to JSON; pass an earlier results file with --compare to flag
+regressions.
+
+    python petAppeal_benchmark.py --output bench_new.json
+    python petAppeal_benchmark.py --sizes 10000 --compare bench_old.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import petAppeal
+
+
+## Each case builds its input (untimed) and returns the call to time
+def _case_parse_pets(n_rows):
+    data = petAppeal.synthetic_petfinder_response(petAppeal.synthetic_pets(n_rows))
+    return petAppeal.parse_pets, (data,)
+
+def _case_sort_options(n_rows):
+    return petAppeal.sort_options, (petAppeal.synthetic_pets(n_rows).options,)
+
+def _case_description_analysis(n_rows):
+    return petAppeal.description_analysis, (petAppeal.synthetic_pets(n_rows).description,)
+
+def _case_multi_adoption(n_rows):
+    return petAppeal.multi_adoption, (petAppeal.synthetic_pets(n_rows).name,)
+
+def _case_image_analysis(n_rows):
+    return petAppeal.image_analysis, (petAppeal.synthetic_pets(n_rows).photos,)
+
+def _case_unique_breeds(n_rows):
+    return petAppeal.unique_breeds, (petAppeal.synthetic_pets(n_rows).breed,)
+
+def _case_encode_data(n_rows):
+    pets = petAppeal.synthetic_clean_pets(n_rows)
+    return petAppeal.encode_data, (pets[list(petAppeal.ENCODING)],)
+
+def _case_balance_check(n_rows):
+    pets = petAppeal.synthetic_clean_pets(n_rows)
+    pets = pets[pets.status.isin(['Available', 'Adopted'])].reset_index(drop=True)
+    return (lambda df: petAppeal.balance_check(df, 'status', plot=False,
+                                               random_state=0)), (pets,)
+
+CASES = [('parse_pets', _case_parse_pets),
+         ('sort_options', _case_sort_options),
+         ('description_analysis', _case_description_analysis),
+         ('multi_adoption', _case_multi_adoption),
+         ('image_analysis', _case_image_analysis),
+         ('unique_breeds', _case_unique_breeds),
+         ('encode_data', _case_encode_data),
+         ('balance_check', _case_balance_check)]
+
+
+def _run_case(name, n_rows, queue):
+    try:
+        func, args = dict(CASES)[name](n_rows)
+        rss_before = petAppeal.max_rss_mb()
+        _, seconds, peak_mb = petAppeal.measure_call(func, *args)
+        rss_after = petAppeal.max_rss_mb()
+        queue.put({'status': 'ok',
+                   'seconds': seconds,
+                   'rows_per_sec': n_rows/seconds if seconds>0 else None,
+                   'peak_traced_mb': peak_mb,
+                   'max_rss_growth_mb': None if rss_before is None
+                                        else rss_after - rss_before})
+    except Exception as e:
+        queue.put({'status': 'error', 'error': repr(e)})
+
+
+def run_case(name, n_rows, timeout):
+    '''
+        Runs one benchmark case in a child process.
+
+        Args:
+            name (str): The function name, a key of CASES.
+            n_rows (int): The number of synthetic rows.
+            timeout (float): Seconds to wait before killing the case.
+        Returns:
+            result (dict)
+    '''
+
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_run_case, args=(name, n_rows, queue))
+    proc.start()
+    start = time.time()
+    result = None
+    while result is None and time.time()-start < timeout:
+        try:
+            result = queue.get(timeout=1)
+        except Exception:
+            if not proc.is_alive():
+                result = {'status': 'error', 'error': 'exit code %s' % proc.exitcode}
+    if result is None:
+        proc.terminate()
+        result = {'status': 'timeout'}
+    proc.join()
+
+    return result
+
+
+def run_benchmarks(names, sizes, timeout):
+    '''
+        Times each function at increasing sizes. A size is skipped when a
+        linear extrapolation from the previous size would exceed the timeout.
+    '''
+
+    results = []
+    for name in names:
+        last = None
+        for n_rows in sorted(sizes):
+            if last is not None and (last['status']!='ok' or
+                    last['seconds']*n_rows/float(last['n_rows']) > timeout):
+                result = {'status': 'skipped'}
+            else:
+                result = run_case(name, n_rows, timeout)
+            result.update(function=name, n_rows=n_rows)
+            print('%-22s %9d  %s' % (name, n_rows, _describe(result)))
+            results.append(result)
+            if result['status']!='skipped':
+                last = result
+
+    return results
+
+
+def _describe(result):
+    if result['status']!='ok':
+        return result['status'] + (' ' + result['error'] if 'error' in result else '')
+    mem = result['peak_traced_mb']
+    return '%9.3fs %12.0f rows/s %s' % (result['seconds'], result['rows_per_sec'] or 0,
+                                        '' if mem is None else '%8.1f MB' % mem)
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.STDOUT).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline, threshold):
+    '''
+        Compares run times with a baseline run.
+
+        Args:
+            results (list): Cases from this run.
+            baseline (list): Cases from the baseline run.
+            threshold (float): Relative slowdown reported as a regression.
+        Returns:
+            regressions (list): (function, n_rows, ratio) for each regression.
+    '''
+
+    old = dict(((r['function'], r['n_rows']), r) for r in baseline
+               if r['status']=='ok')
+    regressions = []
+    print('\n%-22s %9s %10s %10s %7s' % ('function', 'rows', 'baseline', 'current', 'ratio'))
+    for r in results:
+        key = (r['function'], r['n_rows'])
+        if r['status']!='ok' or key not in old:
+            continue
+        ratio = r['seconds']/old[key]['seconds']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions.append((r['function'], r['n_rows'], ratio))
+        print('%-22s %9d %9.3fs %9.3fs %6.2fx%s' % (key + (old[key]['seconds'],
+                                                        r['seconds'], ratio, flag)))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='comma-separated row counts')
+    parser.add_argument('--functions', default=','.join(name for name, _ in CASES),
+                        help='comma-separated functions to benchmark')
+    parser.add_argument('--timeout', type=float, default=600,
+                        help='seconds allowed per case')
+    parser.add_argument('--output', default='petAppeal_benchmark.json',
+                        help='where to write the JSON results')
+    parser.add_argument('--compare', help='baseline JSON results')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown counted as a regression')
+    args = parser.parse_args(argv)
+
+    names = args.functions.split(',')
+    unknown = set(names) - set(dict(CASES))
+    if unknown:
+        parser.error('unknown functions: %s' % ', '.join(sorted(unknown)))
+    sizes = [int(s) for s in args.sizes.split(',')]
+
+    results = run_benchmarks(names, sizes, args.timeout)
+    report = {'meta': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'git_revision': _git_revision(),
+                       'timeout': args.timeout},
+              'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print('\nResults written to %s' % args.output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print('\n%d regression(s) over %d%%' % (len(regressions), 100*args.threshold))
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,448 @@
+"""
+Runs the numbered PetAppeal scripts as a DAG with cached artifacts.
+
+Each stage is keyed by a hash of its script, the petAppeal modules it uses
+and its input files. A stage whose key has been seen before is not rerun; its
+outputs are restored from the cache if they are missing or were
+overwritten. Stages whose dependencies are done run in parallel, so the
+visualization and modeling branches overlap.
+
+    python petAppeal_pipeline.py                 # everything but optional stages
+    python petAppeal_pipeline.py model           # model and what it needs
+    python petAppeal_pipeline.py benchmark       # the optional boosting benchmark
+    python petAppeal_pipeline.py --force pets    # refetch; downstream reruns if the data changed
+    python petAppeal_pipeline.py --mark-done shelters --mark-done pets
+    python petAppeal_pipeline.py --dry-run
+    PETAPPEAL_PHOTOS=1 python petAppeal_pipeline.py model   # with photo features
+
+The fetch stages call the Petfinder API; export PETFINDER_API_KEY first.
+Their inputs are local files, so they are only rerun when those change or
+when forced. --mark-done records files already on disk (e.g. an earlier
+crawl) as a stage's cached result without running it.
+"""
+
+import argparse
+import ast
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+##The figures script 4 saves; a pattern stands for whatever files match
+_VISUALIZED = ['age', 'sex', 'size', 'animal', 'multi_adoption', 'altered', 'hasShots',
+               'housetrained', 'noCats', 'noClaws', 'noDogs', 'noKids', 'specialNeeds',
+               'mix']
+VISUALIZE_FIGURES = ([col.replace('_', '').upper() + ' - ALL ANIMALS.png'
+                      for col in ['status'] + _VISUALIZED] +
+                     [col + '.png' for col in _VISUALIZED] +
+                     ['description_length.png', 'description_polarity.png',
+                      'description_subjectivity.png', '*_treemap.png',
+                      ##balance_check's pies, saved only when it resamples; script
+                      ##4 is the one stage that plots them
+                      'Status - *.png'])
+
+STAGES = [{'name': 'shelters',
+           'script': '1_petAppeal_shelterFinder.py',
+           'inputs': ['No Kill Network Animal Shelters.csv'],
+           'outputs': ['Petfinder No Kill Shelters.csv']},
+          {'name': 'pets',
+           'script': '2_petAppeal_getPets.py',
+           'inputs': ['Petfinder No Kill Shelters.csv'],
+           'outputs': ['petfinder_shelter_animals.csv']},
+          {'name': 'munge',
+           'script': '3_petAppeal_dataMunge.py',
+           'inputs': ['petfinder_shelter_animals.csv'],
+           'env': ['PETAPPEAL_PHOTOS'],
+           'outputs': ['petfinder_data_clean.csv', 'petfinder_data_clean']},
+          {'name': 'visualize',
+           'script': '4_petAppeal_visualization.py',
+           'inputs': ['petfinder_data_clean'],
+           'outputs': VISUALIZE_FIGURES},
+          {'name': 'model',
+           'script': '5_petAppeal_GridSearchCV_RandForest.py',
+           'inputs': ['petfinder_data_clean'],
+           'outputs': ['rForest_GridSearch_results.csv', 'rForest_best_params.pickle',
+                       'petfinder_trained_RF_classifier']},
+          ##A comparison run rather than a pipeline product: only run when named
+          {'name': 'benchmark',
+           'optional': True,
+           'script': '5_petAppeal_HistGradBoost.py',
+           'inputs': ['petfinder_data_clean', 'rForest_best_params.pickle'],
+           'outputs': ['model_benchmark_results.csv']}]
+
+
+def dependencies(stages):
+    '''
+        Returns:
+            deps (dict): The stages producing each stage's inputs.
+    '''
+
+    producer = dict((out, s['name']) for s in stages for out in s['outputs'])
+    return dict((s['name'], sorted(set(producer[i] for i in s['inputs']
+                                       if i in producer and producer[i]!=s['name'])))
+                for s in stages)
+
+
+def _hash_path(sha, path):
+    if os.path.isdir(path):
+        for dir_path, dir_names, file_names in os.walk(path):
+            dir_names.sort()
+            for name in sorted(file_names):
+                full = os.path.join(dir_path, name)
+                sha.update(os.path.relpath(full, path).encode('utf-8'))
+                _hash_path(sha, full)
+    elif os.path.exists(path):
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+    else:
+        sha.update(b'<missing>')
+
+
+def _package_imports(path):
+    '''
+        Returns:
+            modules (set): The petAppeal submodules a module imports with
+                relative imports, including those inside functions.
+    '''
+
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.level==1:
+            if node.module:
+                modules.add(node.module.split('.')[0])
+            else:
+                modules.update(alias.name for alias in node.names)
+    return modules
+
+
+def stage_modules(stage, root=ROOT):
+    '''
+        Finds the petAppeal modules a stage's script can run: those defining
+        the petAppeal.<name> attributes it uses, and the modules they import,
+        transitively. The lazy-import table in __init__.py only routes names
+        to modules, so it is not part of any stage.
+
+        Args:
+            stage (dict): An entry of STAGES.
+            root (str): The directory the scripts run in.
+        Returns:
+            paths (list): The module files, relative to root.
+    '''
+
+    package = os.path.join(root, 'petAppeal')
+    with open(os.path.join(package, '__init__.py')) as f:
+        init = ast.parse(f.read())
+    exports = {}
+    for node in init.body:
+        targets = [getattr(t, 'id', None) for t in getattr(node, 'targets', [])]
+        if isinstance(node, ast.Assign) and targets==['_EXPORTS']:
+            exports = ast.literal_eval(node.value)
+    location = dict((name, module) for module, names in exports.items() for name in names)
+
+    with open(os.path.join(root, stage['script'])) as f:
+        used = set(re.findall(r'petAppeal\.(\w+)', f.read()))
+    todo = [name if name in exports else location[name] for name in used
+            if name in exports or name in location]
+    modules = set()
+    while todo:
+        module = todo.pop()
+        if module not in modules and os.path.exists(os.path.join(package, module+'.py')):
+            modules.add(module)
+            todo.extend(_package_imports(os.path.join(package, module+'.py')))
+
+    return sorted(os.path.join('petAppeal', module+'.py') for module in modules)
+
+
+def stage_key(stage, root=ROOT):
+    '''
+        Hashes everything a stage reads: its script, the petAppeal modules
+        it uses (see stage_modules), its input files and the environment
+        variables listed in its 'env' (switches such as PETAPPEAL_PHOTOS
+        that change its outputs). Editing e.g. the
+        plotting code does not change the keys of the fetch stages, so it
+        does not trigger a new crawl.
+
+        Args:
+            stage (dict): An entry of STAGES.
+            root (str): The directory the scripts run in.
+        Returns:
+            key (str)
+    '''
+
+    sha = hashlib.sha1()
+    paths = [stage['script']] + stage_modules(stage, root)
+    for path in paths + stage['inputs']:
+        sha.update(path.encode('utf-8'))
+        _hash_path(sha, os.path.join(root, path))
+    for name in stage.get('env', []):
+        sha.update(('%s=%s' % (name, os.environ.get(name, ''))).encode('utf-8'))
+
+    return sha.hexdigest()
+
+
+def _copy(src, dst):
+    ##A saved model is a symlink to its current version (see saveModel);
+    ##the cache holds a copy of what it points to
+    if os.path.islink(dst):
+        os.remove(dst)
+    elif os.path.isdir(dst):
+        shutil.rmtree(dst)
+    elif os.path.exists(dst):
+        os.remove(dst)
+    if os.path.isdir(src):
+        shutil.copytree(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+def stage_outputs(stage, root=ROOT):
+    '''
+        Returns:
+            outputs (list): The stage's output files; a pattern such as
+                '*_treemap.png' stands for the files in root it matches,
+                which may be none.
+    '''
+
+    outputs = []
+    for out in stage['outputs']:
+        if any(c in out for c in '*?['):
+            outputs.extend(sorted(f for f in os.listdir(root) if fnmatch.fnmatchcase(f, out)))
+        else:
+            outputs.append(out)
+    return outputs
+
+
+def _output_hash(path):
+    sha = hashlib.sha1()
+    _hash_path(sha, path)
+    return sha.hexdigest()
+
+
+class ArtifactCache(object):
+    '''
+        Stores each stage's outputs under <cache_dir>/<stage>/<key>/ with a
+        manifest of their hashes.
+    '''
+
+    def __init__(self, cache_dir, root=ROOT):
+        self.cache_dir = cache_dir
+        self.root = root
+
+    def _entry(self, stage, key):
+        return os.path.join(self.cache_dir, stage['name'], key)
+
+    def lookup(self, stage, key):
+        manifest_file = os.path.join(self._entry(stage, key), 'manifest.json')
+        if not os.path.exists(manifest_file):
+            return None
+        with open(manifest_file) as f:
+            return json.load(f)
+
+    def restore(self, stage, key, manifest):
+        '''
+            Copies cached outputs back into the working directory where they
+            are missing or differ. Returns the names restored.
+        '''
+
+        restored = []
+        for out in sorted(manifest['outputs']):
+            path = os.path.join(self.root, out)
+            if not os.path.exists(path) or _output_hash(path)!=manifest['outputs'][out]:
+                _copy(os.path.join(self._entry(stage, key), 'outputs', out), path)
+                restored.append(out)
+        return restored
+
+    def store(self, stage, key, seconds):
+        entry = self._entry(stage, key)
+        tmp = entry + '.tmp'
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp)
+        os.makedirs(os.path.join(tmp, 'outputs'))
+        outputs = {}
+        for out in stage_outputs(stage, self.root):
+            path = os.path.join(self.root, out)
+            if not os.path.exists(path):
+                raise IOError('%s did not write %s' % (stage['script'], out))
+            _copy(path, os.path.join(tmp, 'outputs', out))
+            outputs[out] = _output_hash(path)
+        with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+            json.dump({'stage': stage['name'], 'key': key, 'outputs': outputs,
+                       'seconds': seconds,
+                       'finished': time.strftime('%Y-%m-%dT%H:%M:%S')}, f, indent=2)
+        if os.path.exists(entry):
+            shutil.rmtree(entry)
+        os.rename(tmp, entry)
+
+
+def _run_script(stage, root, log_dir, env):
+    log_file = os.path.join(log_dir, stage['name'] + '.log')
+    ##With PETAPPEAL_INSTRUMENT=1 the script's run is reported under the stage name
+    env = dict(env, PETAPPEAL_STAGE=stage['name'])
+    start = time.time()
+    with open(log_file, 'w') as log:
+        code = subprocess.call([sys.executable, stage['script']], cwd=root, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    return code, time.time() - start, log_file
+
+
+def run_pipeline(targets=None, force=(), jobs=2, cache_dir=None, dry_run=False,
+                 mark_done=(), stages=STAGES, root=ROOT):
+    '''
+        Runs the stages needed for the targets, skipping cached ones.
+
+        Args:
+            targets (list): Stage names to bring up to date; None for all
+                but the optional ones.
+            force (list): Stages to rerun even when cached.
+            jobs (int): The number of stages run at once.
+            cache_dir (str): The artifact cache; defaults to .petAppeal_cache.
+            dry_run (bool): Only report what would run.
+            mark_done (list): Stages whose current outputs are cached as if
+                they had just run.
+            stages (list): The stage definitions.
+            root (str): The directory the scripts run in.
+        Returns:
+            status (dict): 'ran', 'cached', 'failed' or 'skipped' per stage.
+    '''
+
+    by_name = dict((s['name'], s) for s in stages)
+    deps = dependencies(stages)
+    unknown = set(targets or []) | set(force) | set(mark_done)
+    unknown -= set(by_name)
+    if unknown:
+        raise ValueError('Unknown stages: %s' % ', '.join(sorted(unknown)))
+
+    needed = set()
+    todo = list(targets or [s['name'] for s in stages if not s.get('optional')])
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo.extend(deps[name])
+
+    cache_dir = cache_dir or os.path.join(root, '.petAppeal_cache')
+    cache = ArtifactCache(cache_dir, root)
+    log_dir = os.path.join(cache_dir, 'logs')
+    if not dry_run and not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    env = dict(os.environ, MPLBACKEND=os.environ.get('MPLBACKEND', 'Agg'))
+
+    status = {}
+    running = {}
+    done = queue.Queue()
+    order = [s['name'] for s in stages if s['name'] in needed]
+
+    def worker(stage, key):
+        try:
+            done.put((stage['name'], key) + _run_script(stage, root, log_dir, env))
+        except Exception as e:
+            done.put((stage['name'], key, repr(e), 0, None))
+
+    while len(status) < len(order):
+        for name in order:
+            if name in status or name in running or len(running)>=jobs:
+                continue
+            if any(status.get(d) in ('failed', 'skipped') for d in deps[name]):
+                status[name] = 'skipped'
+                print('%-10s skipped (an upstream stage failed)' % name)
+                continue
+            if not all(status.get(d) in ('ran', 'cached') for d in deps[name]):
+                continue
+            stage = by_name[name]
+            key = stage_key(stage, root)
+            if name in mark_done and not dry_run:
+                try:
+                    cache.store(stage, key, 0)
+                except IOError as e:
+                    status[name] = 'failed'
+                    print('%-10s cannot be marked done: %s' % (name, e))
+                    continue
+            manifest = None if name in force else cache.lookup(stage, key)
+            if dry_run and any(status.get(d)=='ran' for d in deps[name]):
+                ##upstream outputs, and so this key, are not known yet
+                manifest = None
+            if manifest is not None:
+                restored = [] if dry_run else cache.restore(stage, key, manifest)
+                status[name] = 'cached'
+                print('%-10s cached %s%s' % (name, key[:10],
+                                            ' (restored %s)' % ', '.join(restored)
+                                            if restored else ''))
+            elif dry_run:
+                status[name] = 'ran'
+                print('%-10s would run %s' % (name, stage['script']))
+            else:
+                print('%-10s running %s' % (name, stage['script']))
+                thread = threading.Thread(target=worker, args=(stage, key))
+                thread.daemon = True
+                thread.start()
+                running[name] = thread
+        if running:
+            name, key, code, seconds, log_file = done.get()
+            del running[name]
+            if code==0:
+                try:
+                    cache.store(by_name[name], key, seconds)
+                    status[name] = 'ran'
+                    print('%-10s done in %.1fs' % (name, seconds))
+                except IOError as e:
+                    status[name] = 'failed'
+                    print('%-10s failed: %s' % (name, e))
+            else:
+                status[name] = 'failed'
+                print('%-10s failed (exit %s), see %s' % (name, code, log_file))
+
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('targets', nargs='*',
+                        help='stages to bring up to date (default: all but optional ones)')
+    parser.add_argument('--force', action='append', default=[],
+                        help='rerun this stage even if cached (repeatable)')
+    parser.add_argument('--jobs', type=int, default=2,
+                        help='stages run at once')
+    parser.add_argument('--mark-done', action='append', default=[],
+                        help='cache this stage\'s current outputs without running it')
+    parser.add_argument('--cache-dir', help='artifact cache directory')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='show what would run')
+    parser.add_argument('--list', action='store_true',
+                        help='list the stages and their dependencies')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        deps = dependencies(STAGES)
+        for stage in STAGES:
+            print('%-10s %-40s after: %s%s' % (stage['name'], stage['script'],
+                                              ', '.join(deps[stage['name']]) or '-',
+                                              ' (optional)' if stage.get('optional') else ''))
+        return 0
+
+    try:
+        status = run_pipeline(args.targets or None, args.force, args.jobs,
+                              args.cache_dir, args.dry_run, args.mark_done)
+    except ValueError as e:
+        parser.error(str(e))
+
+    return 1 if 'failed' in status.values() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
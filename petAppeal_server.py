@@ -0,0 +1,109 @@
+"""
+Serves adoption-likelihood scores over HTTP, and load-tests the service.
+
+The model saved by script 5 and its encode_data categories are loaded once.
+Concurrent requests are coalesced into micro-batches so each batch is scored
+with one vectorized predict_proba.
+
+    python petAppeal_server.py serve --port 8000
+    curl -d '{"animal": "Dog", "age": "Young", ...}' localhost:8000/score
+    curl localhost:8000/metrics
+    python petAppeal_server.py loadtest --requests 5000 --concurrency 32
+
+The load test sends records from the partitioned clean data (or synthetic
+pets with --synthetic) and prints client- and server-side latency.
+"""
+
+import argparse
+import json
+import sys
+
+import petAppeal
+
+
+def _records(args, features):
+    if args.synthetic:
+        pets = petAppeal.synthetic_clean_pets(args.n_pets)
+    else:
+        pets = petAppeal.read_partitioned(args.pets, filters={'animal': ['Cat', 'Dog']},
+                                          columns=features)
+        pets = pets.head(args.n_pets)
+    return json.loads(pets[features].to_json(orient='records'))
+
+
+def serve(args):
+    service = petAppeal.ScoringService(args.model, args.max_batch_size,
+                                       args.max_wait_ms/1000.)
+    server = petAppeal.make_server(service, args.host, args.port)
+    print('Scoring with %s (%d trees) on http://%s:%d'
+          % (args.model, service.header['n_trees'], args.host, server.server_address[1]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.batcher.close()
+        print(json.dumps(service.stats.snapshot(), indent=2, sort_keys=True))
+    return 0
+
+
+def loadtest(args):
+    features = petAppeal.service_health(args.url)['features']
+    report = petAppeal.load_test(args.url, _records(args, features), args.requests,
+                                 args.concurrency, args.pets_per_request)
+    print('%d requests (%d errors) in %.1fs: %.0f requests/s'
+          % (report['requests'], report['errors'], report['seconds'],
+             report['requests_per_sec']))
+    print('client p50 %.1f ms, p99 %.1f ms, max %.1f ms'
+          % (report['p50_ms'], report['p99_ms'], report['max_ms']))
+    server = report['server']
+    ##the service leaves out latencies and batch sizes it has not seen, e.g.
+    ##when every request was rejected before scoring
+    if 'p50_ms' in server:
+        print('server p50 %.1f ms, p99 %.1f ms' % (server['p50_ms'], server['p99_ms']))
+    if 'mean_batch_size' in server:
+        print('server mean batch %.1f (max %d)'
+              % (server['mean_batch_size'], server['max_batch_size']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    return 1 if report['errors'] else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    commands = parser.add_subparsers(dest='command')
+
+    serve_parser = commands.add_parser('serve', help='run the scoring service')
+    serve_parser.add_argument('--model', default='petfinder_trained_RF_classifier',
+                              help='model artifact saved by script 5')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    serve_parser.add_argument('--max-batch-size', type=int, default=64,
+                              help='most requests scored together')
+    serve_parser.add_argument('--max-wait-ms', type=float, default=2,
+                              help='how long a request waits for others to batch with')
+
+    load_parser = commands.add_parser('loadtest', help='send concurrent scoring requests')
+    load_parser.add_argument('--url', default='http://127.0.0.1:8000')
+    load_parser.add_argument('--requests', type=int, default=2000)
+    load_parser.add_argument('--concurrency', type=int, default=16,
+                             help='client threads')
+    load_parser.add_argument('--pets-per-request', type=int, default=1)
+    load_parser.add_argument('--pets', default='petfinder_data_clean',
+                             help='partitioned clean data to draw records from')
+    load_parser.add_argument('--synthetic', action='store_true',
+                             help='send synthetic pets instead')
+    load_parser.add_argument('--n-pets', type=int, default=1000,
+                             help='distinct records cycled through')
+    load_parser.add_argument('--output', help='write the JSON report here')
+
+    args = parser.parse_args(argv)
+    if args.command=='serve':
+        return serve(args)
+    return loadtest(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+'''
+    Tests saving, reloading and incrementally updating model artifacts with
+    small forests trained on synthetic pets. Run from the repository root
+    with
+
+        python -m unittest discover tests
+'''
+
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import precision_score
+
+import petAppeal
+
+FEATURES = sorted(petAppeal.ENCODING) + ['description_length', 'description_polarity']
+
+
+class ModelArtifactTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pets = petAppeal.synthetic_clean_pets(600)
+        pets = pets[pets.status.isin(['Available', 'Adopted'])]
+        cls.x = np.array(petAppeal.encode_data(pets[FEATURES].copy()), dtype=np.float64)
+        cls.y = np.asarray(pets.status)
+        cls.forest = RandomForestClassifier(n_estimators=5, random_state=0).fit(cls.x, cls.y)
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.work_dir, 'model')
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_resave_leaves_loaded_arrays_intact(self):
+        flat = petAppeal.FlatForest.from_forest(self.forest)
+        classes = flat.classes
+        petAppeal.saveModel(flat, self.path, FEATURES, classes=['a', 'b'])
+        self.assertIs(flat.classes, classes)
+
+        first, _ = petAppeal.loadModel(self.path)
+        expected = first.predict_proba(self.x)
+        bigger = RandomForestClassifier(n_estimators=15, random_state=1).fit(self.x, self.y)
+        for _ in range(3):
+            petAppeal.saveModel(bigger, self.path, FEATURES)
+
+        ##the first load still scores from its own, untouched arrays
+        np.testing.assert_array_equal(first.predict_proba(self.x), expected)
+        second, header = petAppeal.loadModel(self.path)
+        self.assertEqual(header['n_trees'], 15)
+        np.testing.assert_allclose(second.predict_proba(self.x),
+                                   bigger.predict_proba(self.x), rtol=1e-10)
+        ##the current version and the one it replaced
+        self.assertEqual(len([d for d in os.listdir(self.work_dir) if d!='model']), 2)
+
+    def test_existing_directory_artifact_is_replaced(self):
+        os.makedirs(self.path)
+        with open(os.path.join(self.path, 'header.json'), 'w') as f:
+            f.write('{}')
+        petAppeal.saveModel(self.forest, self.path, FEATURES, compress=True)
+        self.assertTrue(os.path.islink(self.path))
+        model, header = petAppeal.loadModel(self.path)
+        self.assertTrue(header['compressed'])
+        np.testing.assert_allclose(model.predict_proba(self.x),
+                                   self.forest.predict_proba(self.x), rtol=1e-10)
+
+    def test_update_compares_precision_on_balanced_records(self):
+        metadata = {'reference': petAppeal.feature_reference(self.x, FEATURES),
+                    'precision_macro': 1.0}
+        petAppeal.saveModel(self.forest, self.path, FEATURES, metadata=metadata)
+        before, _ = petAppeal.loadModel(self.path)
+        expected = before.predict_proba(self.x)
+
+        ##mostly one class, as a week of new records often is
+        first_class = self.y==self.forest.classes_[0]
+        rows = np.concatenate([np.flatnonzero(first_class),
+                               np.flatnonzero(~first_class)[:20]])
+        x_new, y_new = self.x[rows], self.y[rows]
+        decision = petAppeal.update_model(self.path, x_new, y_new, n_new_trees=3,
+                                          psi_threshold=np.inf, max_precision_drop=1.0)
+        self.assertEqual(decision['action'], 'updated')
+
+        balanced = petAppeal.balanced_indices(y_new, max_ratio=1, random_state=0)
+        self.assertEqual(len(balanced), 40)
+        y_pred = self.forest.classes_[np.argmax(before.predict_proba(x_new[balanced]), axis=1)]
+        self.assertAlmostEqual(decision['precision_macro'],
+                               precision_score(y_new[balanced], y_pred, average='macro'))
+
+        model, header = petAppeal.loadModel(self.path)
+        self.assertEqual(header['n_trees'], 8)
+        self.assertEqual(header['metadata']['n_updates'], 1)
+        np.testing.assert_array_equal(before.predict_proba(self.x), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+'''
+    Tests the photo fetcher against a local HTTP server standing in for
+    photos.petfinder.com, including a missing photo and one that stalls past
+    the download timeout. Run from the repository root with
+
+        python -m unittest discover tests
+'''
+
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import pandas as pd
+try:
+    from BaseHTTPServer import HTTPServer
+    from SimpleHTTPServer import SimpleHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import HTTPServer, SimpleHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+
+import petAppeal
+
+
+class _PhotoServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        ##the client gave up on a stalled request
+        pass
+
+
+class _PhotoHandler(SimpleHTTPRequestHandler):
+    '''
+        Serves the server's fixture directory and logs every path requested.
+        Paths under /slow/ answer only after server.stall seconds.
+    '''
+
+    def translate_path(self, path):
+        return os.path.join(self.server.root, path.split('?')[0].lstrip('/'))
+
+    def do_GET(self):
+        self.server.requested.append(self.path)
+        if self.path.startswith('/slow/'):
+            time.sleep(self.server.stall)
+        SimpleHTTPRequestHandler.do_GET(self)
+
+    def log_message(self, *args):
+        pass
+
+
+class PhotoFeaturesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from PIL import Image
+
+        cls.root = tempfile.mkdtemp()
+        Image.new('L', (200, 150), 128).save(os.path.join(cls.root, 'grey.jpg'), quality=95)
+        Image.new('RGB', (40, 30), (255, 255, 255)).save(os.path.join(cls.root, 'white.png'))
+        with open(os.path.join(cls.root, 'broken.jpg'), 'wb') as f:
+            f.write(b'not an image')
+
+        cls.server = _PhotoServer(('127.0.0.1', 0), _PhotoHandler)
+        cls.server.root = cls.root
+        cls.server.requested = []
+        cls.server.stall = 2
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.url = 'http://127.0.0.1:%d/' % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(cls.root)
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        del self.server.requested[:]
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def photos(self, *names):
+        return str([self.url + name for name in names])
+
+    def test_photo_urls_keeps_one_size_per_photo(self):
+        urls = petAppeal.photo_urls(self.photos('1/?width=500', '1/?width=95', '2/?width=500'))
+        self.assertEqual(urls, [self.url + '1/?width=500', self.url + '2/?width=500'])
+        self.assertEqual(petAppeal.photo_urls(float('nan')), [])
+
+    def test_features_and_failures(self):
+        image_col = pd.Series([self.photos('grey.jpg?width=500', 'grey.jpg?width=95',
+                                           'white.png'),
+                               self.photos('missing.jpg'),
+                               self.photos('slow/grey.jpg'),
+                               float('nan'),
+                               self.photos('broken.jpg')],
+                              index=[10, 11, 12, 13, 14])
+        photos = petAppeal.photo_features(image_col, cache_dir=self.cache_dir, timeout=0.5)
+
+        self.assertEqual(list(photos.index), [10, 11, 12, 13, 14])
+        self.assertEqual(list(photos.photo_count), [2, 1, 1, 0, 1])
+        self.assertEqual(list(photos.photos_decoded), [1, 0, 0, 0, 0])
+        self.assertEqual((photos.photo_width[10], photos.photo_height[10]), (200, 150))
+        self.assertAlmostEqual(photos.photo_brightness[10], 128/255., places=2)
+        self.assertAlmostEqual(photos.photo_sharpness[10], 0, places=4)
+        self.assertTrue((photos.loc[11:, petAppeal.PHOTO_FEATURES[2:]]==0).all().all())
+
+    def test_cache_avoids_second_download(self):
+        image_col = pd.Series([self.photos('grey.jpg'), self.photos('missing.jpg'),
+                               self.photos('slow/grey.jpg')])
+        first = petAppeal.photo_features(image_col, cache_dir=self.cache_dir, timeout=0.5)
+        self.assertEqual(len(self.server.requested), 3)
+
+        ##the photo, the 404 and the timeout are all cached
+        del self.server.requested[:]
+        start = time.time()
+        second = petAppeal.photo_features(image_col, cache_dir=self.cache_dir, timeout=0.5)
+        self.assertEqual(self.server.requested, [])
+        self.assertLess(time.time() - start, 0.5)
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_failed_download_is_retried_after_expiry(self):
+        image_col = pd.Series([self.photos('missing.jpg'), self.photos('slow/grey.jpg')])
+        petAppeal.photo_features(image_col, cache_dir=self.cache_dir, timeout=0.5)
+        del self.server.requested[:]
+
+        petAppeal.photo_features(image_col, cache_dir=self.cache_dir, timeout=0.5,
+                                 retry_after=0)
+        ##photos the server reported as gone stay cached
+        self.assertEqual(self.server.requested, ['/slow/grey.jpg'])
+
+
+if __name__ == '__main__':
+    unittest.main()
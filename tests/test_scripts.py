@@ -0,0 +1,80 @@
+'''
+    Runs the munge and visualization scripts (3 and 4) end to end on
+    synthetic pets in a temporary directory, without photo downloads. Run
+    from the repository root with
+
+        python -m unittest discover tests
+'''
+
+from __future__ import absolute_import
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import pandas as pd
+
+import petAppeal
+import petAppeal_pipeline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_script(script, cwd):
+    env = dict(os.environ, PYTHONPATH=ROOT, MPLBACKEND='Agg')
+    env.pop('PETAPPEAL_PHOTOS', None)
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, script)], cwd=cwd,
+                               env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = process.communicate()[0]
+    return process.returncode, output.decode('utf-8', 'replace')
+
+
+class ScriptsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.mkdtemp()
+        petAppeal.synthetic_pets(400).to_csv(os.path.join(cls.work_dir,
+                                                          'petfinder_shelter_animals.csv'))
+        cls.munge = run_script('3_petAppeal_dataMunge.py', cls.work_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+
+    def test_munge_writes_typed_partitions(self):
+        code, output = self.munge
+        self.assertEqual(code, 0, output)
+        pets = petAppeal.read_pets(os.path.join(self.work_dir, 'petfinder_data_clean'),
+                                   filters={'animal': ['Cat', 'Dog']})
+        self.assertEqual(pets.status.cat.categories.tolist(),
+                         ['Available', 'Adopted', 'On Hold', 'Pending'])
+        self.assertEqual(pets.animal.cat.categories.tolist(), ['Cat', 'Dog'])
+        self.assertTrue(pets.age.cat.ordered)
+        self.assertEqual(pets.mix.dtype, bool)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(pets.lastUpdate))
+        self.assertNotIn('photo_count', pets)
+
+    def test_visualization_writes_its_figures(self):
+        self.assertEqual(self.munge[0], 0, self.munge[1])
+        code, output = run_script('4_petAppeal_visualization.py', self.work_dir)
+        self.assertEqual(code, 0, output)
+        stage = [s for s in petAppeal_pipeline.STAGES if s['name']=='visualize'][0]
+        figures = petAppeal_pipeline.stage_outputs(stage, self.work_dir)
+        self.assertIn('Cat_treemap.png', figures)
+        missing = [f for f in figures if not os.path.exists(os.path.join(self.work_dir, f))]
+        self.assertEqual(missing, [])
+
+    def test_category_counts_is_named_like_groupby(self):
+        pets = petAppeal.apply_dtypes(petAppeal.synthetic_clean_pets(200))
+        for col, order in [('noClaws', petAppeal.YES_NO),
+                           ('size', petAppeal.CATEGORIES['size'])]:
+            counts = petAppeal.category_counts(pets[col], order)
+            self.assertEqual(counts.index.tolist(), order)
+            self.assertEqual(counts.reset_index().columns[0], col)
+            self.assertEqual(counts.sum(), len(pets))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+'''
+    Tests the scoring service in process: request validation, micro-batched
+    scoring and the HTTP error paths, with a small forest trained on
+    synthetic pets. Run from the repository root with
+
+        python -m unittest discover tests
+'''
+
+from __future__ import absolute_import
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+try:
+    from httplib import HTTPConnection
+except ImportError:
+    from http.client import HTTPConnection
+
+import petAppeal
+import petAppeal_server
+
+FEATURES = sorted(petAppeal.ENCODING) + ['description_length', 'description_polarity']
+
+
+class ScoringServiceTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pets = petAppeal.synthetic_clean_pets(400)
+        encoded = petAppeal.encode_data(pets[FEATURES].copy())
+        cls.forest = RandomForestClassifier(n_estimators=10, random_state=0)
+        cls.forest.fit(np.array(encoded, dtype=np.float64), pets.status)
+        cls.work_dir = tempfile.mkdtemp()
+        cls.model_dir = os.path.join(cls.work_dir, 'model')
+        petAppeal.saveModel(cls.forest, cls.model_dir, FEATURES)
+
+        cls.records = json.loads(pets[FEATURES].head(50).to_json(orient='records'))
+        cls.expected = cls.forest.predict_proba(np.array(encoded.head(50), dtype=np.float64))
+
+        ##a long max_wait so concurrent requests are batched together
+        cls.service = petAppeal.ScoringService(cls.model_dir, max_batch_size=16,
+                                               max_wait=0.05)
+        cls.server = petAppeal.make_server(cls.service, port=0)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.batcher.close()
+        shutil.rmtree(cls.work_dir)
+
+    def request(self, method, path, body=None):
+        connection = HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=10)
+        try:
+            connection.request(method, path, body)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read().decode('utf-8'))
+        finally:
+            connection.close()
+
+    def record(self, **values):
+        return dict(self.records[0], **values)
+
+    def assertRejected(self, record, message):
+        with self.assertRaises(ValueError) as raised:
+            self.service.validate([record])
+        self.assertIn(message, str(raised.exception))
+        status, body = self.request('POST', '/score', json.dumps(record))
+        self.assertEqual(status, 400)
+        self.assertIn(message, body['error'])
+
+    def test_scores_match_the_forest(self):
+        proba = self.service.score(self.records)
+        np.testing.assert_allclose(proba, self.expected, rtol=1e-5)
+
+    def test_boolean_flags_score_like_yes_no(self):
+        as_bools = [dict(r, mix=r['mix']=='yes', altered=r['altered']=='yes')
+                    for r in self.records]
+        np.testing.assert_allclose(self.service.score(as_bools), self.expected, rtol=1e-5)
+
+    def test_invalid_values_are_rejected(self):
+        self.assertRejected(self.record(mix=1), 'mix must be one of')
+        self.assertRejected(self.record(mix=0), 'mix must be one of')
+        self.assertRejected(self.record(age=True), 'age must be one of')
+        self.assertRejected(self.record(age=['Young']), 'age must be one of')
+        self.assertRejected(self.record(age={'Young': 1}), 'age must be one of')
+        self.assertRejected(self.record(age='Ancient'), 'age must be one of')
+        self.assertRejected(self.record(description_length='long'), 'must be a number')
+        self.assertRejected(self.record(description_length=True), 'must be a number')
+        record = self.record()
+        del record['sex']
+        self.assertRejected(record, 'missing sex')
+
+    def test_malformed_requests(self):
+        for body in ['{not json', '[]', '3', '[3]']:
+            status, response = self.request('POST', '/score', body)
+            self.assertEqual(status, 400, body)
+            self.assertIn('error', response)
+        self.assertEqual(self.request('POST', '/predict', '{}')[0], 404)
+        self.assertEqual(self.request('GET', '/nothing')[0], 404)
+
+    def test_http_scoring_and_metrics(self):
+        status, body = self.request('POST', '/score', json.dumps({'pets': self.records[:3]}))
+        self.assertEqual(status, 200)
+        self.assertEqual(body['classes'], [str(c) for c in self.forest.classes_])
+        for scores, expected in zip(body['scores'], self.expected[:3]):
+            np.testing.assert_allclose([scores[c] for c in body['classes']], expected,
+                                       rtol=1e-5)
+
+        status, health = self.request('GET', '/health')
+        self.assertEqual((status, health['features']), (200, FEATURES))
+        status, metrics = self.request('GET', '/metrics')
+        self.assertEqual(status, 200)
+        self.assertGreater(metrics['requests'], 0)
+
+    def test_concurrent_requests_are_batched(self):
+        results = [None]*len(self.records)
+
+        def client(i):
+            results[i] = self.request('POST', '/score', json.dumps(self.records[i]))
+
+        threads = [threading.Thread(target=client, args=(i,))
+                   for i in range(len(self.records))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for (status, body), expected in zip(results, self.expected):
+            self.assertEqual(status, 200)
+            np.testing.assert_allclose([body['scores'][0][c] for c in body['classes']],
+                                       expected, rtol=1e-5)
+        self.assertGreater(self.service.stats.snapshot()['max_batch_size'], 1)
+
+    def test_loadtest_reports_when_every_request_fails(self):
+        ##a fresh service, so its metrics hold only the rejected requests
+        service = petAppeal.ScoringService(self.model_dir)
+        server = petAppeal.make_server(service, port=0)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        records = petAppeal_server._records
+        petAppeal_server._records = lambda args, features: [self.record(age='Ancient')]
+        try:
+            code = petAppeal_server.main(['loadtest', '--requests', '5', '--concurrency', '2',
+                                          '--url', 'http://127.0.0.1:%d'
+                                          % server.server_address[1]])
+        finally:
+            petAppeal_server._records = records
+            server.shutdown()
+            server.server_close()
+            service.batcher.close()
+        self.assertEqual(code, 1)
+        self.assertEqual(service.stats.snapshot()['errors'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
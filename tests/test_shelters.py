@@ -0,0 +1,78 @@
+'''
+    Tests the shelter locator's radius and nearest queries, including zip
+    codes that have no shelter, with a small shelter list and gazetteer. Run
+    from the repository root with
+
+        python -m unittest discover tests
+'''
+
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+import petAppeal
+
+SHELTERS = pd.DataFrame({'name': ['North', 'Centre', 'South'],
+                         'latitude': [40.10, 40.00, 39.00],
+                         'longitude': [-75.00, -75.00, -75.00],
+                         'zip_code': ['19001', '19002', '19100']})
+
+
+class ShelterLocatorTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.mkdtemp()
+        cls.gazetteer_file = os.path.join(cls.work_dir, 'zcta.txt')
+        ##the Census file pads its last column name with spaces
+        with open(cls.gazetteer_file, 'w') as f:
+            f.write('GEOID\tALAND\tINTPTLAT\tINTPTLONG                    \n'
+                    '19001\t100\t40.11\t-75.00\n'
+                    '19050\t100\t40.05\t-75.00\n'
+                    '00501\t100\t40.81\t-73.04\n')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+
+    def test_zip_without_a_shelter_is_rejected_without_a_gazetteer(self):
+        locator = petAppeal.ShelterLocator(SHELTERS)
+        self.assertEqual(locator.shelters_within('19002', 10).name.tolist(),
+                         ['Centre', 'North'])
+        with self.assertRaises(ValueError) as raised:
+            locator.shelters_within('19050', 10)
+        self.assertIn('19050', str(raised.exception))
+        with self.assertRaises(ValueError):
+            locator.nearest(['19001', '19050'])
+
+        indices, distances = locator.radius(['19001', '19050'], 10, unknown='ignore')
+        self.assertEqual([len(i) for i in indices], [2, 0])
+        distances, indices = locator.nearest(['19001', '19050'], k=2, unknown='ignore')
+        self.assertTrue(np.isnan(distances[1]).all())
+        self.assertEqual(indices[1].tolist(), [-1, -1])
+
+    def test_gazetteer_locates_zips_without_a_shelter(self):
+        centroids = petAppeal.load_zip_centroids(self.gazetteer_file)
+        self.assertEqual(sorted(centroids.index), [501, 19001, 19050])
+
+        locator = petAppeal.ShelterLocator(SHELTERS, centroids)
+        found = locator.shelters_within('19050', 10)
+        self.assertEqual(found.name.tolist(), ['Centre', 'North'])
+        self.assertAlmostEqual(found.distance_miles.iloc[0], 0.05*69.09, places=1)
+        self.assertEqual(locator.shelters_nearest('00501', k=1).name.tolist(), ['North'])
+        ##the gazetteer centroid wins over the shelter mean; zips it lacks keep theirs
+        np.testing.assert_allclose(locator.points(['19001', '19100']),
+                                   [[40.11, -75.00], [39.00, -75.00]])
+
+    def test_persisted_locator_tracks_the_gazetteer(self):
+        csv_file = os.path.join(self.work_dir, 'shelters.csv')
+        SHELTERS.to_csv(csv_file, index=False)
+        locator = petAppeal.load_shelter_locator(csv_file)
+        self.assertRaises(ValueError, locator.points, '19050')
+
+        locator = petAppeal.load_shelter_locator(csv_file, gazetteer_file=self.gazetteer_file)
+        np.testing.assert_allclose(locator.points('19050'), [[40.05, -75.00]])
@@ -0,0 +1,52 @@
+'''
+    Checks the streaming accumulators against pandas on data with missing
+    values, filled chunk by chunk and merged across workers. Run from the
+    repository root with
+
+        python -m unittest discover tests
+'''
+
+from __future__ import absolute_import
+import unittest
+import numpy as np
+import pandas as pd
+
+import petAppeal
+
+
+class StreamingAccumulatorsTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        x = rng.normal(100, 30, 500)
+        self.df = pd.DataFrame({'a': x, 'b': 0.5*x + rng.normal(0, 5, 500),
+                                'c': rng.uniform(-1, 1, 500)})
+        for col, frac in [('a', 0.1), ('b', 0.3), ('c', 0.05)]:
+            self.df.loc[rng.uniform(size=500)<frac, col] = np.nan
+
+    def test_moments_delete_missing_values_pairwise(self):
+        first = petAppeal.RunningMoments(self.df.columns)
+        for chunk in petAppeal.iter_chunks(self.df.iloc[:320], 70):
+            first.update(chunk)
+        second = petAppeal.RunningMoments(self.df.columns).update(self.df.iloc[320:])
+        moments = first.merge(second)
+
+        np.testing.assert_allclose(moments.corr(), self.df.corr(), rtol=1e-10)
+        np.testing.assert_allclose(moments.cov(), self.df.cov(), rtol=1e-10)
+        np.testing.assert_allclose(moments.variance(), self.df.var(), rtol=1e-10)
+
+    def test_histogram_puts_edge_values_in_their_bin(self):
+        values = np.arange(-20, 21)*0.05
+        hist = petAppeal.StreamingHistogram(0.05).update(values)
+        self.assertEqual(hist.offset, -20)
+        self.assertEqual(hist.counts.tolist(), [1]*41)
+
+        chunked = petAppeal.StreamingHistogram(0.05)
+        for chunk in np.array_split(values, 4):
+            chunked.merge(petAppeal.StreamingHistogram(0.05).update(chunk))
+        self.assertEqual((chunked.offset, chunked.counts.tolist()),
+                         (hist.offset, hist.counts.tolist()))
+
+
+if __name__ == '__main__':
+    unittest.main()